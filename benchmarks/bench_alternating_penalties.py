@@ -0,0 +1,76 @@
+"""Time `compute_alternating_penalties` against the former per-candidate loop, kept as the reference in the tests.
+
+Hands come from synthetic charts and from dense jumptrills, where nearly every hit is a manip candidate.
+
+Run from the repository root: `PYTHONPATH=src python benchmarks/bench_alternating_penalties.py`
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+from msgspec.json import decode, encode
+
+from models.responses.chart_response import ChartNote, ChartResponse
+from transformers.ffr_chart_to_extended_chart import compute_alternating_penalties, compute_time_score, hand_hits, note_array
+from utils.mock_api_server import synthetic_chart
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "tests"))
+from test_chart_extension import _reference_alternating_penalties  # noqa: E402
+
+
+def _jumptrill(note_count: int) -> list[ChartNote]:
+    rng = np.random.default_rng(note_count)
+    ms = np.cumsum(rng.integers(35, 75, note_count))
+    return [ChartNote(0, int(i % 2 + 2 * (i // 2 % 2)), 0, int(t)) for i, t in enumerate(ms)]
+
+
+def _penalty_inputs(notes: list[ChartNote]):
+    """The inputs `get_manip_jumps_on_hand` passes for the left hand."""
+    hits, _ = hand_hits(note_array(notes))
+    times, columns = hits[:, 0].astype(np.int32), hits[:, 1].astype(np.int8)
+    time_diffs = np.diff(times)
+
+    column_pairs = ((columns[:-1] == 1) & (columns[1:] == 2)) | ((columns[:-1] == 2) & (columns[1:] == 1))
+    candidate_indices = np.flatnonzero((time_diffs <= 100) & column_pairs)
+    time_scores = np.zeros(len(times), dtype=np.float32)
+    time_scores[candidate_indices] = compute_time_score(time_diffs[candidate_indices].astype(np.float32))
+    return candidate_indices, times, columns, time_scores
+
+
+def _best_of(repeats: int, fn, *args):
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = fn(*args)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 50000])
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    for note_count in args.sizes:
+        charts = {
+            "synthetic": decode(encode(synthetic_chart(1, note_count)), type=ChartResponse).chart,
+            "jumptrill": _jumptrill(note_count),
+        }
+        for name, notes in charts.items():
+            inputs = _penalty_inputs(notes)
+            loop_time, expected = _best_of(args.repeats, _reference_alternating_penalties, *inputs)
+            batched_time, penalties = _best_of(args.repeats, compute_alternating_penalties, *inputs)
+
+            assert np.array_equal(penalties, expected)
+            print(
+                f"{note_count:>6} notes {name:>9}: {len(inputs[0]):>6} candidates, "
+                f"loop {loop_time * 1000:8.2f} ms, batched {batched_time * 1000:7.2f} ms ({loop_time / batched_time:5.1f}x)"
+            )
+
+
+if __name__ == "__main__":
+    main()
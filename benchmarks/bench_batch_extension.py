@@ -0,0 +1,64 @@
+"""Time `extend_ffr_charts` on batches of different sizes against `extend_ffr_chart` on each chart, over a synthetic catalog.
+
+Run from the repository root: `PYTHONPATH=src python benchmarks/bench_batch_extension.py`
+"""
+
+import argparse
+import time
+import tracemalloc
+
+from msgspec.json import decode, encode
+
+from models.responses.chart_response import ChartResponse
+from transformers.ffr_chart_to_extended_chart import extend_ffr_chart
+from transformers.ffr_charts_to_extended_charts import batch_charts, extend_ffr_charts, extend_hit_tables
+from utils.mock_api_server import synthetic_chart
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--charts", type=int, default=1000)
+    parser.add_argument("--min-notes", type=int, default=200)
+    parser.add_argument("--max-notes", type=int, default=3000)
+    parser.add_argument("--batch-notes", type=int, nargs="+", default=[20_000, 200_000, 1_000_000])
+    args = parser.parse_args()
+
+    step = (args.max_notes - args.min_notes) // max(1, args.charts - 1)
+    charts = [
+        decode(encode(synthetic_chart(level_id, args.min_notes + (level_id - 1) * step)), type=ChartResponse)
+        for level_id in range(1, args.charts + 1)
+    ]
+    note_count = sum(len(chart.chart) for chart in charts)
+    print(f"{len(charts)} charts, {note_count} notes")
+
+    start = time.perf_counter()
+    expected = [extend_ffr_chart(chart) for chart in charts]
+    single_time = time.perf_counter() - start
+    print(f"one chart at a time: {single_time:.3f}s")
+
+    for batch_notes in args.batch_notes:
+        batches = list(batch_charts(charts, batch_notes))
+
+        start = time.perf_counter()
+        for batch in batches:
+            extend_hit_tables(batch)
+        tables_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        extended = [chart for batch in batches for chart in extend_ffr_charts(batch)]
+        batch_time = time.perf_counter() - start
+        assert extended == expected
+
+        tracemalloc.start()
+        extend_ffr_charts(max(batches, key=len))
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        print(
+            f"batches of {batch_notes:>9} notes ({len(batches):>4} batches): {batch_time:.3f}s ({single_time / batch_time:4.1f}x), "
+            f"hit tables only {tables_time:.3f}s ({single_time / tables_time:4.1f}x), peak {peak / (1 << 20):.0f} MiB"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""Compare sequential, concurrent and cached black-box estimation on a local mock autodifficulty endpoint.
+
+Run from the repository root: `PYTHONPATH=src python benchmarks/bench_blackbox_estimates.py`
+"""
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+from msgspec.json import decode, encode
+
+from models.responses.chart_response import ChartResponse
+from services.blackbox_calc_api_service import _estimate_charts
+from utils.estimate_cache import EstimateCache
+from utils.mock_api_server import MockApiServer, synthetic_chart
+
+
+def _run(name: str, charts: list[ChartResponse], cache_path: Path, workers: int, url: str):
+    with EstimateCache(cache_path) as cache:
+        start = time.perf_counter()
+        results = _estimate_charts(charts, cache, workers, url)
+        elapsed = time.perf_counter() - start
+
+    print(f"{name:>24}: {elapsed:6.2f}s, {len(results)}/{len(charts)} estimated")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--charts", type=int, default=200)
+    parser.add_argument("--notes", type=int, default=1000)
+    parser.add_argument("--latency", type=int, default=50, help="Simulated endpoint latency in ms")
+    parser.add_argument("--workers", type=int, default=16)
+    parser.add_argument("--updated", type=int, default=5, help="Charts changed before the cached re-run")
+    args = parser.parse_args()
+
+    charts = [decode(encode(synthetic_chart(level_id, args.notes)), type=ChartResponse) for level_id in range(1, args.charts + 1)]
+
+    with MockApiServer(latency_ms=args.latency) as api, tempfile.TemporaryDirectory() as cache_dir:
+        _run("sequential", charts, Path(cache_dir) / "sequential", 1, api.url)
+
+        cache_path = Path(cache_dir) / "concurrent"
+        _run(f"{args.workers} workers", charts, cache_path, args.workers, api.url)
+
+        for chart in charts[: args.updated]:
+            chart.chart[0].ms += 1
+        _run(f"re-run, {args.updated} charts changed", charts, cache_path, args.workers, api.url)
+
+
+if __name__ == "__main__":
+    main()
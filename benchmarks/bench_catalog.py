@@ -0,0 +1,72 @@
+"""Time building and refreshing the chart catalog, and a metadata query against opening every chart file.
+
+Run from the repository root: `PYTHONPATH=src python benchmarks/bench_catalog.py`
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import tempfile
+import time
+
+from msgspec.json import decode, encode
+
+from models.responses.chart_response import ChartResponse
+from services.chart_catalog_service import load_catalog, parse_catalog_filter, query_catalog, update_catalog
+from services.ffr_api_service import _load_chart_file, _write_chart_file
+from transformers.ffr_chart_to_extended_chart import extend_ffr_chart
+from utils.io import build_chart_filename, chart_store_path
+from utils.mock_api_server import synthetic_chart
+
+
+def _timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--charts", type=int, default=300)
+    parser.add_argument("--notes", type=int, default=1500)
+    parser.add_argument("--changed", type=int, default=3, help="Charts rewritten before the incremental refresh")
+    args = parser.parse_args()
+
+    results = []
+    with tempfile.TemporaryDirectory() as directory, contextlib.redirect_stdout(io.StringIO()) as log:
+        for level_id in range(1, args.charts + 1):
+            chart = decode(encode(synthetic_chart(level_id, args.notes + level_id)), type=ChartResponse)
+            _write_chart_file(extend_ffr_chart(chart), str(build_chart_filename(directory, True, True, level_id)), True)
+
+        catalog = load_catalog(os.path.join(directory, "catalog.json"))
+        _, build = _timed(lambda: update_catalog(catalog, directory))
+        _, noop = _timed(lambda: update_catalog(catalog, directory))
+
+        for path in sorted(chart_store_path(directory, True, True).glob("chart_*"))[: args.changed]:
+            os.utime(path, ns=(0, 0))
+        _, incremental = _timed(lambda: update_catalog(catalog, directory))
+
+        filters = [parse_catalog_filter("note_count>=1500"), parse_catalog_filter("difficulty=80..90")]
+        found, query = _timed(lambda: query_catalog(catalog, filters, "nps", descending=True))
+
+        def full_scan():
+            paths = sorted(chart_store_path(directory, True, True).glob("chart_*"))
+            charts = (_load_chart_file(str(path), True, True) for path in paths)
+            return [chart.info.id for chart in charts if chart.info.note_count >= 1500 and 80 <= chart.info.difficulty <= 90]
+
+        scanned, scan = _timed(full_scan)
+        assert sorted(entry.id for entry in found) == sorted(scanned)
+
+        results.append(f"{'initial index':>18}: {build:7.3f}s for {args.charts} charts")
+        results.append(f"{'no-op refresh':>18}: {noop:7.3f}s")
+        results.append(f"{f'{args.changed} charts changed':>18}: {incremental:7.3f}s")
+        results.append(f"{'query':>18}: {query * 1000:7.3f}ms, {len(found)} charts")
+        results.append(f"{'full file scan':>18}: {scan * 1000:7.1f}ms ({scan / query:.0f}x slower)")
+
+    log.close()
+    print("\n".join(results))
+
+
+if __name__ == "__main__":
+    main()
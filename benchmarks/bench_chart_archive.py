@@ -0,0 +1,65 @@
+"""Compare loading charts from a one-file-per-chart directory against the single-file `.ffra` archive.
+
+Run from the repository root: `PYTHONPATH=src python benchmarks/bench_chart_archive.py`
+"""
+
+import argparse
+import contextlib
+import io
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from msgspec.json import decode, encode
+
+from models.api.api_action_args import ChartArgs, PackChartsArgs
+from models.responses.chart_response import ChartResponse
+from services.chart_archive_service import pack_charts
+from services.ffr_api_service import _write_chart_file, get_chart
+from utils.chart_archive import open_chart_archive
+from utils.io import build_chart_filename
+from utils.mock_api_server import synthetic_chart
+
+
+def _load_all(level_ids: list[int], from_dir: str, compressed: bool) -> float:
+    start = time.perf_counter()
+    for level_id in level_ids:
+        get_chart(ChartArgs(level=level_id, compressed=compressed, extended=False, from_dir=from_dir))
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--charts", type=int, default=2000)
+    parser.add_argument("--notes", type=int, default=1000)
+    args = parser.parse_args()
+
+    level_ids = list(range(1, args.charts + 1))
+
+    with tempfile.TemporaryDirectory() as work_dir, contextlib.redirect_stdout(io.StringIO()) as log:
+        store = str(Path(work_dir) / "store")
+        for level_id in level_ids:
+            chart = decode(encode(synthetic_chart(level_id, args.notes)), type=ChartResponse)
+            _write_chart_file(chart, str(build_chart_filename(store, False, True, level_id)), compressed=True)
+
+        archive_path = str(Path(work_dir) / "charts.ffra")
+        pack_charts(PackChartsArgs(store, archive_path, compressed=False))
+        open_chart_archive(archive_path)
+
+        directory_time = _load_all(level_ids, store, compressed=True)
+        archive_time = _load_all(level_ids, archive_path, compressed=False)
+
+        sample = random.sample(level_ids, 100)
+        start = time.perf_counter()
+        for level_id in sample:
+            open_chart_archive(archive_path).read(level_id, False)
+        random_read = (time.perf_counter() - start) / len(sample) * 1000
+
+    log.close()
+    print(f"  lzma json directory: {directory_time:6.2f}s for {args.charts} charts")
+    print(f"       .ffra archive: {archive_time:6.2f}s for {args.charts} charts, random read {random_read:.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
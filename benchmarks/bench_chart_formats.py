@@ -0,0 +1,62 @@
+"""Compare file size and load time of extended charts stored as JSON, lzma JSON and the binary columnar format.
+
+Run from the repository root: `PYTHONPATH=src python benchmarks/bench_chart_formats.py`
+"""
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+from msgspec.json import decode, encode
+
+from models.api.chart_format import ChartFormat
+from models.responses.chart_response import ChartResponse
+from services.ffr_api_service import _load_chart_file, _write_chart_file
+from transformers.ffr_chart_to_extended_chart import extend_ffr_chart
+from utils.io import chart_file_extension, load_binary_chart_columns
+from utils.mock_api_server import synthetic_chart
+
+
+def _timed(fn, paths: list[Path]) -> float:
+    start = time.perf_counter()
+    for path in paths:
+        fn(path)
+    return (time.perf_counter() - start) / len(paths) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--charts", type=int, default=20)
+    parser.add_argument("--notes", type=int, default=3000)
+    args = parser.parse_args()
+
+    charts = [extend_ffr_chart(decode(encode(synthetic_chart(level_id, args.notes)), type=ChartResponse)) for level_id in range(1, args.charts + 1)]
+
+    layouts = [
+        ("json", False, ChartFormat.JSON.value),
+        ("json lzma", True, ChartFormat.JSON.value),
+        ("binary", False, ChartFormat.BINARY.value),
+        ("binary lzma", True, ChartFormat.BINARY.value),
+    ]
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        for name, compressed, chart_format in layouts:
+            paths = [Path(work_dir) / name.replace(" ", "_") / f"chart_{chart.info.id}" for chart in charts]
+            for chart, path in zip(charts, paths):
+                _write_chart_file(chart, str(path), compressed, chart_format)
+
+            files = [path.with_suffix(chart_file_extension(compressed, chart_format)) for path in paths]
+            size = sum(file.stat().st_size for file in files) / len(files) / 1024
+
+            load_ms = _timed(lambda path: _load_chart_file(str(path), compressed, True, chart_format), files)
+            line = f"{name:>12}: {size:8.1f} KiB, ExtendedChart load {load_ms:7.2f} ms"
+
+            if chart_format == ChartFormat.BINARY.value:
+                line += f", columns load {_timed(load_binary_chart_columns, files):6.2f} ms"
+
+            print(line)
+
+
+if __name__ == "__main__":
+    main()
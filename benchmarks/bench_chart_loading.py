@@ -0,0 +1,99 @@
+"""Compare the old text-mode chart load path against bytes/mmap loading with cached decoders, over a whole catalog.
+
+Uses the chart directory in `--fromdir` when given, otherwise writes a synthetic one.
+
+Run from the repository root: `PYTHONPATH=src python benchmarks/bench_chart_loading.py --fromdir data`
+"""
+
+import argparse
+import contextlib
+import io
+import itertools
+import tempfile
+import time
+from pathlib import Path
+
+from msgspec.json import decode, encode
+
+from models.charts.extended_chart import ExtendedChart
+from models.responses.chart_response import ChartResponse
+from services.ffr_api_service import _write_chart_file
+from transformers.ffr_chart_to_extended_chart import extend_ffr_chart
+from utils.io import (
+    JSON_EXT,
+    LZMA_EXT,
+    build_chart_filename,
+    chart_store_path,
+    decompress_bytes,
+    json_decoder,
+    load_compressed_json_from_file,
+    load_json_from_file,
+)
+from utils.mock_api_server import synthetic_chart
+
+
+def _load_as_text(path: Path, compressed: bool, chart_type: type):
+    # The previous path: decode the file to str, then let msgspec re-encode it
+    print(f"Loading from file: {path}")
+    if compressed:
+        with open(path, "rb") as f:
+            text = decompress_bytes(f.read()).decode("utf-8")
+    else:
+        with open(path, "r", encoding="utf-8") as f:
+            text = f.read()
+    return decode(text, type=chart_type)
+
+
+def _load_as_bytes(path: Path, compressed: bool, chart_type: type):
+    decoder = json_decoder(chart_type)
+    return decoder.decode(load_compressed_json_from_file(path)) if compressed else load_json_from_file(path, decoder.decode)
+
+
+def _write_catalog(directory: str, charts: int, notes: int):
+    for level_id in range(1, charts + 1):
+        chart = decode(encode(synthetic_chart(level_id, notes)), type=ChartResponse)
+        extended_chart = extend_ffr_chart(chart)
+
+        for extended, compressed in itertools.product((False, True), repeat=2):
+            path = build_chart_filename(directory, extended, compressed, level_id)
+            _write_chart_file(extended_chart if extended else chart, str(path), compressed)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--fromdir", type=str, default=None, help="Chart directory to load")
+    parser.add_argument("--charts", type=int, default=300, help="Synthetic charts when no directory is given")
+    parser.add_argument("--notes", type=int, default=1500, help="Notes per synthetic chart")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as work_dir, contextlib.redirect_stdout(io.StringIO()) as log:
+        directory = args.fromdir or work_dir
+        if args.fromdir is None:
+            _write_catalog(directory, args.charts, args.notes)
+
+        results = []
+        for extended, compressed in itertools.product((False, True), repeat=2):
+            chart_type = ExtendedChart if extended else ChartResponse
+            extension = LZMA_EXT if compressed else JSON_EXT
+            paths = sorted(chart_store_path(directory, extended, compressed).glob(f"chart_*{extension}"))
+            if not paths:
+                continue
+
+            timings = []
+            for load in (_load_as_text, _load_as_bytes):
+                start = time.perf_counter()
+                for _ in range(args.repeat):
+                    for path in paths:
+                        load(path, compressed, chart_type)
+                timings.append((time.perf_counter() - start) / args.repeat)
+
+            layout = f"{'extended' if extended else 'raw'} {'compressed' if compressed else 'plain'}"
+            results.append(f"{layout:>19}: {len(paths)} charts, text {timings[0]:6.3f}s, bytes {timings[1]:6.3f}s ({timings[0] / timings[1]:.2f}x)")
+
+    log.close()
+    print("\n".join(results))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""Compare `get_all_charts` against streaming `iter_all_charts`: time to the first chart and parent memory.
+
+Run from the repository root: `PYTHONPATH=src python benchmarks/bench_chart_stream.py`
+"""
+
+import argparse
+import tempfile
+import time
+import tracemalloc
+
+from models.api.api_action_args import AllChartArgs
+from services.ffr_api_service import get_all_charts, iter_all_charts
+from utils.api import FfrClient
+from utils.mock_api_server import MockApiServer
+
+
+def _consume_list(chart_args: AllChartArgs, client: FfrClient):
+    charts = get_all_charts(chart_args, client)
+    yield from (chart for chart in charts if chart is not None)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--charts", type=int, default=120)
+    parser.add_argument("--notes", type=int, default=3000)
+    parser.add_argument("--latency", type=int, default=20, help="Simulated server latency in ms")
+    parser.add_argument("--chunksize", type=int, default=4)
+    args = parser.parse_args()
+
+    level_ids = range(1, args.charts + 1)
+    for name, crawl in (("get_all_charts", _consume_list), ("iter_all_charts", iter_all_charts)):
+        with MockApiServer(level_ids=level_ids, note_count=args.notes, latency_ms=args.latency) as api, tempfile.TemporaryDirectory() as to_dir:
+            chart_args = AllChartArgs(1, args.charts + 1, compressed=False, extended=False, to_dir=to_dir, chunksize=args.chunksize)
+            tracemalloc.start()
+            start = time.perf_counter()
+            first_chart = None
+            note_count = 0
+
+            for chart in crawl(chart_args, FfrClient("bench", api.url)):
+                first_chart = first_chart or time.perf_counter() - start
+                note_count += len(chart.chart)
+
+            elapsed = time.perf_counter() - start
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+            print(f"{name:>16}: first chart {first_chart:5.2f}s, all {elapsed:5.2f}s, parent peak {peak / 2**20:7.1f} MiB, {note_count} notes")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""Compare the old chart write path (Struct -> dict -> json.dump) against direct msgspec encoding into a reused buffer.
+
+Run from the repository root: `PYTHONPATH=src python benchmarks/bench_chart_writes.py`
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import tempfile
+import time
+from pathlib import Path
+
+from msgspec.json import decode, encode
+
+from models.responses.chart_response import ChartResponse
+from transformers.ffr_chart_to_extended_chart import extend_ffr_chart
+from utils.io import compress_bytes, write_compressed_json_to_file, write_json_to_file
+from utils.mock_api_server import synthetic_chart
+
+
+def _write_via_dict(chart, path: Path, codec: str | None):
+    # The previous path: round-trip the Struct through builtins, then serialize again with the json module
+    dict_data = decode(encode(chart))
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if codec is None:
+        with open(path, "w+", encoding="utf-8") as f:
+            json.dump(dict_data, f, ensure_ascii=False)
+    else:
+        with open(path, "wb") as f:
+            f.write(compress_bytes(json.dumps(dict_data, ensure_ascii=False).encode("utf-8"), codec))
+
+
+def _write_direct(chart, path: Path, codec: str | None):
+    write_json_to_file(chart, path) if codec is None else write_compressed_json_to_file(chart, path, codec)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--charts", type=int, default=200)
+    parser.add_argument("--notes", type=int, default=1500)
+    args = parser.parse_args()
+
+    raw_charts = [decode(encode(synthetic_chart(level_id, args.notes)), type=ChartResponse) for level_id in range(1, args.charts + 1)]
+    extended_charts = [extend_ffr_chart(chart) for chart in raw_charts]
+
+    results = []
+    with tempfile.TemporaryDirectory() as work_dir, contextlib.redirect_stdout(io.StringIO()):
+        for name, charts in (("raw", raw_charts), ("extended", extended_charts)):
+            for codec in (None, "gzip:1", "lzma"):
+                timings = []
+                for write in (_write_via_dict, _write_direct):
+                    directory = Path(work_dir) / write.__name__ / name / str(codec)
+                    start = time.perf_counter()
+                    for chart in charts:
+                        write(chart, directory / f"chart_{chart.info.id}{'.json' if codec is None else '.lzma'}", codec)
+                    timings.append(time.perf_counter() - start)
+
+                layout = f"{name} {codec or 'plain'}"
+                results.append(f"{layout:>16}: dict {timings[0]:6.3f}s, direct {timings[1]:6.3f}s ({timings[0] / timings[1]:.2f}x)")
+
+    print("\n".join(results))
+
+
+if __name__ == "__main__":
+    main()
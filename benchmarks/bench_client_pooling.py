@@ -0,0 +1,47 @@
+"""Compare per-call `requests.get` against the pooled `FfrClient` on a local mock API.
+
+Run from the repository root: `PYTHONPATH=src python benchmarks/bench_client_pooling.py`
+"""
+
+import argparse
+import time
+
+import requests
+from msgspec.json import decode
+
+from models.responses.chart_response import ChartResponse
+from utils.api import FfrClient
+from utils.mock_api_server import MockApiServer
+
+
+def _crawl_per_call(url: str, level_ids: range):
+    for level_id in level_ids:
+        response = requests.get(f"{url}?key=bench&action=chart&level={level_id}")
+        decode(response.content, type=ChartResponse)
+
+
+def _crawl_pooled(url: str, level_ids: range):
+    with FfrClient("bench", url) as client:
+        for level_id in level_ids:
+            decode(client.get("chart", f"level={level_id}").content, type=ChartResponse)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--charts", type=int, default=300)
+    parser.add_argument("--notes", type=int, default=1000)
+    args = parser.parse_args()
+
+    level_ids = range(1, args.charts + 1)
+
+    for name, crawl in (("requests.get", _crawl_per_call), ("FfrClient", _crawl_pooled)):
+        with MockApiServer(level_ids=level_ids, note_count=args.notes) as api:
+            start = time.perf_counter()
+            crawl(api.url, level_ids)
+            elapsed = time.perf_counter() - start
+
+            print(f"{name:>13}: {len(level_ids) / elapsed:8.1f} charts/s, {api.connections:5d} connections")
+
+
+if __name__ == "__main__":
+    main()
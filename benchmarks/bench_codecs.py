@@ -0,0 +1,77 @@
+"""Report ratio and compress/decompress speed of every codec on a sample of charts, as JSON and as binary.
+
+Samples real extended charts from `--fromdir` (a chart directory or `.ffra` archive) when given,
+synthetic ones otherwise.
+
+Run from the repository root: `PYTHONPATH=src python benchmarks/bench_codecs.py --fromdir data`
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import random
+import time
+
+from msgspec.json import decode, encode
+
+from models.responses.chart_response import ChartResponse
+from services.chart_archive_service import _iter_stored_charts
+from transformers.ffr_chart_to_extended_chart import extend_ffr_chart
+from utils.chart_archive import ChartArchive, is_chart_archive
+from utils.io import available_codecs, compress_bytes, decompress_bytes, encode_binary_chart
+from utils.mock_api_server import synthetic_chart
+
+_LEVELS = {"lzma": (0, 1, 6, 9), "gzip": (1, 6, 9), "bz2": (1, 9), "zlib": (1, 6, 9), "zstd": (1, 3, 9, 19)}
+
+
+def _sample_charts(from_dir: str | None, count: int) -> list:
+    if from_dir is None:
+        return [extend_ffr_chart(decode(encode(synthetic_chart(level_id, 2000)), type=ChartResponse)) for level_id in range(1, count + 1)]
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        if is_chart_archive(from_dir):
+            archive = ChartArchive(from_dir)
+            charts = [archive.read(level_id, True) for level_id in archive.level_ids(True)]
+        else:
+            charts = [chart for chart in _iter_stored_charts(from_dir) if hasattr(chart, "extended_hits")]
+
+    return random.sample(charts, min(count, len(charts)))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--fromdir", type=str, default=None, help="Chart directory or .ffra archive to sample from")
+    parser.add_argument("--charts", type=int, default=30)
+    args = parser.parse_args()
+
+    charts = _sample_charts(args.fromdir, args.charts)
+    payloads = {
+        "json": [json.dumps(decode(encode(chart)), ensure_ascii=False).encode("utf-8") for chart in charts],
+        "binary": [bytes(encode_binary_chart(chart)) for chart in charts],
+    }
+
+    for payload_name, blobs in payloads.items():
+        raw_size = sum(len(blob) for blob in blobs)
+        print(f"\n{payload_name}: {len(blobs)} charts, {raw_size / 2**20:.2f} MiB raw")
+        print(f"{'codec':>10} {'ratio':>7} {'comp MB/s':>10} {'decomp MB/s':>12}")
+
+        for name in available_codecs():
+            for level in _LEVELS.get(name, (None,)):
+                spec = name if level is None else f"{name}:{level}"
+
+                start = time.perf_counter()
+                compressed = [compress_bytes(blob, spec) for blob in blobs]
+                compress_time = time.perf_counter() - start
+
+                start = time.perf_counter()
+                for blob in compressed:
+                    decompress_bytes(blob)
+                decompress_time = time.perf_counter() - start
+
+                ratio = raw_size / sum(len(blob) for blob in compressed)
+                print(f"{spec:>10} {ratio:7.2f} {raw_size / 1e6 / compress_time:10.1f} {raw_size / 1e6 / decompress_time:12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""Time building per-hand hits from notes, NumPy against the former per-note calls and pandas groupby.
+
+The pandas side is skipped when pandas is not installed. `compute_hits` is timed as a whole for reference.
+
+Run from the repository root: `PYTHONPATH=src python benchmarks/bench_compute_hits.py`
+"""
+
+import argparse
+import time
+
+import numpy as np
+from msgspec.json import decode, encode
+
+from models.responses.chart_response import ChartResponse
+from transformers.ffr_chart_to_extended_chart import compute_hits, hand_hits, note_array
+from utils.mock_api_server import synthetic_chart
+
+
+def _groupby_hand_hits(ffr_chart: ChartResponse):
+    import pandas as pd
+
+    np_notes = np.array([[note.ms, 0 if note.dir <= 1 else 1, note.dir, note.dir % 2 + 1] for note in ffr_chart.chart], dtype=np.int32)
+
+    notes_by_hand = pd.DataFrame(np_notes).groupby(1, as_index=False)
+    notes_left_hand = pd.DataFrame(np_notes[notes_by_hand.groups[0].to_numpy()])
+    notes_right_hand = pd.DataFrame(np_notes[notes_by_hand.groups[1].to_numpy()])
+
+    left_hits = notes_left_hand.groupby(0).sum().reset_index().to_numpy()[:, [0, 3]]
+    right_hits = notes_right_hand.groupby(0).sum().reset_index().to_numpy()[:, [0, 3]]
+    return left_hits, right_hits
+
+
+def _best_of(repeats: int, fn, *args) -> tuple[float, object]:
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = fn(*args)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000, 50000])
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    try:
+        import pandas  # noqa: F401
+
+        has_pandas = True
+    except ImportError:
+        has_pandas = False
+
+    for note_count in args.sizes:
+        chart = decode(encode(synthetic_chart(1, note_count)), type=ChartResponse)
+
+        numpy_time, (left, right) = _best_of(args.repeats, lambda: hand_hits(note_array(chart.chart)))
+        hits_time, _ = _best_of(args.repeats, compute_hits, chart)
+        line = f"{note_count:>6} notes: numpy {numpy_time * 1000:8.2f} ms"
+
+        if has_pandas:
+            groupby_time, (groupby_left, groupby_right) = _best_of(args.repeats, _groupby_hand_hits, chart)
+            assert np.array_equal(left, groupby_left) and np.array_equal(right, groupby_right)
+            line += f", groupby {groupby_time * 1000:8.2f} ms ({groupby_time / numpy_time:5.1f}x)"
+
+        print(f"{line}, compute_hits {hits_time * 1000:8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""Compare the `process` and `async` crawl engines of `get_all_charts` on a local mock API with simulated latency.
+
+Run from the repository root: `PYTHONPATH=src python benchmarks/bench_crawl_engines.py`
+"""
+
+import argparse
+import tempfile
+import time
+
+
+from models.api.api_action_args import AllChartArgs
+from models.api.crawl_engine import CrawlEngine
+from services.ffr_api_service import get_all_charts
+from utils.api import FfrClient
+from utils.mock_api_server import MockApiServer
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--charts", type=int, default=200)
+    parser.add_argument("--notes", type=int, default=1000)
+    parser.add_argument("--latency", type=int, default=50, help="Simulated server latency in ms")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--extended", action="store_true")
+    args = parser.parse_args()
+
+    level_ids = range(1, args.charts + 1)
+
+    for engine in CrawlEngine:
+        with MockApiServer(level_ids=level_ids, note_count=args.notes, latency_ms=args.latency) as api, tempfile.TemporaryDirectory() as to_dir:
+            chart_args = AllChartArgs(
+                1,
+                args.charts + 1,
+                compressed=False,
+                extended=args.extended,
+                to_dir=to_dir,
+                engine=engine.value,
+                concurrency=args.concurrency,
+            )
+
+            start = time.perf_counter()
+            charts = get_all_charts(chart_args, FfrClient("bench", api.url))
+            elapsed = time.perf_counter() - start
+
+            fetched = sum(chart is not None for chart in charts)
+            print(f"{engine.value:>8}: {fetched / elapsed:8.1f} charts/s ({fetched} charts in {elapsed:.2f}s)")
+
+
+if __name__ == "__main__":
+    main()
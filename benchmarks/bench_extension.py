@@ -0,0 +1,52 @@
+"""Time `extend_ffr_chart` per chart over a synthetic catalog and measure its peak allocations with tracemalloc.
+
+Run from the repository root: `PYTHONPATH=src python benchmarks/bench_extension.py`
+"""
+
+import argparse
+import statistics
+import time
+import tracemalloc
+
+from msgspec.json import decode, encode
+
+from models.responses.chart_response import ChartResponse
+from transformers.ffr_chart_to_extended_chart import extend_ffr_chart
+from utils.mock_api_server import synthetic_chart
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--charts", type=int, default=200)
+    parser.add_argument("--min-notes", type=int, default=200)
+    parser.add_argument("--max-notes", type=int, default=6000)
+    args = parser.parse_args()
+
+    # A catalog of charts spread evenly from short to long
+    step = (args.max_notes - args.min_notes) // max(1, args.charts - 1)
+    charts = [
+        decode(encode(synthetic_chart(level_id, args.min_notes + (level_id - 1) * step)), type=ChartResponse)
+        for level_id in range(1, args.charts + 1)
+    ]
+
+    times = []
+    for chart in charts:
+        start = time.perf_counter()
+        extend_ffr_chart(chart)
+        times.append(time.perf_counter() - start)
+
+    peaks = []
+    for chart in charts[:: max(1, len(charts) // 20)]:
+        tracemalloc.start()
+        extend_ffr_chart(chart)
+        peaks.append(tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+
+    note_count = sum(len(chart.chart) for chart in charts)
+    print(f"{len(charts)} charts, {note_count} notes: {sum(times):.3f}s in total")
+    print(f"per chart: mean {statistics.mean(times) * 1000:.2f} ms, median {statistics.median(times) * 1000:.2f} ms")
+    print(f"peak allocations per chart: mean {statistics.mean(peaks) / 1024:.0f} KiB, max {max(peaks) / 1024:.0f} KiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""Time extending a catalog uncached, into a cold extension cache and from a warm one.
+
+Run from the repository root: `PYTHONPATH=src python benchmarks/bench_extension_cache.py`
+"""
+
+import argparse
+import tempfile
+import time
+
+from msgspec.json import decode, encode
+
+from models.responses.chart_response import ChartResponse
+from transformers.ffr_chart_to_extended_chart import extend_ffr_chart
+from utils.extension_cache import configure_extension_cache, extend_chart
+from utils.mock_api_server import synthetic_chart
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--charts", type=int, default=100)
+    parser.add_argument("--notes", type=int, default=1500)
+    args = parser.parse_args()
+
+    charts = [decode(encode(synthetic_chart(level_id, args.notes)), type=ChartResponse) for level_id in range(1, args.charts + 1)]
+
+    start = time.perf_counter()
+    uncached = [extend_ffr_chart(chart) for chart in charts]
+    uncached_time = time.perf_counter() - start
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        configure_extension_cache(cache_dir)
+
+        start = time.perf_counter()
+        cold = [extend_chart(chart) for chart in charts]
+        cold_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        warm = [extend_chart(chart) for chart in charts]
+        warm_time = time.perf_counter() - start
+
+        configure_extension_cache("")
+
+    assert uncached == cold == warm
+    print(f"uncached: {uncached_time:6.3f}s")
+    print(f"    cold: {cold_time:6.3f}s ({cold_time / uncached_time:5.2f}x uncached)")
+    print(f"    warm: {warm_time:6.3f}s ({uncached_time / warm_time:5.1f}x faster)")
+
+
+if __name__ == "__main__":
+    main()
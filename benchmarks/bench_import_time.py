@@ -0,0 +1,103 @@
+"""Measure the startup imports of each subcommand with `python -X importtime`.
+
+Each subcommand runs in a fresh interpreter that imports `main`, parses its arguments and resolves its handler,
+without running it. `--check` fails when an API-only subcommand loads Qt, pandas or scipy, or when a subcommand
+imports for longer than `--budget` ms.
+
+Run from the repository root: `PYTHONPATH=src python benchmarks/bench_import_time.py [--check]`
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+_SRC = Path(__file__).resolve().parent.parent / "src"
+
+_HEAVY_MODULES = ("PySide6", "pyqtgraph", "PIL", "pandas", "scipy")
+
+_SUBCOMMANDS: dict[str, list[str]] = {
+    "songlist": ["songlist"],
+    "chart": ["chart", "-level", "1"],
+    "chart extended": ["chart", "-level", "1", "-extended"],
+    "all_charts": ["all_charts"],
+    "sync_charts": ["sync_charts", "-todir", "data"],
+    "pack_charts": ["pack_charts", "-fromdir", "data", "-archive", "charts.ffra"],
+    "catalog query": ["catalog", "query"],
+    "level_scores": ["level_scores_flip"],
+    "all_level_scores": ["all_level_scores"],
+    "black_box_calc": ["black_box_calc_results"],
+    "mock_server": ["mock_server"],
+    "viewer": ["viewer"],
+}
+
+# The viewer is the only subcommand allowed to load the GUI stack
+_ALLOWED_HEAVY = {"viewer": _HEAVY_MODULES}
+
+_RESOLVE_HANDLER = """
+import sys
+sys.argv = {argv!r}
+import main
+from controller import action_handler
+from utils.api import configure_client, set_api_key, set_api_url
+from utils.args_parser import parse_args
+from utils.extension_cache import configure_extension_cache
+action_handler(parse_args(set_api_key, configure_client, set_api_url, configure_extension_cache))
+"""
+
+# What a spawned crawl worker imports before its first task
+_CRAWL_WORKER = "from services.ffr_api_service import _init_crawl_worker"
+
+
+def _import_profile(code: str) -> tuple[float, set[str]] | None:
+    """Total import time in ms and the top-level packages imported, None when the imports failed."""
+    env = dict(os.environ, PYTHONPATH=str(_SRC))
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", code], env=env, capture_output=True, text=True)
+    if result.returncode != 0:
+        return None
+
+    total_us = 0
+    packages = set()
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+
+        self_us, _cumulative_us, module = line.removeprefix("import time:").split("|")
+        total_us += int(self_us)
+        packages.add(module.strip().split(".")[0])
+
+    return total_us / 1000, packages
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--check", action="store_true", help="Exit with an error on a regression")
+    parser.add_argument("--budget", type=float, default=0.0, help="Max import time of a subcommand in ms, 0 for none")
+    args = parser.parse_args()
+
+    cases = {name: _RESOLVE_HANDLER.format(argv=["main.py", "key", *argv]) for name, argv in _SUBCOMMANDS.items()}
+    cases["crawl worker"] = _CRAWL_WORKER
+
+    failures = []
+    for name, code in cases.items():
+        profile = _import_profile(code)
+        if profile is None:
+            print(f"{name:>16}: unavailable, missing dependencies")
+            continue
+
+        total_ms, packages = profile
+        heavy = sorted(set(_HEAVY_MODULES) & packages - set(_ALLOWED_HEAVY.get(name, ())))
+        print(f"{name:>16}: {total_ms:7.1f} ms" + (f", loads {', '.join(heavy)}" if heavy else ""))
+
+        if heavy:
+            failures.append(f"{name} loads {', '.join(heavy)}")
+        if args.budget and total_ms > args.budget:
+            failures.append(f"{name} imports for {total_ms:.1f} ms, over the {args.budget:.1f} ms budget")
+
+    if args.check and failures:
+        sys.exit("Import regressions:\n" + "\n".join(failures))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""Time a catalog-wide "charts with difficulty > N" scan with full decoding against lazy header-only handles.
+
+Run from the repository root: `PYTHONPATH=src python benchmarks/bench_lazy_scan.py`
+"""
+
+import argparse
+import contextlib
+import io
+import tempfile
+import time
+
+from msgspec.json import decode, encode
+
+from models.responses.chart_response import ChartResponse
+from services.ffr_api_service import _load_chart_file, _write_chart_file
+from transformers.ffr_chart_to_extended_chart import extend_ffr_chart
+from utils.chart_archive import ChartArchive, open_chart_archive
+from utils.io import build_chart_filename, chart_store_path
+from utils.lazy_chart import scan_charts
+from utils.mock_api_server import synthetic_chart
+
+_LAYOUTS = (("json", False), ("json", True), ("binary", False))
+
+
+def _full_scan(directory: str, compressed: bool, chart_format: str, min_difficulty: int) -> list[str]:
+    paths = sorted(chart_store_path(directory, True, compressed).glob("chart_*"))
+    charts = (_load_chart_file(str(path), compressed, True, chart_format) for path in paths)
+    return [chart.info.name for chart in charts if chart.info.difficulty > min_difficulty]
+
+
+def _lazy_scan(directory: str, compressed: bool, min_difficulty: int) -> list[str]:
+    return [chart.info.name for chart in scan_charts(directory, True, compressed) if chart.info.difficulty > min_difficulty]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--charts", type=int, default=300)
+    parser.add_argument("--notes", type=int, default=1500)
+    parser.add_argument("--difficulty", type=int, default=90)
+    args = parser.parse_args()
+
+    charts = [extend_ffr_chart(decode(encode(synthetic_chart(level_id, args.notes)), type=ChartResponse)) for level_id in range(1, args.charts + 1)]
+
+    with tempfile.TemporaryDirectory() as work_dir, contextlib.redirect_stdout(io.StringIO()) as log:
+        results = []
+        for chart_format, compressed in _LAYOUTS:
+            directory = f"{work_dir}/{chart_format}"
+            for chart in charts:
+                _write_chart_file(chart, str(build_chart_filename(directory, True, compressed, chart.info.id)), compressed, chart_format)
+
+            start = time.perf_counter()
+            full = _full_scan(directory, compressed, chart_format, args.difficulty)
+            full_time = time.perf_counter() - start
+
+            start = time.perf_counter()
+            lazy = _lazy_scan(directory, compressed, args.difficulty)
+            lazy_time = time.perf_counter() - start
+
+            assert sorted(full) == sorted(lazy)
+            layout = f"{chart_format} {'compressed' if compressed else 'plain'}"
+            results.append(f"{layout:>15}: full {full_time:6.3f}s, lazy {lazy_time:6.3f}s ({full_time / lazy_time:5.1f}x), {len(lazy)} charts")
+
+        archive_path = f"{work_dir}/charts.ffra"
+        with ChartArchive(archive_path) as archive:
+            archive.append(charts)
+
+        archive = open_chart_archive(archive_path)
+        start = time.perf_counter()
+        stored = (archive.read(level_id, True) for level_id in archive.level_ids(True))
+        full = [chart.info.name for chart in stored if chart.info.difficulty > args.difficulty]
+        full_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        lazy = _lazy_scan(archive_path, False, args.difficulty)
+        lazy_time = time.perf_counter() - start
+
+        assert sorted(full) == sorted(lazy)
+        results.append(f"{'archive':>15}: full {full_time:6.3f}s, lazy {lazy_time:6.3f}s ({full_time / lazy_time:5.1f}x), {len(lazy)} charts")
+
+    log.close()
+    print("\n".join(results))
+
+
+if __name__ == "__main__":
+    main()
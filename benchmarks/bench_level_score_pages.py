@@ -0,0 +1,46 @@
+"""Time crawling popular leaderboards with serial pages against concurrent page fan-out, on a local mock API.
+
+Run from the repository root: `PYTHONPATH=src python benchmarks/bench_level_score_pages.py`
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+
+from services.ffr_api_service import _get_all_level_scores_internal
+from utils.api import FfrClient
+from utils.mock_api_server import MockApiServer
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--levels", type=int, default=3)
+    parser.add_argument("--latency", type=int, default=30, help="Simulated server latency in ms")
+    parser.add_argument("--concurrency", type=int, default=8)
+    args = parser.parse_args()
+
+    # Levels 2, 5, 8... have the largest synthetic leaderboards
+    level_ids = range(2, 3 * args.levels + 2, 3)
+
+    cwd = os.getcwd()
+
+    for page_concurrency in (1, args.concurrency):
+        with MockApiServer(level_ids=level_ids, latency_ms=args.latency) as api, tempfile.TemporaryDirectory() as work_dir:
+            # The crawler writes under a relative data/ directory
+            os.chdir(work_dir)
+            client = FfrClient("bench", api.url, pool_size=page_concurrency)
+
+            start = time.perf_counter()
+            for level_id in level_ids:
+                _get_all_level_scores_internal(level_id, False, client, page_concurrency=page_concurrency)
+            elapsed = time.perf_counter() - start
+
+            os.chdir(cwd)
+
+            print(f"page concurrency {page_concurrency:2d}: {elapsed / len(level_ids):6.2f}s per level")
+
+
+if __name__ == "__main__":
+    main()
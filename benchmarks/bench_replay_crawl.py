@@ -0,0 +1,59 @@
+"""Record a chart crawl from the local mock API into a cassette, then replay it offline through both crawl engines
+with injected latency and errors, exercising the retry logic.
+
+Run from the repository root: `PYTHONPATH=src python benchmarks/bench_replay_crawl.py`
+"""
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+from models.api.api_action_args import AllChartArgs
+from models.api.crawl_engine import CrawlEngine
+from services.ffr_api_service import get_all_charts
+from utils.api import FfrClient
+from utils.mock_api_server import MockApiServer
+from utils.transport import TransportMode, TransportOptions
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--charts", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=50.0, help="Injected replay latency in ms")
+    parser.add_argument("--errors", type=float, default=0.1, help="Share of replayed requests failing with a 503")
+    parser.add_argument("--concurrency", type=int, default=32)
+    args = parser.parse_args()
+
+    level_ids = range(1, args.charts + 1)
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        cassette_dir = str(Path(work_dir) / "cassette")
+        chart_args = AllChartArgs(1, args.charts + 1, compressed=False, extended=False, to_dir=str(Path(work_dir) / "charts"))
+
+        with MockApiServer(level_ids=level_ids) as api:
+            recording = TransportOptions(mode=TransportMode.RECORD.value, cassette_dir=cassette_dir)
+            get_all_charts(chart_args, FfrClient("bench", api.url, options=recording))
+
+        replay = TransportOptions(
+            mode=TransportMode.REPLAY.value,
+            cassette_dir=cassette_dir,
+            replay_latency_ms=args.latency,
+            replay_error_rate=args.errors,
+            backoff_base=0.05,
+        )
+
+        for engine in CrawlEngine:
+            chart_args.engine = engine.value
+            chart_args.concurrency = args.concurrency
+
+            start = time.perf_counter()
+            charts = get_all_charts(chart_args, FfrClient("bench", "http://offline.invalid/api.php", options=replay))
+            elapsed = time.perf_counter() - start
+
+            fetched = sum(chart is not None for chart in charts)
+            print(f"{engine.value:>8}: {fetched / elapsed:8.1f} charts/s ({fetched}/{len(level_ids)} charts in {elapsed:.2f}s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""Compare inline writes against the write-behind queue for compressed chart and level score crawls on a local mock API.
+
+Run from the repository root: `PYTHONPATH=src python benchmarks/bench_write_behind.py`
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import tempfile
+import time
+
+from models.api.api_action_args import AllChartArgs
+from services.ffr_api_service import _get_all_level_scores_internal, get_all_charts
+from utils.api import FfrClient
+from utils.mock_api_server import MockApiServer
+from utils.write_behind import install_write_behind, uninstall_write_behind
+
+
+def _crawl_charts(args, write_queue: int) -> float:
+    level_ids = range(1, args.charts + 1)
+
+    with MockApiServer(level_ids=level_ids, note_count=args.notes, latency_ms=args.latency) as api, tempfile.TemporaryDirectory() as to_dir:
+        chart_args = AllChartArgs(
+            1,
+            args.charts + 1,
+            compressed=True,
+            extended=args.extended,
+            to_dir=to_dir,
+            codec=args.codec,
+            write_queue=write_queue,
+        )
+
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            charts = get_all_charts(chart_args, FfrClient("bench", api.url))
+        elapsed = time.perf_counter() - start
+
+        written = sum(1 for _, _, files in os.walk(to_dir) for name in files if name.startswith("chart_"))
+        assert written == sum(chart is not None for chart in charts)
+        return elapsed
+
+
+def _crawl_scores(args, write_queue: int) -> float:
+    # Levels 2, 5, 8... have the largest synthetic leaderboards
+    level_ids = range(2, 3 * args.levels + 2, 3)
+    cwd = os.getcwd()
+
+    with MockApiServer(level_ids=level_ids, latency_ms=args.latency) as api, tempfile.TemporaryDirectory() as work_dir:
+        # The crawler writes under a relative data/ directory
+        os.chdir(work_dir)
+        client = FfrClient("bench", api.url)
+        install_write_behind(write_queue)
+
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            for level_id in level_ids:
+                _get_all_level_scores_internal(level_id, True, client, page_concurrency=1, codec=args.codec)
+            uninstall_write_behind()
+        elapsed = time.perf_counter() - start
+
+        os.chdir(cwd)
+        return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--charts", type=int, default=300)
+    parser.add_argument("--notes", type=int, default=3000)
+    parser.add_argument("--levels", type=int, default=3)
+    parser.add_argument("--latency", type=int, default=20, help="Simulated server latency in ms")
+    parser.add_argument("--codec", type=str, default="lzma")
+    parser.add_argument("--extended", action="store_true")
+    args = parser.parse_args()
+
+    for name, crawl in (("all_charts", _crawl_charts), ("level scores", _crawl_scores)):
+        inline = crawl(args, 0)
+        behind = crawl(args, 32)
+        print(f"{name:>12}: inline {inline:6.2f}s, write-behind {behind:6.2f}s ({inline / behind:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
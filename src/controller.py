@@ -1,41 +1,96 @@
+from typing import Callable
+
 from models.api.api_action_args import (
     AllChartArgs,
     AllLevelScoresArgs,
     BlackBoxCalcArgs,
+    CatalogQueryArgs,
+    CatalogUpdateArgs,
     ChartArgs,
+    ExtendChartsArgs,
     LevelScoresArgs,
+    MockServerArgs,
+    PackChartsArgs,
     SongListArgs,
+    SyncChartsArgs,
     ViewerArgs,
 )
-from services.blackbox_calc_api_service import get_complete_ffr_estimates
-from services.ffr_api_service import (
-    get_all_charts,
-    get_all_level_scores,
-    get_chart,
-    get_level_scores,
-    get_song_list,
-)
-from visualization.viewer import run_viewer
 
 
-def run(args):
+def action_handler(args) -> Callable | None:
+    """The function running an action, importing only what that action depends on.
+
+    The viewer pulls in Qt, PIL and pyqtgraph, which API-only actions never need.
+    """
     if isinstance(args, ViewerArgs):
-        return run_viewer(args)
+        from visualization.viewer import run_viewer
+
+        return run_viewer
 
     if isinstance(args, SongListArgs):
-        return get_song_list(args)
+        from services.ffr_api_service import get_song_list
+
+        return get_song_list
 
     if isinstance(args, ChartArgs):
-        return get_chart(args)
+        from services.ffr_api_service import get_chart
+
+        return get_chart
 
     if isinstance(args, AllChartArgs):
-        return get_all_charts(args)
+        from services.ffr_api_service import get_all_charts
+
+        return get_all_charts
+
+    if isinstance(args, SyncChartsArgs):
+        from services.chart_sync_service import sync_charts
+
+        return sync_charts
+
+    if isinstance(args, PackChartsArgs):
+        from services.chart_archive_service import pack_charts
+
+        return pack_charts
+
+    if isinstance(args, ExtendChartsArgs):
+        from services.chart_extension_service import extend_stored_charts
+
+        return extend_stored_charts
+
+    if isinstance(args, CatalogUpdateArgs):
+        from services.chart_catalog_service import update_chart_catalog
+
+        return update_chart_catalog
+
+    if isinstance(args, CatalogQueryArgs):
+        from services.chart_catalog_service import query_chart_catalog
+
+        return query_chart_catalog
 
     if isinstance(args, LevelScoresArgs):
-        return get_level_scores(args)
+        from services.ffr_api_service import get_level_scores
+
+        return get_level_scores
 
     if isinstance(args, AllLevelScoresArgs):
-        return get_all_level_scores(args)
+        from services.ffr_api_service import get_all_level_scores
+
+        return get_all_level_scores
 
     if isinstance(args, BlackBoxCalcArgs):
-        return get_complete_ffr_estimates(args)
+        from services.blackbox_calc_api_service import get_complete_ffr_estimates
+
+        return get_complete_ffr_estimates
+
+    if isinstance(args, MockServerArgs):
+        from utils.mock_api_server import run_mock_server
+
+        return run_mock_server
+
+    return None
+
+
+def run(args):
+    handler = action_handler(args)
+    if handler is not None:
+        return handler(args)
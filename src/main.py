@@ -1,12 +1,13 @@
 import multiprocessing as mp
 
 from controller import run
-from utils.api import set_api_key
+from utils.api import configure_client, set_api_key, set_api_url
 from utils.args_parser import parse_args
+from utils.extension_cache import configure_extension_cache
 
 
 def main():
-    args = parse_args(set_api_key)
+    args = parse_args(set_api_key, configure_client, set_api_url, configure_extension_cache)
     _result = run(args)
     _a = 1
 
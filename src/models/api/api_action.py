@@ -4,6 +4,10 @@ from enum import Enum
 class ApiAction(Enum):
     CHART = "chart"
     ALL_CHARTS = "all_charts"
+    SYNC_CHARTS = "sync_charts"
+    PACK_CHARTS = "pack_charts"
+    EXTEND_CHARTS = "extend_charts"
+    CATALOG = "catalog"
     CREDITS = "credits"
     LEVEL_RANKS = "ranks"
     SONG_LIST = "songlist"
@@ -13,3 +17,4 @@ class ApiAction(Enum):
     ALL_LEVEL_SCORES = "all_level_scores"
     BLACK_BOX_CALC_RESULTS = "black_box_calc_results"
     VIEWER = "viewer"
+    MOCK_SERVER = "mock_server"
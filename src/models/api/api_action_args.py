@@ -17,6 +17,8 @@ class ChartArgs(Struct):
     from_dir: str = ""
     from_file: str = ""
     download_if_not_found: bool = False
+    format: str = "json"
+    codec: str = "lzma"
 
 
 class AllChartArgs(Struct):
@@ -28,6 +30,56 @@ class AllChartArgs(Struct):
     from_dir: str = ""
     from_file: str = ""
     download_if_not_found: bool = True
+    format: str = "json"
+    codec: str = "lzma"
+    engine: str = "process"
+    concurrency: int = 32
+    resume: bool = False
+    chunksize: int = 4
+    write_queue: int = 32
+    extend_batch_notes: int = 1_000_000
+
+
+class SyncChartsArgs(Struct):
+    to_dir: str
+    compressed: bool
+    extended: bool
+    format: str = "json"
+    codec: str = "lzma"
+    engine: str = "process"
+    concurrency: int = 32
+    write_queue: int = 32
+
+
+class PackChartsArgs(Struct):
+    from_dir: str
+    archive: str
+    compressed: bool = False
+    codec: str = "lzma"
+
+
+class ExtendChartsArgs(Struct):
+    from_dir: str
+    to_dir: str = ""
+    compressed: bool = False
+    format: str = "json"
+    codec: str = "lzma"
+    batch_notes: int = 1_000_000
+
+
+class CatalogUpdateArgs(Struct):
+    from_dir: str = "data"
+    catalog: str = ""
+    song_list: bool = True
+
+
+class CatalogQueryArgs(Struct):
+    from_dir: str = "data"
+    catalog: str = ""
+    where: list[str] = []
+    sort: str = "id"
+    descending: bool = False
+    limit: int = 0
 
 
 class LevelScoresArgs(Struct):
@@ -41,6 +93,12 @@ class AllLevelScoresArgs(Struct):
     start_id: int
     end_id: int
     compressed: bool
+    codec: str = "lzma"
+    engine: str = "process"
+    concurrency: int = 32
+    resume: bool = False
+    page_concurrency: int = 8
+    write_queue: int = 32
 
 
 class LevelRanksArgs(Struct):
@@ -49,4 +107,15 @@ class LevelRanksArgs(Struct):
 
 
 class BlackBoxCalcArgs(Struct):
-    pass
+    data_dir: str = "data"
+    compressed: bool = True
+    workers: int = 8
+    estimator_url: str = ""
+    min_difficulty: int = 0
+
+
+class MockServerArgs(Struct):
+    port: int = 8000
+    cassette_dir: str = ""
+    latency_ms: float = 0.0
+    error_rate: float = 0.0
@@ -0,0 +1,6 @@
+from enum import Enum
+
+
+class CatalogCommand(Enum):
+    UPDATE = "update"
+    QUERY = "query"
@@ -0,0 +1,6 @@
+from enum import Enum
+
+
+class ChartFormat(Enum):
+    JSON = "json"
+    BINARY = "binary"
@@ -0,0 +1,6 @@
+from enum import Enum
+
+
+class CrawlEngine(Enum):
+    PROCESS = "process"
+    ASYNC = "async"
@@ -0,0 +1,38 @@
+from msgspec import Struct
+
+CATALOG_FORMAT_VERSION = 2
+
+
+class ChartStats(Struct):
+    duration_ms: int
+    nps: float
+    peak_nps: int  # Most notes in any one-second window.
+    # Only known from extended charts
+    manip_share: float | None = None  # Share of hits likely to be manipped as a jump with the next one.
+    trill: int | None = None
+    jack: int | None = None
+    jump_to_single: int | None = None
+    single_to_jump: int | None = None
+    jumpstream: int | None = None
+
+
+class CatalogEntry(Struct):
+    id: int
+    name: str
+    author: str = ""
+    stepauthor: str = ""
+    genre: int = 0
+    difficulty: int = 0
+    length: str = ""
+    note_count: int = 0
+    timestamp: int = 0
+    swf_version: int = 0
+    source: str = ""  # Stored chart the stats were computed from, empty if the level is not stored.
+    signature: tuple[int, int] = (0, 0)  # `(mtime_ns, size)` of a chart file, `(offset, length)` of an archive record.
+    version: int = 0  # `ExtendedChart.version` of the source, 0 for a plain chart.
+    stats: ChartStats | None = None
+
+
+class ChartCatalog(Struct):
+    format_version: int = CATALOG_FORMAT_VERSION
+    entries: dict[int, CatalogEntry] = {}
@@ -0,0 +1,10 @@
+from msgspec import Struct
+
+
+class SyncedChart(Struct, array_like=True):
+    timestamp: int  # `SongInfo.timestamp` of the chart when it was last downloaded.
+    swf_version: int
+
+
+class ChartSyncManifest(Struct):
+    charts: dict[int, SyncedChart] = {}
@@ -0,0 +1,16 @@
+from msgspec import Struct
+
+
+class ExtensionParams(Struct, frozen=True):
+    """Tunables of `extend_ffr_chart`. Extended charts computed with other values are cached separately."""
+
+    manip_threshold_ms: int = 100  # Widest gap between alternating hits that can be manipped as a jump.
+    logistic_midpoint: float = 55.0  # Gap in ms at which a pair is as likely to be manipped as not.
+    logistic_steepness: float = 0.1
+    triplet_window_ms: int = 150  # Gaps up to this are checked for surrounding alternation.
+    jump_manip_score: int = 50  # Hits scoring above this are merged with the next one into a jump.
+    smoothing_window: int = 50  # ms each hit may move when spreading the chart out.
+    smoothing_iterations: int = 10
+
+
+DEFAULT_EXTENSION_PARAMS = ExtensionParams()
@@ -0,0 +1,34 @@
+import numpy as np
+from msgspec import Struct
+from numpy.typing import NDArray
+
+
+class HitTable(Struct):
+    """Hits as one array per field, the form chart extension stages hand to each other.
+
+    Columns a stage does not produce stay None. `rows` turns the table into `ChartHit`,
+    `ManipCorrectedHit` or `ManipCorrectedHitWithTransition` Structs once the hits leave the transformer.
+    `chart` is the index of each hit's chart when a table holds a batch of charts, None for a single one.
+    """
+
+    hand: NDArray[np.int8]
+    finger: NDArray[np.int8]
+    ms: NDArray[np.int32]
+    gap: NDArray[np.int32]
+    manip: NDArray[np.int8] | None = None
+    spread_ms: NDArray[np.int32] | None = None
+    precision: NDArray[np.int32] | None = None
+    transition: NDArray[np.int8] | None = None
+    chart: NDArray[np.int32] | None = None
+
+    def __len__(self) -> int:
+        return len(self.ms)
+
+    def rows(self, row_type: type) -> list:
+        columns = [getattr(self, field).tolist() for field in row_type.__struct_fields__]
+        return [row_type(*row) for row in zip(*columns)]
+
+    def view(self, start: int, stop: int) -> "HitTable":
+        """The hits from `start` to `stop`, sharing this table's arrays."""
+        columns = {field: getattr(self, field) for field in self.__struct_fields__}
+        return HitTable(**{field: None if column is None else column[start:stop] for field, column in columns.items()})
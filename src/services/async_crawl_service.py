@@ -0,0 +1,217 @@
+import asyncio
+import functools
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable, Iterable
+
+from models.api.api_action import ApiAction
+from models.api.api_action_args import AllChartArgs, AllLevelScoresArgs, ChartArgs
+from models.charts.extended_chart import ExtendedChart
+from models.responses.chart_response import ChartResponse
+from services.ffr_api_service import (
+    _chart_path,
+    _charts_journal_path,
+    _get_all_level_scores_internal,
+    _get_data,
+    _load_stored_chart,
+    _write_chart_file,
+)
+from utils.api import FfrClient
+from utils.extension_cache import configure_extension_cache, extend_charts, extension_cache_args
+from utils.io import json_decoder
+from utils.journal import CrawlJournal, close_journal, open_journal
+
+_EXTENSION_BATCH_DELAY_S = 0.05
+
+
+class AsyncFfrClient:
+    """Awaitable front for a pooled `FfrClient`.
+
+    Blocking calls run on a thread pool as wide as the crawl, with a connection pool of the same size,
+    so socket waits never stall the event loop.
+    """
+
+    def __init__(self, client: FfrClient, concurrency: int, connections: int = 0):
+        key, base_url, pool_size, options, rate_limiter = client.init_args()
+        self._client = FfrClient(key, base_url, max(pool_size, concurrency, connections), options, rate_limiter)
+        self._executor = ThreadPoolExecutor(max_workers=concurrency)
+
+    @property
+    def client(self) -> FfrClient:
+        return self._client
+
+    async def get_data(self, action: str, query_params: str | None = None) -> bytes:
+        return await self.run(_get_data, action, query_params, self._client)
+
+    async def run(self, fn: Callable, *args):
+        """Run a blocking call on the client's I/O threads."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, fn, *args)
+
+    def close(self):
+        self._executor.shutdown()
+        self._client.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *_exc):
+        self.close()
+
+
+class ExtensionBatcher:
+    """Extends the charts a crawl downloads on a process pool, in batches of at most `max_notes` notes.
+
+    A batch leaves once it is full, or `_EXTENSION_BATCH_DELAY_S` after its first chart came in.
+    """
+
+    def __init__(self, cpu_pool: Executor, max_notes: int):
+        self._cpu_pool = cpu_pool
+        self._max_notes = max_notes
+        self._batch: list[tuple[ChartResponse, asyncio.Future]] = []
+        self._batch_notes = 0
+        self._timer: asyncio.TimerHandle | None = None
+
+    async def extend(self, chart: ChartResponse) -> ExtendedChart:
+        loop = asyncio.get_running_loop()
+        if self._batch and self._batch_notes + len(chart.chart) > self._max_notes:
+            self._flush()
+
+        extended = loop.create_future()
+        self._batch.append((chart, extended))
+        self._batch_notes += len(chart.chart)
+
+        if self._batch_notes >= self._max_notes:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(_EXTENSION_BATCH_DELAY_S, self._flush)
+
+        return await extended
+
+    def _flush(self):
+        if self._timer:
+            self._timer.cancel()
+            self._timer = None
+
+        batch, self._batch, self._batch_notes = self._batch, [], 0
+        if batch:
+            charts, futures = zip(*batch)
+            done = asyncio.get_running_loop().run_in_executor(self._cpu_pool, extend_charts, list(charts))
+            done.add_done_callback(functools.partial(_settle, futures))
+
+
+def _settle(futures: Iterable[asyncio.Future], done: asyncio.Future):
+    # Awaiting crawls may have been cancelled in the meantime
+    for index, future in enumerate(futures):
+        if future.done():
+            continue
+        if done.cancelled():
+            future.cancel()
+        elif done.exception():
+            future.set_exception(done.exception())
+        else:
+            future.set_result(done.result()[index])
+
+
+def crawl_all_charts(level_ids: Iterable[int], args: AllChartArgs, client: FfrClient):
+    return asyncio.run(_crawl_all_charts(level_ids, args, client))
+
+
+def crawl_all_level_scores(level_ids: set[int], args: AllLevelScoresArgs, client: FfrClient, journal_path: str | None = None):
+    asyncio.run(_crawl_all_level_scores(level_ids, args, client, journal_path))
+
+
+async def _crawl_all_charts(level_ids: Iterable[int], args: AllChartArgs, client: FfrClient):
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    # Processes are only needed for the CPU-bound chart extension
+    cpu_pool = ProcessPoolExecutor(initializer=configure_extension_cache, initargs=extension_cache_args()) if args.extended else None
+    extender = ExtensionBatcher(cpu_pool, args.extend_batch_notes) if cpu_pool else None
+
+    journal_path = _charts_journal_path(args)
+    journal = open_journal(journal_path) if journal_path else None
+
+    try:
+        async with AsyncFfrClient(client, args.concurrency) as async_client:
+            return await asyncio.gather(*(_crawl_chart(level_id, args, async_client, extender, semaphore, journal) for level_id in level_ids))
+    finally:
+        if cpu_pool:
+            cpu_pool.shutdown()
+        if journal_path:
+            close_journal(journal_path)
+
+
+async def _crawl_chart(
+    level_id: int,
+    args: AllChartArgs,
+    client: AsyncFfrClient,
+    extender: ExtensionBatcher | None,
+    semaphore: asyncio.Semaphore,
+    journal: CrawlJournal | None = None,
+):
+    chart_args = ChartArgs(
+        level=level_id,
+        compressed=args.compressed,
+        extended=args.extended,
+        to_dir=args.to_dir,
+        from_dir=args.from_dir,
+        format=args.format,
+        codec=args.codec,
+    )
+    chart: ChartResponse | ExtendedChart | None = None
+
+    async with semaphore:
+        try:
+            print(f"Getting level {level_id}")
+            path = _chart_path(chart_args)
+
+            if journal:
+                journal.started(level_id)
+
+            if chart_args.from_dir:
+                chart = await client.run(_load_stored_chart, chart_args, path, False)
+
+            if chart is None:
+                response = await client.get_data(ApiAction.CHART.value, f"level={level_id}")
+                chart = json_decoder(ChartResponse).decode(response)
+
+            if extender and isinstance(chart, ChartResponse):
+                chart = await extender.extend(chart)
+
+            if chart_args.to_dir:
+                await client.run(_write_chart_file, chart, path, args.compressed, args.format, args.codec)
+
+            if journal:
+                journal.finished(level_id)
+
+            return chart
+
+        except Exception as e:
+            print(f"Error on song {level_id}: {e}")
+
+            if journal:
+                journal.failed_on(level_id)
+
+
+async def _crawl_all_level_scores(level_ids: set[int], args: AllLevelScoresArgs, client: FfrClient, journal_path: str | None):
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def crawl_level(level_id: int):
+        async with semaphore:
+            # Each level is pure network and disk work, so it runs whole on an I/O thread
+            await async_client.run(
+                _get_all_level_scores_internal,
+                level_id,
+                args.compressed,
+                async_client.client,
+                journal_path,
+                args.page_concurrency,
+                args.codec,
+            )
+
+    # Every level fans its pages out on top of the crawl width
+    try:
+        async with AsyncFfrClient(client, args.concurrency, args.concurrency * args.page_concurrency) as async_client:
+            await asyncio.gather(*(crawl_level(level_id) for level_id in level_ids))
+    finally:
+        if journal_path:
+            close_journal(journal_path)
@@ -1,19 +1,43 @@
-import json
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, as_completed, wait
+from pathlib import Path
+from typing import Iterable
 
 import msgspec
-import requests
+from requests.adapters import HTTPAdapter
 
 from models.api.api_action_args import AllChartArgs, BlackBoxCalcArgs
-from services.ffr_api_service import get_all_charts
+from models.responses.chart_response import ChartInfo, ChartResponse
+from services.ffr_api_service import _all_chart_ids, iter_charts
+from utils.api import default_client, transport_options
+from utils.estimate_cache import EstimateCache
+from utils.hashing import notes_hash
 from utils.io import write_json_to_file
+from utils.lazy_chart import scan_charts
+from utils.transport import HttpTransport, build_session
 
 _API_URL = "https://uxswva20wb.execute-api.us-east-1.amazonaws.com/prod/autodifficulty"
 
+_ESTIMATES_FILE_NAME = "ffr_estimates.json"
+_ESTIMATE_CACHE_NAME = "ffr_estimates_cache"
 
-def _get_data(body: dict):
-    response = requests.post(
-        url=_API_URL,
-        json=body,
+_PREDICT_BODY_PREFIX = b'{"operation":"predict_difficulty","payload":'
+
+
+def _transport(pool_size: int) -> HttpTransport:
+    options = transport_options()
+    session = build_session(options)
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return HttpTransport(session, options)
+
+
+def _get_data(transport: HttpTransport, body: bytes, url: str = _API_URL):
+    response = transport.request(
+        "POST",
+        url=url,
+        data=body,
+        headers={"Content-Type": "application/json"},
     )
     response.raise_for_status()
 
@@ -39,39 +63,84 @@ def get_complete_ffr_estimates(args: BlackBoxCalcArgs):
     charts_args = AllChartArgs(
         1,
         10000,
-        True,
+        args.compressed,
         False,
-        r"C:\GitHub\FFR_API\data",
-        r"C:\GitHub\FFR_API\data",
+        args.data_dir,
+        args.data_dir,
     )
 
-    ffr_charts = get_all_charts(charts_args)
-
-    results = []
-    for ffr_chart in ffr_charts:
-        if ffr_chart is None:
-            continue
-
-        response = _get_data(
-            body={
-                "operation": "predict_difficulty",
-                "payload": json.loads(msgspec.json.encode(ffr_chart.chart).decode("utf-8")),
-            }
-        )
-
-        try:
-            estimated_diff = float(response.decode())
-        except Exception as e:
-            print(e)
-            pass
-
-        results.append(
-            (
-                ffr_chart.info.id,
-                ffr_chart.info.name,
-                ffr_chart.info.difficulty,
-                estimated_diff,
-            )
-        )
-
-    write_json_to_file(results, r"C:\GitHub\FFR_API\data\ffr_estimates.json")
+    client = default_client()
+    level_ids = _all_chart_ids(charts_args, client)
+
+    if args.min_difficulty > 0:
+        # Stored charts are filtered on their info alone, without decoding their notes
+        level_ids -= {chart.info.id for chart in scan_charts(args.data_dir, False, args.compressed) if chart.info.difficulty < args.min_difficulty}
+
+    # Charts downloaded during the crawl are only known once fetched
+    charts = (chart for chart in iter_charts(level_ids, charts_args, client) if chart.info.difficulty >= args.min_difficulty)
+
+    with EstimateCache(Path(args.data_dir) / _ESTIMATE_CACHE_NAME) as cache:
+        results = _estimate_charts(charts, cache, args.workers, args.estimator_url or _API_URL)
+
+    write_json_to_file(results, Path(args.data_dir) / _ESTIMATES_FILE_NAME)
+
+
+def _estimate_charts(
+    ffr_charts: Iterable[ChartResponse], cache: EstimateCache, workers: int, url: str = _API_URL
+) -> list[tuple[int, str, int, float]]:
+    """Estimate charts as they stream in, sending only the ones whose notes are not cached yet.
+
+    Returns `(id, name, difficulty, estimate)` rows sorted by level id.
+    """
+    encoder = msgspec.json.Encoder()
+    transport = _transport(workers)
+    results: list[tuple[int, str, int, float]] = []
+    waiting: dict[str, list[ChartInfo]] = {}
+    in_flight: dict[Future, str] = {}
+    cached_count = 0
+
+    def collect(futures: Iterable[Future]):
+        for future in futures:
+            key = in_flight.pop(future)
+            infos = waiting.pop(key)
+            try:
+                estimate = future.result()
+            except Exception as e:
+                print(e)
+                continue
+
+            # Persisted right away so an interrupted run never pays for the same chart twice
+            cache.put(key, estimate)
+            results.extend((info.id, info.name, info.difficulty, estimate) for info in infos)
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for ffr_chart in ffr_charts:
+            info = ffr_chart.info
+            encoded_notes = encoder.encode(ffr_chart.chart)
+            key = notes_hash(encoded_notes)
+            cached = cache.get(key)
+
+            if cached is not None:
+                cached_count += 1
+                results.append((info.id, info.name, info.difficulty, cached))
+            elif key in waiting:
+                waiting[key].append(info)
+            else:
+                waiting[key] = [info]
+                in_flight[executor.submit(_estimate, transport, encoded_notes, url)] = key
+
+                # Hold only a few requests' worth of notes while the estimates come back
+                if len(in_flight) >= 2 * workers:
+                    done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                    collect(done)
+
+        collect(as_completed(list(in_flight)))
+
+    print(f"Estimated {len(results)} charts, {cached_count} from cache")
+    return sorted(results)
+
+
+def _estimate(transport: HttpTransport, encoded_notes: bytes, url: str) -> float:
+    # The notes are spliced in already encoded rather than decoded back into a dict for `json=`
+    body = _PREDICT_BODY_PREFIX + encoded_notes + b"}"
+    return float(_get_data(transport, body, url).decode())
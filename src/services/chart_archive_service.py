@@ -0,0 +1,29 @@
+import itertools
+from typing import Iterable, Iterator
+
+from models.api.api_action_args import PackChartsArgs
+from models.api.chart_format import ChartFormat
+from models.charts.extended_chart import ExtendedChart
+from models.responses.chart_response import ChartResponse
+from services.ffr_api_service import _load_chart_file
+from utils.chart_archive import ChartArchive
+from utils.io import BINARY_CHART_EXT, JSON_EXT, LZMA_EXT, chart_store_path
+
+
+def pack_charts(args: PackChartsArgs):
+    """Pack every chart of a directory store, raw and extended in any format, into a single archive."""
+    with ChartArchive(args.archive) as archive:
+        count = archive.append(_iter_stored_charts(args.from_dir), args.compressed, args.codec)
+        print(f"Packed {count} charts into {archive.path}, {len(archive.index)} in total")
+
+
+def _iter_stored_charts(directory: str, extended_stores: Iterable[bool] = (False, True)) -> Iterator[ChartResponse | ExtendedChart]:
+    for extended, compressed in itertools.product(extended_stores, (False, True)):
+        for path in sorted(chart_store_path(directory, extended, compressed).glob("chart_*")):
+            if path.suffix not in (JSON_EXT, LZMA_EXT, BINARY_CHART_EXT):
+                continue
+
+            chart_format = ChartFormat.BINARY.value if path.suffix == BINARY_CHART_EXT else ChartFormat.JSON.value
+            chart = _load_chart_file(str(path), compressed, extended, chart_format)
+            if chart is not None:
+                yield chart
@@ -0,0 +1,257 @@
+import itertools
+import operator
+import re
+from functools import partial
+from pathlib import Path
+from typing import Any, Callable, Iterator
+
+from msgspec import Struct, structs
+
+from models.api.api_action_args import CatalogQueryArgs, CatalogUpdateArgs, SongListArgs
+from models.charts.chart_catalog import CATALOG_FORMAT_VERSION, CatalogEntry, ChartCatalog, ChartStats
+from models.responses.song_list_response import SongInfo
+from services.ffr_api_service import get_song_list
+from utils.chart_archive import is_chart_archive, open_chart_archive
+from utils.chart_stats import compute_chart_stats
+from utils.io import BINARY_CHART_EXT, JSON_EXT, LZMA_EXT, chart_store_path, json_decoder, load_json_from_file, write_json_to_file
+from utils.lazy_chart import LazyChart, load_lazy_chart, read_lazy_archived_chart
+
+_CATALOG_FILE_NAME = "catalog.json"
+_CATALOG_EXT = ".catalog.json"
+_LEVEL_FILE = re.compile(r"chart_(\d+)$")
+
+_OPERATORS: dict[str, Callable[[Any, Any], bool]] = {
+    ">=": operator.ge,
+    "<=": operator.le,
+    "!=": operator.ne,
+    "=": operator.eq,
+    ">": operator.gt,
+    "<": operator.lt,
+    "~": lambda value, text: text.lower() in str(value).lower(),
+}
+_FILTER = re.compile(r"^\s*(\w+)\s*(" + "|".join(map(re.escape, _OPERATORS)) + r")\s*(.+?)\s*$")
+
+_QUERY_COLUMNS = ("id", "name", "difficulty", "note_count", "nps", "peak_nps", "manip_share")
+
+
+class CatalogFilter(Struct):
+    field: str
+    op: str
+    value: Any
+    upper: Any = None  # Inclusive upper bound of an `a..b` range, whose lower bound is `value`.
+
+
+class _StoredChart(Struct):
+    source: str
+    signature: tuple[int, int]
+    load: Callable[[], LazyChart | None]
+
+
+def catalog_path(from_dir: str, catalog: str = "") -> Path:
+    """The catalog given, or the default one next to the chart store or archive it indexes."""
+    if catalog:
+        return Path(catalog)
+    if is_chart_archive(from_dir):
+        return Path(from_dir).with_suffix(_CATALOG_EXT)
+    return Path(from_dir) / _CATALOG_FILE_NAME
+
+
+def load_catalog(path: str | Path) -> ChartCatalog:
+    try:
+        catalog = load_json_from_file(path, json_decoder(ChartCatalog).decode)
+    except FileNotFoundError:
+        return ChartCatalog()
+
+    # Rebuilt from scratch when the index layout changed
+    return catalog if catalog.format_version == CATALOG_FORMAT_VERSION else ChartCatalog()
+
+
+def update_catalog(catalog: ChartCatalog, from_dir: str, songs: list[SongInfo] | None = None) -> int:
+    """Bring the catalog up to date with the song list, when given, and the charts stored in `from_dir`.
+
+    Only charts added, rewritten or re-extended since the last update are read. Returns how many entries changed.
+    """
+    changed = 0
+
+    for song in songs or []:
+        entry = catalog.entries.get(song.id) or CatalogEntry(song.id, song.name)
+        metadata = {field: getattr(song, field) for field in CatalogEntry.__struct_fields__ if hasattr(song, field)}
+        updated = structs.replace(entry, **metadata)
+        if updated != entry:
+            catalog.entries[song.id] = updated
+            changed += 1
+
+    stored = _stored_charts(from_dir)
+    for level_id, stored_chart in stored.items():
+        entry = catalog.entries.get(level_id)
+        if entry and entry.source == stored_chart.source and entry.signature == stored_chart.signature:
+            continue
+
+        lazy_chart = stored_chart.load()
+        if lazy_chart is None:
+            continue
+
+        chart = lazy_chart.materialize()
+        if entry is None:
+            # The song list has the final say on metadata, the chart only fills it in until then
+            info = chart.info
+            entry = CatalogEntry(level_id, info.name, genre=info.genre, difficulty=info.difficulty, length=info.length)
+            entry.note_count, entry.timestamp = info.note_count, info.timestamp
+
+        catalog.entries[level_id] = structs.replace(
+            entry,
+            source=stored_chart.source,
+            signature=stored_chart.signature,
+            version=lazy_chart.version,
+            stats=compute_chart_stats(chart),
+        )
+        changed += 1
+
+    # Charts deleted from the store keep their song list metadata but lose their stats
+    for entry in list(catalog.entries.values()):
+        if entry.source and entry.id not in stored:
+            catalog.entries[entry.id] = structs.replace(entry, source="", signature=(0, 0), version=0, stats=None)
+            changed += 1
+
+    return changed
+
+
+def _stored_charts(from_dir: str) -> dict[int, _StoredChart]:
+    """The chart each stored level is indexed from, preferring extended charts over plain ones."""
+    stored: dict[int, _StoredChart] = {}
+
+    if is_chart_archive(from_dir):
+        if not Path(from_dir).exists():
+            return stored
+
+        archive = open_chart_archive(from_dir)
+        for extended in (True, False):
+            for level_id in archive.level_ids(extended):
+                entry = archive.index[(level_id, extended)]
+                load = partial(read_lazy_archived_chart, archive, level_id, extended)
+                stored.setdefault(level_id, _StoredChart(f"{archive.path}#{level_id}", (entry.offset, entry.length), load))
+        return stored
+
+    for extended, compressed in itertools.product((True, False), repeat=2):
+        for path in sorted(chart_store_path(from_dir, extended, compressed).glob("chart_*")):
+            match = _LEVEL_FILE.match(path.stem)
+            if path.suffix not in (JSON_EXT, LZMA_EXT, BINARY_CHART_EXT) or not match:
+                continue
+
+            stat = path.stat()
+            load = partial(load_lazy_chart, path, extended)
+            stored.setdefault(int(match.group(1)), _StoredChart(str(path), (stat.st_mtime_ns, stat.st_size), load))
+
+    return stored
+
+
+def parse_catalog_filter(spec: str) -> CatalogFilter:
+    """Parse `field op value`, e.g. `note_count>=1500`, `difficulty=80..90` or `name~camellia`."""
+    match = _FILTER.match(spec)
+    if not match:
+        raise ValueError(f'Invalid filter "{spec}", expected e.g. "difficulty>=80", "difficulty=80..90" or "name~text"')
+
+    field, op, value = match.groups()
+    if field not in _catalog_fields():
+        raise ValueError(f'Unknown catalog field "{field}", available: {", ".join(_catalog_fields())}')
+
+    lower, dots, upper = value.partition("..")
+    if dots and op == "=":
+        return CatalogFilter(field, op, _parse_value(lower), _parse_value(upper))
+    return CatalogFilter(field, op, value if op == "~" else _parse_value(value))
+
+
+def _parse_value(value: str) -> int | float | str:
+    for number_type in (int, float):
+        try:
+            return number_type(value)
+        except ValueError:
+            pass
+    return value
+
+
+def _catalog_fields() -> tuple[str, ...]:
+    entry_fields = tuple(field for field in CatalogEntry.__struct_fields__ if field != "stats")
+    return entry_fields + ChartStats.__struct_fields__
+
+
+def catalog_field(entry: CatalogEntry, field: str) -> Any:
+    """A catalog entry's own field or one of its chart stats, None when the level has no stored chart."""
+    if field in CatalogEntry.__struct_fields__:
+        return getattr(entry, field)
+    return getattr(entry.stats, field) if entry.stats else None
+
+
+def _matches(entry: CatalogEntry, catalog_filter: CatalogFilter) -> bool:
+    value = catalog_field(entry, catalog_filter.field)
+    if value is None:
+        return False
+
+    try:
+        if catalog_filter.upper is not None:
+            return catalog_filter.value <= value <= catalog_filter.upper
+        return _OPERATORS[catalog_filter.op](value, catalog_filter.value)
+    except TypeError:
+        # e.g. a number compared to text
+        return False
+
+
+def query_catalog(
+    catalog: ChartCatalog, filters: list[CatalogFilter], sort: str = "id", descending: bool = False, limit: int = 0
+) -> list[CatalogEntry]:
+    """Entries matching every filter, sorted on any field. Entries without a value for the sort field come last."""
+    if sort not in _catalog_fields():
+        raise ValueError(f'Unknown catalog field "{sort}", available: {", ".join(_catalog_fields())}')
+
+    entries = [entry for entry in catalog.entries.values() if all(_matches(entry, f) for f in filters)]
+    known = [entry for entry in entries if catalog_field(entry, sort) is not None]
+    unknown = [entry for entry in entries if catalog_field(entry, sort) is None]
+    known.sort(key=lambda entry: catalog_field(entry, sort), reverse=descending)
+
+    results = known + unknown
+    return results[:limit] if limit > 0 else results
+
+
+def update_chart_catalog(args: CatalogUpdateArgs) -> ChartCatalog:
+    path = catalog_path(args.from_dir, args.catalog)
+    catalog = load_catalog(path)
+
+    songs = get_song_list(SongListArgs()).songs if args.song_list else None
+    changed = update_catalog(catalog, args.from_dir, songs)
+    print(f"Updated {changed} of {len(catalog.entries)} catalog entries")
+
+    if changed:
+        write_json_to_file(catalog, path)
+    return catalog
+
+
+def query_chart_catalog(args: CatalogQueryArgs) -> list[CatalogEntry]:
+    path = catalog_path(args.from_dir, args.catalog)
+    catalog = load_catalog(path)
+
+    # Picks up charts stored or re-extended since the last update, offline
+    if update_catalog(catalog, args.from_dir):
+        write_json_to_file(catalog, path)
+
+    filters = [parse_catalog_filter(spec) for spec in args.where]
+    results = query_catalog(catalog, filters, args.sort, args.descending, args.limit)
+
+    columns = _QUERY_COLUMNS + ((args.sort,) if args.sort not in _QUERY_COLUMNS else ())
+    for line in _format_rows(results, columns):
+        print(line)
+    print(f"{len(results)} charts")
+
+    return results
+
+
+def _format_rows(entries: list[CatalogEntry], columns: tuple[str, ...]) -> Iterator[str]:
+    def cell(entry: CatalogEntry, column: str) -> str:
+        value = catalog_field(entry, column)
+        if value is None:
+            return "-"
+        return f"{value:.2f}" if isinstance(value, float) else str(value)
+
+    rows = [columns] + [tuple(cell(entry, column) for column in columns) for entry in entries]
+    widths = [max(len(row[i]) for row in rows) for i in range(len(columns))]
+    for row in rows:
+        yield "  ".join(value.ljust(width) for value, width in zip(row, widths)).rstrip()
@@ -0,0 +1,50 @@
+from typing import Iterator
+
+from models.api.api_action_args import ExtendChartsArgs
+from models.responses.chart_response import ChartResponse
+from services.chart_archive_service import _iter_stored_charts
+from services.ffr_api_service import _write_chart_file
+from transformers.ffr_charts_to_extended_charts import batch_charts
+from utils.chart_archive import ChartArchive, is_chart_archive
+from utils.extension_cache import extend_charts
+from utils.io import build_chart_filename
+
+
+def extend_stored_charts(args: ExtendChartsArgs) -> int:
+    """Extend every raw chart of a directory or .ffra archive again, offline, e.g. after a new `EXTENDED_CHART_VERSION`.
+
+    Charts are extended in batches of at most `batch_notes` notes, and written to `to_dir`, next to the raw ones by default.
+    """
+    to_dir = args.to_dir or args.from_dir
+    count = 0
+
+    for batch in batch_charts(_iter_raw_charts(args.from_dir), args.batch_notes):
+        charts = extend_charts(batch)
+
+        if is_chart_archive(to_dir):
+            with ChartArchive(to_dir) as archive:
+                archive.append(charts, args.compressed, args.codec)
+        else:
+            for chart in charts:
+                path = str(build_chart_filename(to_dir, True, args.compressed, chart.info.id))
+                _write_chart_file(chart, path, args.compressed, args.format, args.codec)
+
+        count += len(charts)
+        print(f"Extended {count} charts")
+
+    return count
+
+
+def _iter_raw_charts(from_dir: str) -> Iterator[ChartResponse]:
+    if is_chart_archive(from_dir):
+        # Records appended to the same archive meanwhile never move the ones read here
+        with ChartArchive(from_dir) as archive:
+            for level_id in archive.level_ids(False):
+                chart = archive.read(level_id, False)
+                if isinstance(chart, ChartResponse):
+                    yield chart
+        return
+
+    for chart in _iter_stored_charts(from_dir, extended_stores=(False,)):
+        if isinstance(chart, ChartResponse):
+            yield chart
@@ -0,0 +1,67 @@
+from pathlib import Path
+
+from models.api.api_action_args import AllChartArgs, SongListArgs, SyncChartsArgs
+from models.charts.chart_sync_manifest import ChartSyncManifest, SyncedChart
+from models.responses.song_list_response import SongInfo
+from services.ffr_api_service import get_charts, get_song_list
+from utils.api import FfrClient, default_client
+from utils.io import chart_file_exists, chart_store_path, json_decoder, load_json_from_file, write_json_to_file
+
+_MANIFEST_FILENAME = "sync_manifest"
+
+
+def sync_charts(args: SyncChartsArgs, client: FfrClient | None = None):
+    """Download (and extend) only the charts that are new or changed upstream since the last sync."""
+    client = client or default_client()
+
+    song_list = get_song_list(SongListArgs(), client)
+    manifest_path = chart_store_path(args.to_dir, args.extended, args.compressed) / _MANIFEST_FILENAME
+    manifest = _load_manifest(manifest_path)
+
+    stale_songs = {song.id: song for song in song_list.songs if _is_stale(song, manifest, args)}
+    print(f"{len(stale_songs)} of {len(song_list.songs)} charts are new or changed")
+
+    if not stale_songs:
+        return []
+
+    charts_args = AllChartArgs(
+        0,
+        0,
+        compressed=args.compressed,
+        extended=args.extended,
+        to_dir=args.to_dir,
+        format=args.format,
+        codec=args.codec,
+        engine=args.engine,
+        concurrency=args.concurrency,
+        write_queue=args.write_queue,
+    )
+    level_ids = list(stale_songs)
+    charts = get_charts(level_ids, charts_args, client)
+
+    # Only record the levels that were actually stored
+    for level_id, chart in zip(level_ids, charts):
+        if chart is not None:
+            song = stale_songs[level_id]
+            manifest.charts[level_id] = SyncedChart(song.timestamp, song.swf_version)
+
+    write_json_to_file(manifest, manifest_path)
+
+    return charts
+
+
+def _is_stale(song: SongInfo, manifest: ChartSyncManifest, args: SyncChartsArgs) -> bool:
+    synced = manifest.charts.get(song.id)
+
+    if synced is None or synced.timestamp != song.timestamp or synced.swf_version != song.swf_version:
+        return True
+
+    # The manifest can't vouch for a file that was deleted since
+    return not chart_file_exists(args.to_dir, args.extended, args.compressed, song.id, args.format)
+
+
+def _load_manifest(path: Path) -> ChartSyncManifest:
+    try:
+        return load_json_from_file(path, json_decoder(ChartSyncManifest).decode)
+    except FileNotFoundError:
+        return ChartSyncManifest()
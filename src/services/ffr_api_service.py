@@ -1,8 +1,16 @@
+import collections
 import itertools
+import math
 import multiprocessing as mp
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
+from pathlib import Path
+from typing import Callable, Iterable, Iterator
 
-import requests
-from msgspec.json import decode, encode
+from msgspec import structs
+from msgspec.json import Decoder, decode
 
 from models.api.api_action import ApiAction
 from models.api.api_action_args import (
@@ -13,27 +21,50 @@ from models.api.api_action_args import (
     LevelScoresArgs,
     SongListArgs,
 )
+from models.api.chart_format import ChartFormat
+from models.api.crawl_engine import CrawlEngine
 from models.charts.extended_chart import ExtendedChart
 from models.responses.chart_response import ChartResponse
 from models.responses.level_ranks_response import LevelRanksResponse
-from models.responses.level_scores_response import LevelScoresResponse, LevelScoresScore
+from models.responses.level_scores_response import LevelScoresResponse, LevelScoresScore, LevelScoresSong
 from models.responses.song_list_response import SongListResponse
-from transformers.ffr_chart_to_extended_chart import extend_ffr_chart
-from utils.api import api_key, api_url, set_api_key
+from transformers.ffr_charts_to_extended_charts import DEFAULT_BATCH_NOTES, batch_charts
+from utils.api import FfrClient, default_client, init_client
+from utils.chart_archive import ChartArchive, is_chart_archive, open_chart_archive
+from utils.extension_cache import configure_extension_cache, extend_chart, extend_charts, extension_cache_args, refresh_stale_chart
 from utils.io import (
+    BINARY_CHART_EXT,
+    DEFAULT_CODEC,
+    LZMA_EXT,
+    NDJSON_EXT,
+    NdjsonWriter,
+    StrOrPath,
     build_chart_filename,
+    chart_store_path,
+    iter_ndjson_file,
+    json_decoder,
+    load_binary_chart,
     load_compressed_json_from_file,
     load_json_from_file,
+    write_binary_chart,
     write_compressed_json_to_file,
     write_json_to_file,
 )
+from utils.journal import CrawlJournal, open_journal
+from utils.write_behind import install_write_behind, persist, persist_cleanup, write_failed
 
 _DEFAULT_USERNAME = "Zageron"
 
+_LEVEL_SCORES_DIR = "data/level_scores"
+_CRAWL_JOURNAL_NAME = "crawl"
+_SPOOL_EXT = ".partial"
+_ARCHIVE_BATCH_SIZE = 64
+_EXTENSION_CHUNK_SIZE = 64
 
-def _get_data(action: str, query_params: str | None = None):
-    query_params_part = f"&{query_params}" if query_params else ""
-    response = requests.get(f"{api_url()}?key={api_key()}&action={action}{query_params_part}")
+
+def _get_data(action: str, query_params: str | None = None, client: FfrClient | None = None):
+    client = client or default_client()
+    response = client.get(action, query_params)
     response.raise_for_status()
 
     if not response.ok:
@@ -54,54 +85,35 @@ def _get_data(action: str, query_params: str | None = None):
     return response.content
 
 
-def get_song_list(args: SongListArgs):
-    response = _get_data(ApiAction.SONG_LIST.value)
+def get_song_list(args: SongListArgs, client: FfrClient | None = None):
+    response = _get_data(ApiAction.SONG_LIST.value, client=client)
     songlist = decode(response, type=SongListResponse)
 
     return songlist
 
 
-def get_chart(args: ChartArgs):
+def get_chart(args: ChartArgs, client: FfrClient | None = None):
     level_id = args.level
     query_params = f"level={level_id}"
 
-    fetch_from_api: bool = True
-    path: str | None = None
     chart: ChartResponse | ExtendedChart | None = None
 
     try:
-        # Determine full filename if from_file, from_dir or to_dir is provided
-        if args.from_file:
-            path = args.from_file
-        elif args.to_dir:
-            path = str(build_chart_filename(args.to_dir, args.extended, args.compressed, level_id))
-        elif args.from_dir:
-            path = str(build_chart_filename(args.from_dir, args.extended, args.compressed, level_id))
-
-        if path is None:
-            raise ValueError("Either from_file, from_dir or to_dir must be specified.")
+        path = _chart_path(args)
 
         # Load from disk and extend if necessary
         if args.from_file or args.from_dir:
-            try:
-                loaded_chart = load_compressed_json_from_file(path) if args.compressed else load_json_from_file(path)
-                chart = decode(loaded_chart, type=ExtendedChart) if args.extended else decode(loaded_chart, type=ChartResponse)
-
-                fetch_from_api = False
-            except FileNotFoundError:
-                # Only ignore if the file wasn't found
-                pass
+            chart = _load_stored_chart(args, path)
 
         # Fetch from API and extend if necessary
-        if fetch_from_api:
-            response = _get_data(ApiAction.CHART.value, query_params)
-            chart = decode(response, type=ChartResponse)
-            chart = extend_ffr_chart(chart) if args.extended else chart
+        if chart is None:
+            response = _get_data(ApiAction.CHART.value, query_params, client)
+            chart = json_decoder(ChartResponse).decode(response)
+            chart = extend_chart(chart) if args.extended else chart
 
         # Write to file if to_dir is specified
         if args.to_dir and not args.from_file:
-            dict_data = decode(encode(chart))
-            write_compressed_json_to_file(dict_data, path) if args.compressed else write_json_to_file(dict_data, path)
+            _store_chart(args, chart, path)
 
         return chart
 
@@ -109,87 +121,479 @@ def get_chart(args: ChartArgs):
         print(f"Error on song {level_id}: {e}")
 
 
-def get_all_charts(args: AllChartArgs):
-    level_ids = _get_level_ids()
+def get_extended_charts(
+    chart_args: list[ChartArgs], client: FfrClient | None = None, max_notes: int = DEFAULT_BATCH_NOTES
+) -> list[ExtendedChart | None]:
+    """`get_chart` for many extended charts. Those neither stored nor cached are extended in batches of at most `max_notes` notes.
+
+    Each batch is extended and stored as soon as it fills, so only one batch of raw charts is held at a time.
+    """
+    charts: list[ExtendedChart | None] = [None] * len(chart_args)
+    raw_indices: collections.deque[int] = collections.deque()
+
+    def raw_charts() -> Iterator[ChartResponse]:
+        for index, args in enumerate(chart_args):
+            try:
+                chart = None
+                if args.from_file or args.from_dir:
+                    chart = _load_stored_chart(args, _chart_path(args), extend=False)
+
+                if chart is None:
+                    response = _get_data(ApiAction.CHART.value, f"level={args.level}", client)
+                    chart = json_decoder(ChartResponse).decode(response)
+
+            except Exception as e:
+                print(f"Error on song {args.level}: {e}")
+                continue
+
+            if isinstance(chart, ChartResponse):
+                raw_indices.append(index)
+                yield chart
+            else:
+                charts[index] = _store_extended_chart(args, chart)
+
+    for batch in batch_charts(raw_charts(), max_notes):
+        for chart in extend_charts(batch):
+            index = raw_indices.popleft()
+            charts[index] = _store_extended_chart(chart_args[index], chart)
+
+    return charts
+
+
+def _store_extended_chart(args: ChartArgs, chart: ExtendedChart) -> ExtendedChart | None:
+    try:
+        if args.to_dir and not args.from_file:
+            _store_chart(args, chart, _chart_path(args))
+        return chart
+
+    except Exception as e:
+        print(f"Error on song {args.level}: {e}")
+
+
+def _chart_path(args: ChartArgs) -> str:
+    # Determine full filename if from_file, from_dir or to_dir is provided
+    if args.from_file:
+        return args.from_file
+    elif args.to_dir:
+        return str(build_chart_filename(args.to_dir, args.extended, args.compressed, args.level))
+    elif args.from_dir:
+        return str(build_chart_filename(args.from_dir, args.extended, args.compressed, args.level))
+
+    raise ValueError("Either from_file, from_dir or to_dir must be specified.")
+
+
+def _load_stored_chart(args: ChartArgs, path: str, extend: bool = True) -> ChartResponse | ExtendedChart | None:
+    if is_chart_archive(args.from_dir):
+        chart = _load_archived_chart(args.from_dir, args.level, args.extended, extend)
+    else:
+        chart = _load_chart_file(path, args.compressed, args.extended, args.format)
+
+    # Charts extended by an older version are re-extended as they are read, and rewritten when storing
+    return refresh_stale_chart(chart) if chart is not None else None
+
+
+def _load_archived_chart(archive_path: str, level_id: int, extended: bool, extend: bool = True) -> ChartResponse | ExtendedChart | None:
+    archive = open_chart_archive(archive_path)
+    chart = archive.read(level_id, extended)
+
+    if chart is None and extended:
+        # Extending the archived raw chart beats downloading it again, left to the caller when it extends in batches
+        raw_chart = archive.read(level_id, False)
+        chart = extend_chart(raw_chart) if raw_chart and extend else raw_chart
+
+    return chart
+
+
+def _store_chart(args: ChartArgs, chart: ChartResponse | ExtendedChart, path: str):
+    if is_chart_archive(args.to_dir):
+        with ChartArchive(args.to_dir) as archive:
+            archive.append([chart], args.compressed, args.codec)
+    else:
+        persist(args.level, _write_chart_file, chart, path, args.compressed, args.format, args.codec)
+
+
+def _load_chart_file(
+    path: str, compressed: bool, extended: bool, chart_format: str = ChartFormat.JSON.value
+) -> ChartResponse | ExtendedChart | None:
+    try:
+        if chart_format == ChartFormat.BINARY.value or Path(path).suffix == BINARY_CHART_EXT:
+            return load_binary_chart(path)
+
+        decoder = json_decoder(ExtendedChart if extended else ChartResponse)
+        return decoder.decode(load_compressed_json_from_file(path)) if compressed else load_json_from_file(path, decoder.decode)
+    except FileNotFoundError:
+        # Only ignore if the file wasn't found
+        return None
+
+
+def _write_chart_file(
+    chart: ChartResponse | ExtendedChart,
+    path: str,
+    compressed: bool,
+    chart_format: str = ChartFormat.JSON.value,
+    codec: str = DEFAULT_CODEC,
+):
+    if chart_format == ChartFormat.BINARY.value:
+        return write_binary_chart(chart, path, compressed, codec)
+
+    write_compressed_json_to_file(chart, path, codec) if compressed else write_json_to_file(chart, path)
+
+
+def get_all_charts(args: AllChartArgs, client: FfrClient | None = None):
+    client = client or default_client()
+    return get_charts(_all_chart_ids(args, client), args, client)
+
+
+def iter_all_charts(args: AllChartArgs, client: FfrClient | None = None) -> Iterator[ChartResponse | ExtendedChart]:
+    """Like `get_all_charts`, but yield each chart as soon as it is ready instead of returning them all at once."""
+    client = client or default_client()
+    return iter_charts(_all_chart_ids(args, client), args, client)
+
+
+def _all_chart_ids(args: AllChartArgs, client: FfrClient) -> set[int]:
+    level_ids = _get_level_ids(client)
     ranged_level_ids = set(filter(lambda lvl_id: args.start_id <= lvl_id < args.end_id, level_ids))
 
-    pool = mp.Pool(initializer=set_api_key, initargs=(api_key(),))
-    return pool.starmap(
-        _get_all_charts_internal,
-        zip(
-            ranged_level_ids,
-            itertools.repeat(args.compressed),
-            itertools.repeat(args.extended),
-            itertools.repeat(args.to_dir),
-            itertools.repeat(args.from_dir),
-            itertools.repeat(args.download_if_not_found),
-        ),
+    journal_path = _charts_journal_path(args)
+    if args.resume and journal_path:
+        journal = CrawlJournal(journal_path)
+        ranged_level_ids = set(journal.pending(ranged_level_ids))
+        journal.close()
+        print(f"Resuming crawl: {len(ranged_level_ids)} levels left")
+
+    if args.resume and is_chart_archive(args.to_dir):
+        with ChartArchive(args.to_dir) as archive:
+            ranged_level_ids = {level_id for level_id in ranged_level_ids if not archive.has(level_id, args.extended)}
+        print(f"Resuming crawl: {len(ranged_level_ids)} levels left")
+
+    return ranged_level_ids
+
+
+def _charts_journal_path(args: AllChartArgs) -> str | None:
+    # Archives are their own record of what was crawled
+    if not args.to_dir or is_chart_archive(args.to_dir):
+        return None
+    return str(chart_store_path(args.to_dir, args.extended, args.compressed) / _CRAWL_JOURNAL_NAME)
+
+
+def _chart_params(level_ids: Iterable[int], args: AllChartArgs):
+    return zip(
+        level_ids,
+        itertools.repeat(args.compressed),
+        itertools.repeat(args.extended),
+        itertools.repeat(args.to_dir),
+        itertools.repeat(args.from_dir),
+        itertools.repeat(args.download_if_not_found),
+        itertools.repeat(_charts_journal_path(args)),
+        itertools.repeat(args.format),
+        itertools.repeat(args.codec),
     )
 
 
-def get_level_ranks(args: LevelRanksArgs):
+def get_charts(level_ids: Iterable[int], args: AllChartArgs, client: FfrClient | None = None):
+    """Get the given levels with the engine and storage options of `args`. Results are in the order of `level_ids`."""
+    client = client or default_client()
+
+    if is_chart_archive(args.to_dir):
+        charts = get_charts(level_ids, _archive_worker_args(args), client)
+        _append_to_archive(args.to_dir, charts, args.compressed, args.codec)
+        return charts
+
+    if args.engine == CrawlEngine.ASYNC.value:
+        # Imported here since the async engine builds on this module
+        from services.async_crawl_service import crawl_all_charts
+
+        return crawl_all_charts(level_ids, args, client)
+
+    with mp.Pool(initializer=_init_crawl_worker, initargs=(client.init_args(), args.write_queue, extension_cache_args())) as pool:
+        if args.extended:
+            # Each worker extends its chunk of levels in batches of at most `extend_batch_notes` notes
+            chunks = _extension_chunks(list(level_ids))
+            charts = list(itertools.chain.from_iterable(pool.starmap(_get_extended_chart_chunk, _chunk_params(chunks, args))))
+        else:
+            charts = pool.starmap(_get_all_charts_internal, _chart_params(level_ids, args))
+        pool.close()
+        pool.join()
+
+    return charts
+
+
+def iter_charts(level_ids: Iterable[int], args: AllChartArgs, client: FfrClient | None = None) -> Iterator[ChartResponse | ExtendedChart]:
+    """Yield the given levels in completion order, skipping failed ones, with each chart's latency reported as it arrives.
+
+    Only the charts in flight are held in memory. The async engine gathers its results before yielding them.
+    """
+    client = client or default_client()
+    level_ids = list(level_ids)
+
+    if is_chart_archive(args.to_dir):
+        batch = []
+        try:
+            for chart in iter_charts(level_ids, _archive_worker_args(args), client):
+                batch.append(chart)
+                if len(batch) == _ARCHIVE_BATCH_SIZE:
+                    _append_to_archive(args.to_dir, batch, args.compressed, args.codec)
+                    batch = []
+                yield chart
+        finally:
+            _append_to_archive(args.to_dir, batch, args.compressed, args.codec)
+        return
+
+    if args.engine == CrawlEngine.ASYNC.value:
+        from services.async_crawl_service import crawl_all_charts
+
+        yield from (chart for chart in crawl_all_charts(level_ids, args, client) if chart is not None)
+        return
+
+    with mp.Pool(initializer=_init_crawl_worker, initargs=(client.init_args(), args.write_queue, extension_cache_args())) as pool:
+        if args.extended:
+            chunks = _extension_chunks(level_ids)
+            done = 0
+
+            for chunk, charts, elapsed in pool.imap_unordered(_get_extended_chart_chunk_timed, _chunk_params(chunks, args)):
+                done += len(chunk)
+                print(f"[{done}/{len(level_ids)}] {len(chunk)} levels from {chunk[0]} in {elapsed * 1000:.0f} ms")
+                yield from (chart for chart in charts if chart is not None)
+        else:
+            results = pool.imap_unordered(_get_chart_timed, _chart_params(level_ids, args), chunksize=args.chunksize)
+
+            for done, (level_id, chart, elapsed) in enumerate(results, 1):
+                print(f"[{done}/{len(level_ids)}] Level {level_id} in {elapsed * 1000:.0f} ms")
+                if chart is not None:
+                    yield chart
+
+        # Let the workers exit cleanly rather than be terminated by the context manager
+        pool.close()
+        pool.join()
+
+
+def _archive_worker_args(args: AllChartArgs) -> AllChartArgs:
+    # Workers read what the archive already has and only fetch the rest. This process is the archive's single writer.
+    return structs.replace(args, to_dir="", from_dir=args.to_dir)
+
+
+def _append_to_archive(archive_path: str, charts: Iterable[ChartResponse | ExtendedChart | None], compressed: bool, codec: str):
+    with ChartArchive(archive_path) as archive:
+        new_charts = [chart for chart in charts if chart is not None and not archive.has(chart.info.id, isinstance(chart, ExtendedChart))]
+        if new_charts:
+            print(f"Appending {len(new_charts)} charts to {archive.path}")
+            archive.append(new_charts, compressed, codec)
+
+
+def get_level_ranks(args: LevelRanksArgs, client: FfrClient | None = None):
     if args.userid > 0:
         query_params = f"userid={args.userid}"
     else:
         query_params = f"username={args.username}"
 
-    response = _get_data(ApiAction.LEVEL_RANKS.value, query_params)
+    response = _get_data(ApiAction.LEVEL_RANKS.value, query_params, client)
     return decode(response, type=LevelRanksResponse)
 
 
-def get_level_scores(args: LevelScoresArgs):
+def get_level_scores(args: LevelScoresArgs, client: FfrClient | None = None):
     query_params = f"level={args.level}&page={args.page}&limit={args.limit}"
 
-    return _get_data(ApiAction.LEVEL_SCORES.value, query_params)
+    return _get_data(ApiAction.LEVEL_SCORES.value, query_params, client)
 
 
-def get_all_level_scores(args: AllLevelScoresArgs):
+def level_scores_filename(level_id: int, compressed: bool) -> Path:
+    extension = f"{NDJSON_EXT}{LZMA_EXT}" if compressed else NDJSON_EXT
+    return Path(_LEVEL_SCORES_DIR) / f"scores_{level_id}{extension}"
+
+
+def read_level_scores(file_name: StrOrPath) -> tuple[LevelScoresSong, Iterator[LevelScoresScore]]:
+    """Read a streamed level scores file: the song info, and its scores decoded lazily one at a time."""
+    lines = iter_ndjson_file(file_name)
+    song = decode(next(lines), type=LevelScoresSong)
+    score_decoder = Decoder(LevelScoresScore)
+
+    return song, (score_decoder.decode(line) for line in lines)
+
+
+def get_all_level_scores(args: AllLevelScoresArgs, client: FfrClient | None = None):
+    client = client or default_client()
     limit = args.limit
     _has_limit = limit > 0
 
-    level_ids = _get_level_ids()
+    level_ids = _get_level_ids(client)
     ranged_level_ids = set(filter(lambda lvl_id: args.start_id <= lvl_id < args.end_id, level_ids))
 
-    pool = mp.Pool(initializer=set_api_key, initargs=(api_key(),))
-    pool.starmap(_get_all_level_scores_internal, zip(ranged_level_ids, itertools.repeat(args.compressed)))
+    journal_path = str(Path(_LEVEL_SCORES_DIR) / _CRAWL_JOURNAL_NAME)
+    if args.resume:
+        journal = CrawlJournal(journal_path)
+        ranged_level_ids = set(journal.pending(ranged_level_ids))
+        journal.close()
+        print(f"Resuming crawl: {len(ranged_level_ids)} levels left")
+
+    if args.engine == CrawlEngine.ASYNC.value:
+        from services.async_crawl_service import crawl_all_level_scores
+
+        return crawl_all_level_scores(ranged_level_ids, args, client, journal_path)
+
+    # Give each worker enough keep-alive connections for its concurrent page fetches
+    key, base_url, pool_size, options, rate_limiter = client.init_args()
+    initargs = (key, base_url, max(pool_size, args.page_concurrency), options, rate_limiter)
+
+    with mp.Pool(initializer=_init_crawl_worker, initargs=(initargs, args.write_queue)) as pool:
+        pool.starmap(
+            _get_all_level_scores_internal,
+            zip(
+                ranged_level_ids,
+                itertools.repeat(args.compressed),
+                itertools.repeat(None),
+                itertools.repeat(journal_path),
+                itertools.repeat(args.page_concurrency),
+                itertools.repeat(args.codec),
+            ),
+        )
+
+        # Workers drain their pending writes as they exit
+        pool.close()
+        pool.join()
+
 
+def _init_crawl_worker(client_args: tuple, write_queue: int, cache_args: tuple | None = None):
+    init_client(*client_args)
+    install_write_behind(write_queue)
+    if cache_args is not None:
+        configure_extension_cache(*cache_args)
 
-def _get_level_ids():
-    default_level_ranks = get_level_ranks(LevelRanksArgs(0, _DEFAULT_USERNAME))
+
+def _get_level_ids(client: FfrClient | None = None):
+    default_level_ranks = get_level_ranks(LevelRanksArgs(0, _DEFAULT_USERNAME), client)
     return set(default_level_ranks.songs.keys())
 
 
-def _get_all_level_scores_internal(level_id: int, compressed: bool):
-    page_count = 0
+def _get_all_level_scores_internal(
+    level_id: int,
+    compressed: bool,
+    client: FfrClient | None = None,
+    journal_path: str | None = None,
+    page_concurrency: int = 1,
+    codec: str = DEFAULT_CODEC,
+):
+    journal = open_journal(journal_path) if journal_path else None
+    filename = level_scores_filename(level_id, compressed)
+    spool_path = filename.with_name(filename.name + _SPOOL_EXT)
 
     def parse_page(page: int):
         query_params = f"level={level_id}&page={page}"
-        response = _get_data(ApiAction.LEVEL_SCORES.value, query_params)
-        return decode(response, type=LevelScoresResponse)
+        response = _get_data(ApiAction.LEVEL_SCORES.value, query_params, client)
+        return json_decoder(LevelScoresResponse).decode(response)
+
+    spool: NdjsonWriter | None = None
 
     try:
-        parsed_page = parse_page(page_count)
-        song_info = parsed_page.song
-        song_scores: list[LevelScoresScore] = []
+        # Pick up after the last page spooled by an interrupted run
+        cursor = journal.page_cursors.get(level_id) if journal else None
+        resuming = cursor is not None and spool_path.exists()
+        first_page = cursor.page + 1 if resuming else 0
 
-        while len(parsed_page.scores) > 0:
-            song_scores.extend(parsed_page.scores)
+        # Each page is appended as it arrives, so memory stays flat however big the leaderboard is.
+        # Writes go through the write-behind queue when the worker has one, in page order.
+        spool = NdjsonWriter(spool_path, compressed, cursor.offset if resuming else None, codec)
+        with closing(_iter_score_pages(parse_page, first_page, page_concurrency)) as pages:
+            for page, parsed_page in pages:
+                if not resuming and page == first_page:
+                    persist(level_id, _spool_records, spool, [parsed_page.song], level_id, None, journal)
 
-            page_count += 1
-            parsed_page = parse_page(page_count)
+                if len(parsed_page.scores) == 0:
+                    break
 
-        complete_level_scores = LevelScoresResponse(song_info, song_scores)
-        filename = f"data/level_scores/scores_{song_info.id}"
-        dict_data = decode(encode(complete_level_scores))
+                persist(level_id, _spool_records, spool, parsed_page.scores, level_id, page, journal)
 
-        if compressed:
-            write_compressed_json_to_file(dict_data, filename)
-        else:
-            write_json_to_file(dict_data, filename)
+        persist(level_id, _publish_spool, spool, spool_path, filename, level_id, journal)
 
     except Exception as e:
         print(f"Error on song {level_id}: {e}")
 
+        if journal:
+            persist(level_id, journal.failed_on, level_id)
+
+    finally:
+        # Runs after the level's writes even when one of them failed
+        if spool:
+            persist_cleanup(level_id, _close_spool, spool, level_id, journal)
+
+
+def _spool_records(spool: NdjsonWriter, records: list, level_id: int, page: int | None, journal: CrawlJournal | None):
+    """Append a page to a level's spool, then record it. A `None` page is the song header starting the level."""
+    offset = spool.write_records(records)
+
+    if journal:
+        journal.started(level_id) if page is None else journal.page_done(level_id, page, offset)
+
+
+def _close_spool(spool: NdjsonWriter, level_id: int, journal: CrawlJournal | None):
+    spool.close()
+
+    # A failed write dropped the level's later pages, so it is crawled again from its last recorded page
+    if journal and write_failed(level_id):
+        journal.failed_on(level_id)
+
+
+def _publish_spool(spool: NdjsonWriter, spool_path: Path, filename: Path, level_id: int, journal: CrawlJournal | None):
+    spool.close()
+
+    print(f"Writing to file: {filename}")
+    os.replace(spool_path, filename)
+
+    if journal:
+        journal.finished(level_id)
+
+
+def _iter_score_pages(parse_page: Callable[[int], LevelScoresResponse], first_page: int, concurrency: int):
+    """Yield `(page, response)` in page order, from `first_page` until a short page or the caller stops at an empty one.
+
+    The first response's player count and page size give the number of pages up front, so the rest of them
+    are fetched `concurrency` at a time instead of one after another. Page k + `concurrency` is only requested
+    once page k was consumed, so no more than `concurrency` pages ever wait on a slow writer.
+    """
+    first = parse_page(first_page)
+    yield first_page, first
+
+    page_size = len(first.scores)
+    if page_size == 0:
+        return
+
+    last_page = max(first_page, math.ceil(first.song.players / page_size) - 1)
+    pages = iter(range(first_page + 1, last_page + 1))
+
+    if concurrency > 1:
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            in_flight = collections.deque((page, executor.submit(parse_page, page)) for page in itertools.islice(pages, concurrency))
+            try:
+                while in_flight:
+                    page, future = in_flight.popleft()
+                    response = future.result()
+                    yield page, response
+
+                    if len(response.scores) < page_size:
+                        return
+
+                    next_page = next(pages, None)
+                    if next_page is not None:
+                        in_flight.append((next_page, executor.submit(parse_page, next_page)))
+            finally:
+                # Stopped early on a short page, an empty page or an error
+                for _, future in in_flight:
+                    future.cancel()
+    else:
+        for page in pages:
+            response = parse_page(page)
+            yield page, response
+
+            if len(response.scores) < page_size:
+                return
+
+    # The player count can lag behind the leaderboard, so keep going until a short page
+    for page in itertools.count(last_page + 1):
+        response = parse_page(page)
+        yield page, response
+
+        if len(response.scores) < page_size:
+            return
+
 
 def _get_all_charts_internal(
     level_id: int,
@@ -198,11 +602,19 @@ def _get_all_charts_internal(
     to_dir: str = r"C:\GitHub\FFR_API\data",
     from_dir: str = r"C:\GitHub\FFR_API\data",
     download_if_not_found: bool = True,
+    journal_path: str | None = None,
+    chart_format: str = ChartFormat.JSON.value,
+    codec: str = DEFAULT_CODEC,
 ):
+    journal = open_journal(journal_path) if journal_path else None
+
     try:
         print(f"Getting level {level_id}")
 
-        return get_chart(
+        if journal:
+            journal.started(level_id)
+
+        chart = get_chart(
             ChartArgs(
                 level=level_id,
                 compressed=compressed,
@@ -210,8 +622,89 @@ def _get_all_charts_internal(
                 to_dir=to_dir,
                 from_dir=from_dir,
                 download_if_not_found=download_if_not_found,
+                format=chart_format,
+                codec=codec,
             )
         )
 
+        # Only marked done once its file is written, which may happen later on the write-behind queue
+        if journal:
+            persist_cleanup(level_id, _finish_chart, journal, level_id) if chart is not None else journal.failed_on(level_id)
+
+        return chart
+
     except Exception as e:
         print(f"Error on song {level_id}: {e}")
+
+        if journal:
+            journal.failed_on(level_id)
+
+
+def _finish_chart(journal: CrawlJournal, level_id: int):
+    journal.failed_on(level_id) if write_failed(level_id) else journal.finished(level_id)
+
+
+def _get_chart_timed(chart_params: tuple):
+    start = time.perf_counter()
+    chart = _get_all_charts_internal(*chart_params)
+    return chart_params[0], chart, time.perf_counter() - start
+
+
+def _extension_chunks(level_ids: list[int]) -> list[list[int]]:
+    # No bigger than needed to give every worker a chunk, so small crawls still use them all
+    size = max(1, min(_EXTENSION_CHUNK_SIZE, math.ceil(len(level_ids) / (os.cpu_count() or 1))))
+    return [level_ids[i : i + size] for i in range(0, len(level_ids), size)]
+
+
+def _chunk_params(chunks: Iterable[list[int]], args: AllChartArgs):
+    return ((*params, args.extend_batch_notes) for params in _chart_params(chunks, args))
+
+
+def _get_extended_chart_chunk(
+    level_ids: list[int],
+    compressed: bool,
+    extended: bool,
+    to_dir: str = r"C:\GitHub\FFR_API\data",
+    from_dir: str = r"C:\GitHub\FFR_API\data",
+    download_if_not_found: bool = True,
+    journal_path: str | None = None,
+    chart_format: str = ChartFormat.JSON.value,
+    codec: str = DEFAULT_CODEC,
+    max_notes: int = DEFAULT_BATCH_NOTES,
+):
+    journal = open_journal(journal_path) if journal_path else None
+
+    chart_args = []
+    for level_id in level_ids:
+        print(f"Getting level {level_id}")
+
+        if journal:
+            journal.started(level_id)
+
+        chart_args.append(
+            ChartArgs(
+                level=level_id,
+                compressed=compressed,
+                extended=extended,
+                to_dir=to_dir,
+                from_dir=from_dir,
+                download_if_not_found=download_if_not_found,
+                format=chart_format,
+                codec=codec,
+            )
+        )
+
+    charts = get_extended_charts(chart_args, max_notes=max_notes)
+
+    # Only marked done once its file is written, which may happen later on the write-behind queue
+    if journal:
+        for level_id, chart in zip(level_ids, charts):
+            persist_cleanup(level_id, _finish_chart, journal, level_id) if chart is not None else journal.failed_on(level_id)
+
+    return charts
+
+
+def _get_extended_chart_chunk_timed(chart_params: tuple):
+    start = time.perf_counter()
+    charts = _get_extended_chart_chunk(*chart_params)
+    return chart_params[0], charts, time.perf_counter() - start
@@ -1,18 +1,32 @@
+import itertools
+
 import numpy as np
-import pandas as pd
+from msgspec import structs
 from numpy.typing import NDArray
 
 from models.charts.extended_chart import ChartHit, ChartInfo, ExtendedChart, ManipCorrectedHit, ManipCorrectedHitWithTransition
+from models.charts.extension_params import DEFAULT_EXTENSION_PARAMS, ExtensionParams
+from models.charts.hit_table import HitTable
 from models.responses.chart_response import ChartNote, ChartResponse
 from utils.versioning import EXTENDED_CHART_VERSION
 
 
-def extend_ffr_chart(ffr_chart: ChartResponse):
-    hits = compute_hits(ffr_chart)
-    manip_corrected_hits = compute_manip_corrected_hits(hits)
+def extend_ffr_chart(ffr_chart: ChartResponse, params: ExtensionParams = DEFAULT_EXTENSION_PARAMS):
+    hits = compute_hits(ffr_chart, params)
+    manip_corrected_hits = compute_manip_corrected_hits(hits, params.jump_manip_score)
     manip_corr_hits_with_transition = compute_hit_transitions(manip_corrected_hits)
 
-    chart_info = ChartInfo(
+    return ExtendedChart(
+        extended_chart_info(ffr_chart),
+        ffr_chart.chart,
+        hits.rows(ChartHit),
+        manip_corr_hits_with_transition.rows(ManipCorrectedHitWithTransition),
+        EXTENDED_CHART_VERSION,
+    )
+
+
+def extended_chart_info(ffr_chart: ChartResponse) -> ChartInfo:
+    return ChartInfo(
         id=ffr_chart.info.id,
         name=ffr_chart.info.name,
         genre=ffr_chart.info.genre,
@@ -23,24 +37,6 @@ def extend_ffr_chart(ffr_chart: ChartResponse):
         timestamp_format=ffr_chart.info.timestamp_format,
     )
 
-    return ExtendedChart(chart_info, ffr_chart.chart, hits, manip_corr_hits_with_transition, EXTENDED_CHART_VERSION)
-
-
-def ffr_note_dir(note: ChartNote):
-    return note.dir
-
-
-def ffr_note_ms(note: ChartNote):
-    return note.ms
-
-
-def ffr_note_hand(note: ChartNote):
-    return 0 if ffr_note_dir(note) <= 1 else 1
-
-
-def ffr_note_finger(note: ChartNote):
-    return ffr_note_dir(note) % 2
-
 
 def classify_transition_code(prev: ManipCorrectedHit, curr: ManipCorrectedHit) -> int:
     if prev.finger != 3 and curr.finger != 3:
@@ -54,210 +50,253 @@ def classify_transition_code(prev: ManipCorrectedHit, curr: ManipCorrectedHit) -
     return -1  # unknown
 
 
-def compute_hits(ffr_chart: ChartResponse):
-    np_notes = np.array(
-        [
-            [
-                ffr_note_ms(note),
-                ffr_note_hand(note),
-                ffr_note_dir(note),
-                ffr_note_finger(note) + 1,
-            ]
-            for note in ffr_chart.chart
-        ],
-        dtype=np.int32,
-    )
+_NOTE_FIELDS = ChartNote.__struct_fields__
+_NOTE_DIR = _NOTE_FIELDS.index("dir")
+_NOTE_MS = _NOTE_FIELDS.index("ms")
+
+
+def note_array(notes: list[ChartNote]) -> NDArray[np.int32]:
+    """The notes as an int32 array with one row per note and one column per `ChartNote` field."""
+    flat = itertools.chain.from_iterable(map(structs.astuple, notes))
+    return np.fromiter(flat, dtype=np.int32, count=len(notes) * len(_NOTE_FIELDS)).reshape(-1, len(_NOTE_FIELDS))
+
+
+def hand_hits(notes: NDArray[np.int32]) -> tuple[NDArray[np.int32], NDArray[np.int32]]:
+    """Merge the notes of each hand hitting on the same ms into one hit. Returns [ms, finger] rows sorted by ms per hand.
+
+    Directions 0 and 1 are the left hand, 2 and 3 the right one. Each note counts as finger `dir % 2 + 1` and a
+    hit's finger is the sum over its notes, so 3 is a jump.
+    """
+    dirs = notes[:, _NOTE_DIR]
+    is_right_hand = dirs > 1
+    fingers = dirs % 2 + 1
+
+    hits = []
+    for hand_mask in (~is_right_hand, is_right_hand):
+        ms = notes[hand_mask, _NOTE_MS]
+        order = np.argsort(ms, kind="stable")
+        ms, hand_fingers = ms[order], fingers[hand_mask][order]
 
-    pd_notes = pd.DataFrame(np_notes)
+        starts = np.flatnonzero(np.diff(ms, prepend=ms[:1] - 1))
+        hits.append(np.column_stack((ms[starts], np.add.reduceat(hand_fingers, starts))))
 
-    # Split notes into left and right hand
-    notes_by_hand = pd_notes.groupby(1, as_index=False)
-    notes_left_hand = pd.DataFrame(np_notes[notes_by_hand.groups[0].to_numpy()])
-    notes_right_hand = pd.DataFrame(np_notes[notes_by_hand.groups[1].to_numpy()])
+    return hits[0], hits[1]
 
+
+def compute_hits(ffr_chart: ChartResponse, params: ExtensionParams = DEFAULT_EXTENSION_PARAMS) -> HitTable:
     # Transform notes into hits on each hand
-    left_hits = notes_left_hand.groupby(0).sum().reset_index().to_numpy()[:, [0, 3]]
-    right_hits = notes_right_hand.groupby(0).sum().reset_index().to_numpy()[:, [0, 3]]
+    left_hits, right_hits = hand_hits(note_array(ffr_chart.chart))
 
     # Get the manip score of each hit
-    left_hits_with_manip = get_manip_jumps_on_hand(left_hits)
-    right_hits_with_manip = get_manip_jumps_on_hand(right_hits)
-
-    spread_left_hits = iterative_smoothing_projection(left_hits[:, 0])
-    spread_right_hits = iterative_smoothing_projection(right_hits[:, 0])
-
-    # Append the data to get the correct format for ChartHit's
-    extended_left_hits = np.c_[
-        np.zeros(left_hits.shape[0], dtype=int).T,
-        left_hits,
-        np.diff(left_hits, axis=0, prepend=[[0, 0]])[:, 0],
-        left_hits_with_manip[:, 2],
-        spread_left_hits,
-    ]
-    extended_right_hits = np.c_[
-        np.ones(right_hits.shape[0], dtype=int).T,
-        right_hits,
-        np.diff(right_hits, axis=0, prepend=[[0, 0]])[:, 0],
-        right_hits_with_manip[:, 2],
-        spread_right_hits,
-    ]
-
-    # Concat both hands sorted by time
-    all_hits = np.concatenate((extended_left_hits, extended_right_hits), axis=0)
-    all_hits_sorted_time = all_hits[all_hits[:, 1].argsort()]
-
-    return [
-        ChartHit(int(hand), int(finger), int(ms), int(gap), int(manip_score), int(spread_ms))
-        for (hand, ms, finger, gap, manip_score, spread_ms) in all_hits_sorted_time
-    ]
-
-
-def iterative_smoothing_projection(x: NDArray[np.int32], T: int = 50, iterations: int = 10) -> NDArray[np.float32]:
+    manip_args = (params.manip_threshold_ms, params.logistic_midpoint, params.logistic_steepness, params.triplet_window_ms)
+    left_hits_with_manip = get_manip_jumps_on_hand(left_hits, *manip_args)
+    right_hits_with_manip = get_manip_jumps_on_hand(right_hits, *manip_args)
+
+    spread_left_hits = iterative_smoothing_projection(left_hits[:, 0], params.smoothing_window, params.smoothing_iterations)
+    spread_right_hits = iterative_smoothing_projection(right_hits[:, 0], params.smoothing_window, params.smoothing_iterations)
+
+    # Concat both hands sorted by time, argsorting the same float64 ms column as ever so ties keep their order
+    ms = np.concatenate((left_hits[:, 0], right_hits[:, 0]))
+    order = ms.astype(np.float64).argsort()
+
+    def column(left: NDArray, right: NDArray, dtype: type) -> NDArray:
+        return np.concatenate((left, right)).astype(dtype)[order]
+
+    return HitTable(
+        hand=np.repeat(np.array([0, 1], dtype=np.int8), (len(left_hits), len(right_hits)))[order],
+        finger=column(left_hits[:, 1], right_hits[:, 1], np.int8),
+        ms=ms[order],
+        gap=column(np.diff(left_hits[:, 0], prepend=0), np.diff(right_hits[:, 0], prepend=0), np.int32),
+        manip=column(left_hits_with_manip[:, 2], right_hits_with_manip[:, 2], np.int8),
+        spread_ms=column(spread_left_hits, spread_right_hits, np.int32),
+    )
+
+
+def iterative_smoothing_projection(
+    x: NDArray[np.int32], T: int = 50, iterations: int = 10, tolerance: float = 0.0, segments: NDArray[np.integer] | None = None
+) -> NDArray[np.float32]:
+    """Spread hits out evenly, each within T ms of its time and never before the previous one.
+
+    Stops early once no hit moves by more than `tolerance` ms in an iteration. The iterations only depend on
+    the previous projection, so the default of 0 stops at a fixed point without changing the result.
+
+    `segments` splits `x` into contiguous runs, such as the hands of a batch of charts, each projected on its own.
+    """
     n = len(x)
+    if n == 0:
+        return x.astype(np.float32)
 
     # Start with original values clamped within bounds
     lower = x - T
     upper = x + T
-    current = np.clip(np.linspace(x[0] - T, x[-1] + T, n, dtype=np.int32), lower, upper)
+    if segments is None:
+        current = np.clip(np.linspace(x[0] - T, x[-1] + T, n, dtype=np.int32), lower, upper)
+        is_end = np.zeros(n, dtype=bool)
+        is_end[[0, -1]] = True
+    else:
+        is_start, is_end = _segment_ends(segments)
+        current = np.clip(_segment_linspace(x - T, x + T, is_start, is_end), lower, upper)
+        is_end |= is_start
+        # Later segments sit above anything earlier ones hold, so one running max never crosses a segment
+        offsets = np.cumsum(is_start, dtype=np.int64) << 33
 
     for _ in range(iterations):
-        # Smooth with average of neighbors
+        # Smooth with average of neighbors, truncated like the int32 array it is stored in, keeping each segment's ends
         smoothed = current.copy()
-        for i in range(1, n - 1):
-            smoothed[i] = (current[i - 1] + current[i + 1]) / 2
+        smoothed[1:-1] = ((current[:-2] + current[2:]) / 2).astype(smoothed.dtype)
+        smoothed[is_end] = current[is_end]
         # Clamp again to legal bounds
         smoothed = np.clip(smoothed, lower, upper)
         # Ensure monotonicity via forward pass
-        for i in range(1, n):
-            if smoothed[i] < smoothed[i - 1]:
-                smoothed[i] = smoothed[i - 1]
+        if segments is None:
+            smoothed = np.maximum.accumulate(smoothed)
+        else:
+            smoothed = (np.maximum.accumulate(smoothed + offsets) - offsets).astype(smoothed.dtype)
+
+        converged = np.abs(smoothed - current).max() <= tolerance
         current = smoothed
+        if converged:
+            break
 
     return current.round().astype(np.float32)
 
 
-def compute_time_score(time_diff: NDArray[np.float32]) -> NDArray[np.float32]:
-    # Logistic function parameters
-    midpoint = 55.0
-    steepness = 0.1
+def _segment_ends(segments: NDArray[np.integer]) -> tuple[NDArray[np.bool_], NDArray[np.bool_]]:
+    """Masks of the first and last element of each contiguous run of equal segments."""
+    if len(segments) == 0:
+        return np.zeros(0, dtype=bool), np.zeros(0, dtype=bool)
+
+    boundaries = segments[1:] != segments[:-1]
+    is_start = np.concatenate(([True], boundaries))
+    is_end = np.concatenate((boundaries, [True]))
+    return is_start, is_end
+
 
+def _segment_linspace(
+    starts: NDArray[np.int32], stops: NDArray[np.int32], is_start: NDArray[np.bool_], is_end: NDArray[np.bool_]
+) -> NDArray[np.int32]:
+    """`np.linspace(start, stop, n, dtype=np.int32)` for every segment at once, computed with the same float64 steps."""
+    first = np.flatnonzero(is_start)
+    last = np.flatnonzero(is_end)
+    lengths = last - first + 1
+
+    position = np.arange(len(starts)) - np.repeat(first, lengths)
+    start = np.repeat(starts[first], lengths).astype(np.float64)
+    step = (stops[last].astype(np.float64) - starts[first]) / np.maximum(lengths - 1, 1)
+
+    values = position * np.repeat(step, lengths) + start
+    values[last[lengths > 1]] = stops[last[lengths > 1]]
+    return np.floor(values).astype(np.int32)
+
+
+def compute_time_score(time_diff: NDArray[np.float32], midpoint: float = 55.0, steepness: float = 0.1) -> NDArray[np.float32]:
     # Compute the time score using the logistic function
     time_scores = 1 / (1 + np.exp(steepness * (time_diff - midpoint)))
 
     return time_scores.astype(np.float32)
 
 
+def _alternates(first: NDArray[np.int8], second: NDArray[np.int8], third: NDArray[np.int8]) -> NDArray[np.bool_]:
+    return ((first == 1) & (second == 2) & (third == 1)) | ((first == 2) & (second == 1) & (third == 2))
+
+
+def _alternating_pair(first: NDArray[np.int8], second: NDArray[np.int8]) -> NDArray[np.bool_]:
+    return ((first == 1) & (second == 2)) | ((first == 2) & (second == 1))
+
+
+def _outer_gap_penalty(outer_time_score: NDArray[np.float32], gap: NDArray[np.int32], max_diff: int) -> NDArray[np.float64]:
+    # How much an alternation extending the candidate outwards by `gap` ms relieves it
+    return np.where(gap < max_diff, outer_time_score / 2 * (max_diff - gap) / max_diff, (gap - max_diff) / max_diff)
+
+
 def compute_alternating_penalties(
     candidate_indices: NDArray[np.intp],
     times: NDArray[np.int32],
     columns: NDArray[np.int8],
     time_scores: NDArray[np.float32],
     max_diff_for_triplet_detection: int = 150,
+    segments: NDArray[np.integer] | None = None,
 ) -> NDArray[np.float32]:
+    """Penalize manip candidates that sit inside an alternating (1, 2, 1) or (2, 1, 2) triplet, i.e. a trill.
+
+    Computed for every candidate at once. Each row mirrors the per-candidate steps: the outer triplets
+    relieve the penalty, the triplet with the shortest span sets it from how even its two gaps are, and
+    consistent alternation right before or after that triplet reduces it.
+
+    With `segments`, hits of another segment than the candidate's count as missing, like those past either end.
+    """
     penalties = np.zeros(len(times), dtype=np.float32)
+    if len(candidate_indices) == 0:
+        return penalties
+
+    max_diff = max_diff_for_triplet_detection
+
+    # Pad two hits on each side, with columns that never alternate, so neighbors never go out of bounds
+    pad = 2
+    padded_columns = np.pad(columns, pad)
+    padded_times = np.pad(times, pad, mode="edge")
+    padded_scores = np.pad(time_scores, pad)
+    i = np.asarray(candidate_indices) + pad
+
+    if segments is not None:
+        padded_segments = np.pad(segments, pad, constant_values=-1)
+
+    def column_at(indices: NDArray[np.intp]) -> NDArray[np.int8]:
+        if segments is None:
+            return padded_columns[indices]
+        return np.where(padded_segments[indices] == padded_segments[i], padded_columns[indices], 0).astype(np.int8)
+
+    def column(offset: int) -> NDArray[np.int8]:
+        return column_at(i + offset)
+
+    def gap(offset: int) -> NDArray[np.int32]:
+        # Time from hit `offset - 1` to hit `offset` relative to the candidate
+        return padded_times[i + offset] - padded_times[i + offset - 1]
+
+    gap_prev_prev, gap_prev_curr, gap_curr_next, gap_next_next = gap(-1), gap(0), gap(1), gap(2)
+
+    # Triplets ending, centered and starting on the candidate
+    has_triplet = np.stack(
+        (
+            _alternates(column(-2), column(-1), column(0)),
+            _alternates(column(-1), column(0), column(1)),
+            _alternates(column(0), column(1), column(2)),
+        )
+    )
+    triplet_times = np.stack((gap_prev_prev + gap_prev_curr, gap_prev_curr + gap_curr_next, gap_curr_next + gap_next_next))
+
+    manip_penalty = np.zeros(len(i), dtype=np.float64)
+    manip_penalty -= np.where(has_triplet[0], _outer_gap_penalty(padded_scores[i - 2], gap_prev_prev, max_diff), 0.0)
+    manip_penalty -= np.where(has_triplet[2], _outer_gap_penalty(padded_scores[i + 2], gap_next_next, max_diff), 0.0)
+    manip_penalty = np.minimum(np.maximum(manip_penalty, 0), 1)
+
+    # Closest triplet by its time sum, the earliest one on ties
+    closest = np.argmin(np.where(has_triplet, triplet_times, np.iinfo(triplet_times.dtype).max), axis=0)
+    has_any_triplet = has_triplet.any(axis=0)
+    rows = np.arange(len(i))
+
+    i1 = i - 2 + closest
+    i2, i3 = i1 + 1, i1 + 2
+    avg_time_diff = np.where(has_any_triplet, triplet_times[closest, rows], 1) / 2
+
+    # Calculate the penalty based on how close the time differences are
+    ratio_to_alternation = np.minimum(padded_times[i2] - padded_times[i1], padded_times[i3] - padded_times[i2]) / avg_time_diff
+    triplet_penalty = manip_penalty + (ratio_to_alternation - 0.5) * 2
+
+    # Consider surrounding inputs to reinforce or reduce the penalty
+    avg_before_diff = (padded_times[i1] - padded_times[i1 - 2] + gap_prev_prev) / 2
+    consistent_before = _alternating_pair(column_at(i1 - 2), padded_columns[i1])
+    consistent_before &= np.abs(avg_before_diff - avg_time_diff) < avg_time_diff * 0.2
+    triplet_penalty = np.where(consistent_before, triplet_penalty / 1.2, triplet_penalty)
+
+    avg_after_diff = (gap_next_next + padded_times[i3 + 2] - padded_times[i3]) / 2
+    consistent_after = _alternating_pair(padded_columns[i3], column_at(i3 + 2))
+    consistent_after &= np.abs(avg_after_diff - avg_time_diff) < avg_time_diff * 0.2
+    triplet_penalty = np.where(consistent_after, triplet_penalty / 1.2, triplet_penalty)
 
-    for idx in range(len(candidate_indices)):
-        i = candidate_indices[idx]
-        manip_penalty: float = 0.0
-
-        has_prev = i > 0
-        has_prev_prev = i > 1
-        has_next = i + 1 < len(times)
-        has_next_next = i + 2 < len(times)
-
-        current_col = columns[i]
-        next_col = columns[i + 1] if has_next else None
-
-        prev_col = columns[i - 1] if has_prev else None
-        prev_prev_col = columns[i - 2] if has_prev_prev else None
-        next_next_col = columns[i + 2] if has_next_next else None
-
-        prev_prev_time = times[i - 2] if has_prev_prev else None
-        prev_time = times[i - 1] if has_prev else None
-        current_time = times[i]
-        next_time = times[i + 1] if has_next else None
-        next_next_time = times[i + 2] if has_next_next else None
-
-        time_diff_prev_prev = (prev_time - prev_prev_time) if prev_time is not None and prev_prev_time is not None else float("inf")
-        time_diff_prev_curr = (current_time - prev_time) if prev_time is not None else float("inf")
-        time_diff_curr_next = (next_time - current_time) if next_time is not None else float("inf")
-        time_diff_next_next = (next_next_time - next_time) if next_next_time is not None and next_time is not None else float("inf")
-
-        # Initialize triplet check variables
-        triplets = []
-        triplet_times = []
-
-        valid_triplet_columns = [(1, 2, 1), (2, 1, 2)]
-
-        # Check for valid alternating triplets and store their time sums
-        if has_prev_prev and (prev_prev_col, prev_col, current_col) in valid_triplet_columns:
-            triplets.append((i - 2, i - 1, i))
-            triplet_times.append(time_diff_prev_prev + time_diff_prev_curr)
-
-            if time_diff_prev_prev < max_diff_for_triplet_detection:
-                manip_penalty -= float(
-                    time_scores[i - 2] / 2 * (max_diff_for_triplet_detection - time_diff_prev_prev) / max_diff_for_triplet_detection
-                )
-            else:
-                manip_penalty -= float((time_diff_prev_prev - max_diff_for_triplet_detection) / max_diff_for_triplet_detection)
-
-        if has_prev and (prev_col, current_col, next_col) in valid_triplet_columns:
-            triplets.append((i - 1, i, i + 1))
-            triplet_times.append(time_diff_prev_curr + time_diff_curr_next)
-
-        if has_next_next and (current_col, next_col, next_next_col) in valid_triplet_columns:
-            triplets.append((i, i + 1, i + 2))
-            triplet_times.append(time_diff_curr_next + time_diff_next_next)
-
-            if time_diff_next_next < max_diff_for_triplet_detection:
-                manip_penalty -= float(
-                    time_scores[i + 2] / 2 * (max_diff_for_triplet_detection - time_diff_next_next) / max_diff_for_triplet_detection
-                )
-            else:
-                manip_penalty -= float((time_diff_next_next - max_diff_for_triplet_detection) / max_diff_for_triplet_detection)
-
-        manip_penalty = min(max(manip_penalty, 0), 1)
-
-        # Find the closest triplet by its time sum
-        if triplet_times:
-            closest_triplet_index = np.argmin(triplet_times)
-            closest_triplet = triplets[closest_triplet_index]
-            closest_triplet_time_sum = triplet_times[closest_triplet_index]
-
-            # Use penalty logic on the closest triplet
-            i1, i2, i3 = closest_triplet
-            avg_time_diff = closest_triplet_time_sum / 2
-
-            # Calculate the penalty based on how close the time differences are
-            ratio_to_alternation = min(int(times[i2] - times[i1]), int(times[i3] - times[i2])) / avg_time_diff
-            manip_penalty += (ratio_to_alternation - 0.5) * 2
-
-            # Consider surrounding inputs to reinforce or reduce the penalty
-            if i1 >= 2:  # Check input before the triplet (i2 - 2)
-                prev_prev_col = columns[i1 - 2]
-                prev_prev_time = times[i1 - 2]
-                time_diff_before_triplet = times[i1] - prev_prev_time
-
-                if (prev_prev_col, columns[i1]) in [(1, 2), (2, 1)]:
-                    avg_before_diff = (time_diff_before_triplet + time_diff_prev_prev) / 2
-                    if abs(avg_before_diff - avg_time_diff) < avg_time_diff * 0.2:  # Within 20% of avg_time_diff
-                        manip_penalty /= 1.2  # Reduce penalty if alternating pattern is consistent
-
-            if i3 + 2 < len(times):  # Check input after the triplet (i2 + 2)
-                next_next_col = columns[i3 + 2]
-                next_next_time = times[i3 + 2]
-                time_diff_after_triplet = next_next_time - times[i3]
-
-                if (columns[i3], next_next_col) in [(1, 2), (2, 1)]:
-                    avg_after_diff = (time_diff_next_next + time_diff_after_triplet) / 2
-                    if abs(avg_after_diff - avg_time_diff) < avg_time_diff * 0.2:  # Within 20% of avg_time_diff
-                        manip_penalty /= 1.2  # Reduce penalty if alternating pattern is consistent
-
-            # Ensure the manip_penalty stays between 0 and 1
-            manip_penalty = min(max(manip_penalty, 0), 1)
-
-        penalties[i] = manip_penalty
+    triplet_penalty = np.minimum(np.maximum(triplet_penalty, 0), 1)
 
+    penalties[candidate_indices] = np.where(has_any_triplet, triplet_penalty, manip_penalty)
     return penalties
 
 
@@ -306,7 +345,11 @@ def adjust_scores_with_nearby_max(
     return updated_scores, increments
 
 
-def adjust_consecutive_time_scores(time_scores: NDArray[np.float32]) -> NDArray[np.float32]:
+def adjust_consecutive_time_scores(time_scores: NDArray[np.float32], segments: NDArray[np.integer] | None = None) -> NDArray[np.float32]:
+    if len(time_scores) == 0:
+        # A hand without any hit
+        return time_scores
+
     # Create a boolean mask where the previous time score is higher than the current one
     mask_after = np.roll(time_scores, shift=1) > time_scores
     # Set the first element to False since there's no previous element to compare to
@@ -317,6 +360,12 @@ def adjust_consecutive_time_scores(time_scores: NDArray[np.float32]) -> NDArray[
     # Set the first element to False since there's no next element to compare to
     mask_before[len(time_scores) - 1] = False
 
+    # Neither is compared across segments
+    if segments is not None:
+        boundaries = segments[1:] != segments[:-1]
+        mask_after[1:][boundaries] = False
+        mask_before[:-1][boundaries] = False
+
     # Replace the time scores where either mask is True with 0.0
     time_scores[mask_after] = 0.0
     time_scores[mask_before] = 0.0
@@ -327,7 +376,15 @@ def adjust_consecutive_time_scores(time_scores: NDArray[np.float32]) -> NDArray[
 def get_manip_jumps_on_hand(
     data: NDArray[np.int32],
     threshold: int = 100,
+    midpoint: float = 55.0,
+    steepness: float = 0.1,
+    max_diff_for_triplet_detection: int = 150,
+    segments: NDArray[np.integer] | None = None,
 ) -> NDArray[np.int32 | np.int8]:
+    """Score how likely each hit is to be manipped together with the next one, as [ms, finger, score] rows.
+
+    `segments` splits the hits into contiguous runs, such as the hands of a batch of charts, scored on their own.
+    """
     times = data[:, 0].astype(np.int32)
     columns = data[:, 1].astype(np.int8)
 
@@ -335,9 +392,11 @@ def get_manip_jumps_on_hand(
 
     column_pair_mask = ((columns[:-1] == 1) & (columns[1:] == 2)) | ((columns[:-1] == 2) & (columns[1:] == 1))
     valid_candidates_mask = (time_diffs <= threshold) & column_pair_mask
+    if segments is not None:
+        valid_candidates_mask &= segments[1:] == segments[:-1]
     candidate_indices = np.where(valid_candidates_mask)[0]
 
-    raw_time_scores = compute_time_score(time_diffs[candidate_indices].astype(np.float32))
+    raw_time_scores = compute_time_score(time_diffs[candidate_indices].astype(np.float32), midpoint, steepness)
     clipped_time_scores = np.clip(raw_time_scores, 0.0, 1.0)
 
     time_scores = np.zeros(len(data), dtype=np.float32)
@@ -346,9 +405,11 @@ def get_manip_jumps_on_hand(
     type3_indices = np.where(columns == 3)[0]
     time_scores[type3_indices] = 0
 
-    time_scores = adjust_consecutive_time_scores(time_scores)
+    time_scores = adjust_consecutive_time_scores(time_scores, segments)
 
-    alternating_penalties = compute_alternating_penalties(candidate_indices, times, columns, time_scores)
+    alternating_penalties = compute_alternating_penalties(
+        candidate_indices, times, columns, time_scores, max_diff_for_triplet_detection, segments=segments
+    )
 
     # Subtract weighted alternating scores from time scores
     final_scores = time_scores - (alternating_penalties * time_scores)
@@ -362,123 +423,105 @@ def get_manip_jumps_on_hand(
     return data_with_scores
 
 
-def compute_manip_corrected_hits(hits: list[ChartHit]) -> list[ManipCorrectedHit]:
-    all_corrected: list[ManipCorrectedHit] = []
+def hit_segments(hits: HitTable) -> NDArray[np.int64]:
+    """The run of hits each hit is scored in: its hand, and its chart in a batch."""
+    if hits.chart is None:
+        return hits.hand.astype(np.int64)
+    return hits.chart.astype(np.int64) * 2 + hits.hand
 
-    for hand in [0, 1]:
-        hand_hits = [h for h in hits if h.hand == hand]
-        if not hand_hits:
-            continue
 
-        hand_hits.sort(key=lambda h: h.ms)
+def segment_order(segments: NDArray[np.integer], ms: NDArray[np.int32]) -> NDArray[np.intp]:
+    """Indices sorting by segment, then ms, keeping ties in order. One int64 key argsorts faster than `np.lexsort` on both."""
+    return np.argsort((segments.astype(np.int64) << 32) + ms, kind="stable")
 
-        ms = np.array([h.ms for h in hand_hits], dtype=np.int32)
-        raw_finger = np.array([h.finger for h in hand_hits], dtype=np.int8)
-        manip = np.array([h.manip for h in hand_hits], dtype=np.int8)
 
-        n = len(ms)
-        keep_mask = np.ones(n, dtype=bool)
+def compute_manip_corrected_hits(hits: HitTable, jump_manip_score: int = 50) -> HitTable:
+    """Merge each hit likely to be manipped with the next one into a jump. Hits come out grouped by chart and hand, then by ms."""
+    segments = hit_segments(hits)
+    order = segment_order(segments, hits.ms)
 
-        compress_mask = manip[:-1] > 50
-        compress_indices = np.where(compress_mask)[0]
+    ms = hits.ms[order].astype(np.int32)
+    raw_finger = hits.finger[order].astype(np.int8)
+    manip = hits.manip[order].astype(np.int8)
+    segments = segments[order]
 
-        # Compute values for compressed pairs
-        compressed_ms = (ms[compress_indices] + ms[compress_indices + 1]) // 2
-        compressed_overlap = np.clip(
-            np.minimum(ms[compress_indices] + 50, ms[compress_indices + 1] + 50)
-            - np.maximum(ms[compress_indices] - 50, ms[compress_indices + 1] - 50),
-            0,
-            100,
-        )
+    n = len(ms)
+    keep_mask = np.ones(n, dtype=bool)
 
-        # Prepare full arrays
-        final_ms = ms.copy()
-        final_precision = np.full(n, 100, dtype=np.int32)
-        final_finger = np.where(raw_finger >= 2, 3, raw_finger + 1)
-
-        # Apply compressed values to the compressed positions
-        final_ms[compress_indices] = compressed_ms
-        final_precision[compress_indices] = compressed_overlap
-        final_finger[compress_indices] = 3
-
-        # Skip the second hit in each compressed pair
-        keep_mask[compress_indices + 1] = False
-
-        # Filter to kept hits
-        kept_indices = np.where(keep_mask)[0]
-        kept_ms = final_ms[kept_indices]
-        kept_precision = final_precision[kept_indices]
-        kept_finger = final_finger[kept_indices]
-
-        # Compute gaps
-        gaps = np.empty_like(kept_ms)
-        gaps[0] = kept_ms[0]
-        gaps[1:] = kept_ms[1:] - kept_ms[:-1]
-
-        corrected = [
-            ManipCorrectedHit(
-                hand=hand,
-                finger=int(kept_finger[i]),
-                ms=int(kept_ms[i]),
-                gap=int(gaps[i]),
-                precision=int(kept_precision[i]),
-            )
-            for i in range(len(kept_ms))
-        ]
-
-        all_corrected.extend(corrected)
-
-    return all_corrected
-
-
-def compute_hit_transitions(hits: list[ManipCorrectedHit]) -> list[ManipCorrectedHitWithTransition]:
-    if not hits:
-        return []
-
-    # Split and sort by hand
-    hands = np.array([h.hand for h in hits])
-    fingers = np.array([h.finger for h in hits])
-    ms = np.array([h.ms for h in hits])
-    gaps = np.array([h.gap for h in hits])
-    precisions = np.array([h.precision for h in hits])
-
-    result_transitions = np.full(len(hits), -1, dtype=int)
-
-    for hand in [0, 1]:
-        mask = hands == hand
-        indices = np.where(mask)[0]
-        if len(indices) < 2:
-            continue
+    # Only a hit followed by one on the same hand of the same chart can be merged
+    compress_mask = (manip[:-1] > jump_manip_score) & (segments[:-1] == segments[1:])
+    compress_indices = np.where(compress_mask)[0]
 
-        # Sort hand-specific hits by time
-        sorted_idx = indices[np.argsort(ms[indices])]
-        f = fingers[sorted_idx]
-
-        # Shift arrays
-        f1 = f[:-1]
-        f2 = f[1:]
-        transitions = np.full(len(f1), -1, dtype=int)
-
-        # Apply rules
-        transitions[(f1 != 3) & (f2 != 3) & (f1 != f2)] = 0  # trill
-        transitions[(f1 != 3) & (f2 != 3) & (f1 == f2)] = 1  # jack
-        transitions[(f1 == 3) & (f2 != 3)] = 2  # jump to single
-        transitions[(f1 != 3) & (f2 == 3)] = 3  # single to jump
-        transitions[(f1 == 3) & (f2 == 3)] = 4  # jumpstream
-
-        result_transitions[sorted_idx[:-1]] = transitions
-
-    # Pack result
-    result = [
-        ManipCorrectedHitWithTransition(
-            hand=int(hands[i]),
-            finger=int(fingers[i]),
-            ms=int(ms[i]),
-            gap=int(gaps[i]),
-            precision=int(precisions[i]),
-            transition=int(result_transitions[i]),
-        )
-        for i in range(len(hits))
-    ]
+    # Compute values for compressed pairs
+    compressed_ms = (ms[compress_indices] + ms[compress_indices + 1]) // 2
+    compressed_overlap = np.clip(
+        np.minimum(ms[compress_indices] + 50, ms[compress_indices + 1] + 50)
+        - np.maximum(ms[compress_indices] - 50, ms[compress_indices + 1] - 50),
+        0,
+        100,
+    )
+
+    # Prepare full arrays
+    final_ms = ms.copy()
+    final_precision = np.full(n, 100, dtype=np.int32)
+    final_finger = np.where(raw_finger >= 2, 3, raw_finger + 1)
+
+    # Apply compressed values to the compressed positions
+    final_ms[compress_indices] = compressed_ms
+    final_precision[compress_indices] = compressed_overlap
+    final_finger[compress_indices] = 3
+
+    # Skip the second hit in each compressed pair
+    keep_mask[compress_indices + 1] = False
+
+    # Filter to kept hits
+    kept_ms = final_ms[keep_mask]
+    kept_segments = segments[keep_mask]
+
+    # Compute gaps, from 0 for the first hit of each hand
+    kept_gaps = np.empty_like(kept_ms)
+    kept_gaps[1:] = kept_ms[1:] - kept_ms[:-1]
+    is_start, _ = _segment_ends(kept_segments)
+    kept_gaps[is_start] = kept_ms[is_start]
+
+    kept = order[keep_mask]
+    return HitTable(
+        hand=hits.hand[kept].astype(np.int8),
+        finger=final_finger[keep_mask].astype(np.int8),
+        ms=kept_ms,
+        gap=kept_gaps,
+        precision=final_precision[keep_mask],
+        chart=None if hits.chart is None else hits.chart[kept],
+    )
+
+
+def compute_hit_transitions(hits: HitTable) -> HitTable:
+    """Add the transition of each hit to the next one on the same hand, -1 on the last one."""
+    result_transitions = np.full(len(hits), -1, dtype=np.int8)
+    if len(hits) < 2:
+        return structs.replace(hits, transition=result_transitions)
+
+    # Sort hits by hand, then time
+    segments = hit_segments(hits)
+    sorted_idx = segment_order(segments, hits.ms)
+    f = hits.finger[sorted_idx]
+
+    # Shift arrays
+    f1 = f[:-1]
+    f2 = f[1:]
+    transitions = np.full(len(f1), -1, dtype=np.int8)
+
+    # Apply rules
+    transitions[(f1 != 3) & (f2 != 3) & (f1 != f2)] = 0  # trill
+    transitions[(f1 != 3) & (f2 != 3) & (f1 == f2)] = 1  # jack
+    transitions[(f1 == 3) & (f2 != 3)] = 2  # jump to single
+    transitions[(f1 != 3) & (f2 == 3)] = 3  # single to jump
+    transitions[(f1 == 3) & (f2 == 3)] = 4  # jumpstream
+
+    # The last hit of each hand has no next one
+    sorted_segments = segments[sorted_idx]
+    transitions[sorted_segments[:-1] != sorted_segments[1:]] = -1
+
+    result_transitions[sorted_idx[:-1]] = transitions
 
-    return result
+    return structs.replace(hits, transition=result_transitions)
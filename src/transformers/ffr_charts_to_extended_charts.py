@@ -0,0 +1,129 @@
+import itertools
+from typing import Iterable, Iterator, Sequence
+
+import numpy as np
+from msgspec import structs
+
+from models.charts.extended_chart import ChartHit, ExtendedChart, ManipCorrectedHitWithTransition
+from models.charts.extension_params import DEFAULT_EXTENSION_PARAMS, ExtensionParams
+from models.charts.hit_table import HitTable
+from models.responses.chart_response import ChartResponse
+from transformers.ffr_chart_to_extended_chart import (
+    _NOTE_DIR,
+    _NOTE_FIELDS,
+    _NOTE_MS,
+    compute_hit_transitions,
+    compute_manip_corrected_hits,
+    extended_chart_info,
+    get_manip_jumps_on_hand,
+    iterative_smoothing_projection,
+    segment_order,
+)
+from utils.versioning import EXTENDED_CHART_VERSION
+
+DEFAULT_BATCH_NOTES = 1_000_000
+
+
+def extend_ffr_charts(ffr_charts: Sequence[ChartResponse], params: ExtensionParams = DEFAULT_EXTENSION_PARAMS) -> list[ExtendedChart]:
+    """`extend_ffr_chart` for many charts in one pass over all their notes, with the same result for each chart."""
+    hits, extended_hits = extend_hit_tables(ffr_charts, params)
+
+    return [
+        ExtendedChart(
+            extended_chart_info(ffr_chart),
+            ffr_chart.chart,
+            chart_hits.rows(ChartHit),
+            chart_extended_hits.rows(ManipCorrectedHitWithTransition),
+            EXTENDED_CHART_VERSION,
+        )
+        for ffr_chart, chart_hits, chart_extended_hits in zip(ffr_charts, hits, extended_hits)
+    ]
+
+
+def extend_hit_tables(
+    ffr_charts: Sequence[ChartResponse], params: ExtensionParams = DEFAULT_EXTENSION_PARAMS
+) -> tuple[list[HitTable], list[HitTable]]:
+    """The hits and the manip corrected hits with transitions of each chart, as views into the batch's tables."""
+    hits = compute_batch_hits(ffr_charts, params)
+    extended_hits = compute_hit_transitions(compute_manip_corrected_hits(hits, params.jump_manip_score))
+
+    return _chart_views(hits, len(ffr_charts)), _chart_views(extended_hits, len(ffr_charts))
+
+
+def compute_batch_hits(ffr_charts: Sequence[ChartResponse], params: ExtensionParams = DEFAULT_EXTENSION_PARAMS) -> HitTable:
+    """`compute_hits` for every chart at once. Each hit's chart is in the `chart` column, and each chart's hits are contiguous.
+
+    All notes go into one array, and each hand of each chart is a segment the stages never look across.
+    """
+    note_counts = np.array([len(ffr_chart.chart) for ffr_chart in ffr_charts], dtype=np.int64)
+    flat = itertools.chain.from_iterable(map(structs.astuple, itertools.chain.from_iterable(ffr_chart.chart for ffr_chart in ffr_charts)))
+    notes = np.fromiter(flat, dtype=np.int32, count=int(note_counts.sum()) * len(_NOTE_FIELDS)).reshape(-1, len(_NOTE_FIELDS))
+
+    # Segment 2 * chart for the left hand, 2 * chart + 1 for the right one
+    dirs = notes[:, _NOTE_DIR]
+    note_segments = np.repeat(np.arange(len(ffr_charts), dtype=np.int64), note_counts) * 2 + (dirs > 1)
+    fingers = dirs % 2 + 1
+    ms = notes[:, _NOTE_MS]
+
+    # Merge the notes of each segment hitting on the same ms into one hit
+    order = segment_order(note_segments, ms)
+    ms, fingers, note_segments = ms[order], fingers[order], note_segments[order]
+    is_new_hit = np.ones(len(ms), dtype=bool)
+    is_new_hit[1:] = (ms[1:] != ms[:-1]) | (note_segments[1:] != note_segments[:-1])
+    starts = np.flatnonzero(is_new_hit)
+
+    hit_ms = ms[starts]
+    hit_fingers = np.add.reduceat(fingers, starts) if len(starts) else fingers
+    segments = note_segments[starts]
+
+    # Get the manip score and spread of each hit
+    manip_args = (params.manip_threshold_ms, params.logistic_midpoint, params.logistic_steepness, params.triplet_window_ms)
+    hits_with_manip = get_manip_jumps_on_hand(np.column_stack((hit_ms, hit_fingers)), *manip_args, segments=segments)
+    spread = iterative_smoothing_projection(hit_ms, params.smoothing_window, params.smoothing_iterations, segments=segments)
+
+    gaps = np.empty_like(hit_ms)
+    gaps[1:] = hit_ms[1:] - hit_ms[:-1]
+    is_first = np.ones(len(hit_ms), dtype=bool)
+    is_first[1:] = segments[1:] != segments[:-1]
+    gaps[is_first] = hit_ms[is_first]
+
+    # Sort each chart's hits by time, argsorting its float64 ms like `compute_hits` so ties keep their order
+    charts = segments // 2
+    bounds = np.searchsorted(charts, np.arange(len(ffr_charts) + 1))
+    chart_orders = [start + hit_ms[start:stop].astype(np.float64).argsort() for start, stop in itertools.pairwise(bounds.tolist())]
+    order = np.concatenate(chart_orders) if chart_orders else np.empty(0, dtype=np.intp)
+
+    return HitTable(
+        hand=(segments % 2).astype(np.int8)[order],
+        finger=hit_fingers.astype(np.int8)[order],
+        ms=hit_ms[order],
+        gap=gaps[order],
+        manip=hits_with_manip[:, 2].astype(np.int8)[order],
+        spread_ms=spread.astype(np.int32)[order],
+        chart=charts.astype(np.int32)[order],
+    )
+
+
+def _chart_views(hits: HitTable, chart_count: int) -> list[HitTable]:
+    bounds = np.searchsorted(hits.chart, np.arange(chart_count + 1)).tolist()
+    return [structs.replace(hits.view(start, stop), chart=None) for start, stop in itertools.pairwise(bounds)]
+
+
+def batch_charts(ffr_charts: Iterable[ChartResponse], max_notes: int = DEFAULT_BATCH_NOTES) -> Iterator[list[ChartResponse]]:
+    """Group charts into batches of at most `max_notes` notes, which bounds the memory one `extend_ffr_charts` call takes.
+
+    A chart with more notes than that is a batch of its own.
+    """
+    batch: list[ChartResponse] = []
+    batch_notes = 0
+
+    for ffr_chart in ffr_charts:
+        if batch and batch_notes + len(ffr_chart.chart) > max_notes:
+            yield batch
+            batch, batch_notes = [], 0
+
+        batch.append(ffr_chart)
+        batch_notes += len(ffr_chart.chart)
+
+    if batch:
+        yield batch
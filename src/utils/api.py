@@ -1,15 +1,110 @@
+from requests import Response
+from requests.adapters import HTTPAdapter
+
+from utils.transport import HttpTransport, RateLimiter, TransportOptions, build_session
+
 _API_URL = "https://www.flashflashrevolution.com/api/api.php"
 _API_KEY = ""
 
+_DEFAULT_POOL_SIZE = 10
+
+_CLIENT: "FfrClient | None" = None
+_POOL_SIZE = _DEFAULT_POOL_SIZE
+_TRANSPORT_OPTIONS = TransportOptions()
+_RATE_LIMITER: RateLimiter | None = None
+
+
+class FfrClient:
+    """Keep-alive client for the FFR API, owning a pooled `requests.Session`."""
+
+    def __init__(
+        self,
+        key: str,
+        base_url: str | None = None,
+        pool_size: int = _DEFAULT_POOL_SIZE,
+        options: TransportOptions | None = None,
+        rate_limiter: RateLimiter | None = None,
+    ):
+        self.key = key
+        self.base_url = base_url or _API_URL
+        self.pool_size = pool_size
+
+        options = options or TransportOptions()
+        self.session = build_session(options)
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+        self.transport = HttpTransport(self.session, options, rate_limiter)
+
+    def get(self, action: str, query_params: str | None = None) -> Response:
+        query_params_part = f"&{query_params}" if query_params else ""
+        return self.transport.request("GET", f"{self.base_url}?key={self.key}&action={action}{query_params_part}")
+
+    def init_args(self):
+        """Arguments to recreate an equivalent client in another process through `init_client`."""
+        return (self.key, self.base_url, self.pool_size, self.transport.options, self.transport.rate_limiter)
+
+    def close(self):
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_exc):
+        self.close()
+
 
 def set_api_key(key: str):
     global _API_KEY
     _API_KEY = key
 
 
+def set_api_url(url: str):
+    global _API_URL
+    _API_URL = url
+
+
+def configure_client(pool_size: int, options: TransportOptions, rate_limit: float):
+    """Set the pool size, transport options and request rate (per second, 0 for none) of the default client."""
+    global _POOL_SIZE, _TRANSPORT_OPTIONS, _RATE_LIMITER
+    _POOL_SIZE = pool_size
+    _TRANSPORT_OPTIONS = options
+    _RATE_LIMITER = RateLimiter(rate_limit) if rate_limit > 0 else None
+
+
 def api_key():
     return _API_KEY
 
 
 def api_url():
     return _API_URL
+
+
+def transport_options():
+    return _TRANSPORT_OPTIONS
+
+
+def init_client(
+    key: str,
+    base_url: str | None = None,
+    pool_size: int = _DEFAULT_POOL_SIZE,
+    options: TransportOptions | None = None,
+    rate_limiter: RateLimiter | None = None,
+):
+    """Create the process-wide client. Used as the `mp.Pool` initializer so each worker builds its session once."""
+    global _CLIENT, _POOL_SIZE, _TRANSPORT_OPTIONS, _RATE_LIMITER
+    set_api_key(key)
+    set_api_url(base_url or _API_URL)
+    _POOL_SIZE = pool_size
+    _TRANSPORT_OPTIONS = options or TransportOptions()
+    _RATE_LIMITER = rate_limiter
+    _CLIENT = FfrClient(key, _API_URL, pool_size, _TRANSPORT_OPTIONS, rate_limiter)
+
+
+def default_client() -> FfrClient:
+    """Return the process-wide client, creating it from the current key if needed."""
+    global _CLIENT
+    if _CLIENT is None or _CLIENT.key != _API_KEY or _CLIENT.base_url != _API_URL:
+        _CLIENT = FfrClient(_API_KEY, _API_URL, _POOL_SIZE, _TRANSPORT_OPTIONS, _RATE_LIMITER)
+    return _CLIENT
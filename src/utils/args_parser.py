@@ -6,16 +6,85 @@ from models.api.api_action_args import (
     AllChartArgs,
     AllLevelScoresArgs,
     BlackBoxCalcArgs,
+    CatalogQueryArgs,
+    CatalogUpdateArgs,
     ChartArgs,
+    ExtendChartsArgs,
     LevelScoresArgs,
+    MockServerArgs,
+    PackChartsArgs,
     SongListArgs,
+    SyncChartsArgs,
     ViewerArgs,
 )
+from models.api.catalog_command import CatalogCommand
+from models.api.chart_format import ChartFormat
+from models.api.crawl_engine import CrawlEngine
+from utils.io import DEFAULT_CODEC, available_codecs, parse_codec
+from utils.transport import TransportMode, TransportOptions
 
 
-def parse_args(key_setter: Callable[[str], None]):
+def _add_engine_arguments(parser: argparse.ArgumentParser):
+    engines = [engine.value for engine in CrawlEngine]
+    parser.add_argument("-engine", "--G", type=str, help="Crawl engine", choices=engines, default=CrawlEngine.PROCESS.value)
+    parser.add_argument("-concurrency", "--W", type=int, help="Concurrent requests for the async engine", default=32)
+
+
+def _add_format_argument(parser: argparse.ArgumentParser):
+    formats = [chart_format.value for chart_format in ChartFormat]
+    parser.add_argument("-format", "--O", type=str, help="On-disk chart format", choices=formats, default=ChartFormat.JSON.value)
+
+
+def _codec_spec(spec: str) -> str:
+    try:
+        parse_codec(spec)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+    return spec
+
+
+def _add_codec_argument(parser: argparse.ArgumentParser):
+    codecs = ", ".join(available_codecs())
+    parser.add_argument("-codec", "--Z", type=_codec_spec, help=f"Compression codec[:level] ({codecs})", default=DEFAULT_CODEC)
+
+
+def _add_write_queue_argument(parser: argparse.ArgumentParser):
+    parser.add_argument("-writequeue", "--B", type=int, help="Pending background writes per process worker, 0 to write inline", default=32)
+
+
+def _add_resume_argument(parser: argparse.ArgumentParser):
+    parser.add_argument(
+        "-resume", "--R", type=bool, help="Skip levels the crawl journal marks done", default=False, action=argparse.BooleanOptionalAction
+    )
+
+
+def parse_args(
+    key_setter: Callable[[str], None],
+    client_configurer: Callable[[int, TransportOptions, float], None] | None = None,
+    url_setter: Callable[[str], None] | None = None,
+    cache_configurer: Callable[[str | None, int, float], None] | None = None,
+):
     parser = argparse.ArgumentParser(description="Args for API experiments.")
     parser.add_argument("apikey", type=str, nargs=argparse.OPTIONAL, help="Your API key", default=None)
+    parser.add_argument("-poolsize", "--pool", type=int, help="Keep-alive connections per HTTP client", default=10)
+    parser.add_argument("-ratelimit", "--rate", type=float, help="Starting API requests per second across all workers, 0 for no limit", default=0.0)
+    parser.add_argument("-timeout", "--timeout", type=float, help="Read timeout of API requests in seconds", default=30.0)
+    parser.add_argument("-retries", "--retries", type=int, help="Retries on timeouts, 429 and 5xx responses", default=5)
+    parser.add_argument("-apiurl", "--url", type=str, help="FFR API URL, e.g. a local mock server", default=None)
+    parser.add_argument(
+        "-transport",
+        "--transport",
+        type=str,
+        help="Send requests live, record the responses or replay them",
+        choices=[mode.value for mode in TransportMode],
+        default=TransportMode.LIVE.value,
+    )
+    parser.add_argument("-cassette", "--cassette", type=str, help="Cassette directory for record and replay", default="cassettes")
+    parser.add_argument("-replaylatency", "--replaylatency", type=float, help="Injected latency of replayed responses in ms", default=0.0)
+    parser.add_argument("-replayerrors", "--replayerrors", type=float, help="Share of replayed requests that fail with a 503", default=0.0)
+    parser.add_argument("-extcache", "--extcache", type=str, help="Extended chart cache directory, empty to disable", default=None)
+    parser.add_argument("-extcachesize", "--extcachesize", type=int, help="Max size of the extended chart cache in MiB", default=512)
+    parser.add_argument("-extcacheage", "--extcacheage", type=float, help="Days an unused extended chart stays cached", default=30.0)
 
     # Add subparsers
 
@@ -27,9 +96,11 @@ def parse_args(key_setter: Callable[[str], None]):
     parser_chart.add_argument("-level", "--L", type=int, help="The level from which to pull chart info", default=1)
     parser_chart.add_argument("-comp", "--C", type=bool, help="Compress output file", default=False, action=argparse.BooleanOptionalAction)
     parser_chart.add_argument("-extended", "--X", type=bool, help="Extended chart data", default=False, action=argparse.BooleanOptionalAction)
+    _add_format_argument(parser_chart)
+    _add_codec_argument(parser_chart)
 
     parser_chart_group = parser_chart.add_mutually_exclusive_group()
-    parser_chart_group.add_argument("-todir", "--T", type=str, help="Directory to save the data to", nargs=argparse.OPTIONAL)
+    parser_chart_group.add_argument("-todir", "--T", type=str, help="Directory or .ffra archive to save to", nargs=argparse.OPTIONAL)
     parser_chart_group.add_argument("-fromfile", "--F", type=str, help="File to load the data from", nargs=argparse.OPTIONAL)
 
     parser_all_charts = subparsers.add_parser(ApiAction.ALL_CHARTS.value, help="All charts parameters")
@@ -37,10 +108,60 @@ def parse_args(key_setter: Callable[[str], None]):
     parser_all_charts.add_argument("-endid", "--E", type=int, help="The song id to end before", default=10000)
     parser_all_charts.add_argument("-comp", "--C", type=bool, help="Compress output files", default=False, action=argparse.BooleanOptionalAction)
     parser_all_charts.add_argument("-extended", "--X", type=bool, help="Extended chart data", default=False, action=argparse.BooleanOptionalAction)
+    _add_format_argument(parser_all_charts)
+    _add_codec_argument(parser_all_charts)
+    _add_engine_arguments(parser_all_charts)
+    _add_resume_argument(parser_all_charts)
+    parser_all_charts.add_argument("-chunksize", "--K", type=int, help="Levels handed to a process worker at a time", default=4)
+    parser_all_charts.add_argument("-extbatch", "--N", type=int, help="Most notes extended in one batch", default=1_000_000)
+    _add_write_queue_argument(parser_all_charts)
 
     parser_all_charts_group = parser_all_charts.add_mutually_exclusive_group()
-    parser_all_charts_group.add_argument("-todir", "--T", type=str, help="Directory to save the data to", nargs=argparse.OPTIONAL)
-    parser_all_charts_group.add_argument("-fromdir", "--F", type=str, help="Directory to load the data from", nargs=argparse.OPTIONAL)
+    parser_all_charts_group.add_argument("-todir", "--T", type=str, help="Directory or .ffra archive to save to", nargs=argparse.OPTIONAL)
+    parser_all_charts_group.add_argument("-fromdir", "--F", type=str, help="Directory or .ffra archive to load from", nargs=argparse.OPTIONAL)
+
+    parser_sync_charts = subparsers.add_parser(ApiAction.SYNC_CHARTS.value, help="Download only new or changed charts")
+    parser_sync_charts.add_argument("-todir", "--T", type=str, help="Directory holding the synced charts", required=True)
+    parser_sync_charts.add_argument("-comp", "--C", type=bool, help="Compress output files", default=False, action=argparse.BooleanOptionalAction)
+    parser_sync_charts.add_argument("-extended", "--X", type=bool, help="Extended chart data", default=False, action=argparse.BooleanOptionalAction)
+    _add_format_argument(parser_sync_charts)
+    _add_codec_argument(parser_sync_charts)
+    _add_engine_arguments(parser_sync_charts)
+    _add_write_queue_argument(parser_sync_charts)
+
+    parser_pack_charts = subparsers.add_parser(ApiAction.PACK_CHARTS.value, help="Pack a chart directory into a single-file archive")
+    parser_pack_charts.add_argument("-fromdir", "--F", type=str, help="Chart directory to pack, in any layout", required=True)
+    parser_pack_charts.add_argument("-archive", "--A", type=str, help="Archive file (.ffra) to create or append to", required=True)
+    parser_pack_charts.add_argument("-comp", "--C", type=bool, help="Compress each record", default=False, action=argparse.BooleanOptionalAction)
+    _add_codec_argument(parser_pack_charts)
+
+    parser_extend_charts = subparsers.add_parser(ApiAction.EXTEND_CHARTS.value, help="Extend stored raw charts again, offline")
+    parser_extend_charts.add_argument("-fromdir", "--F", type=str, help="Chart directory or .ffra archive holding the raw charts", required=True)
+    parser_extend_charts.add_argument("-todir", "--T", type=str, help="Directory or .ffra archive to save to, the source by default", default="")
+    parser_extend_charts.add_argument("-comp", "--C", type=bool, help="Compress output files", default=False, action=argparse.BooleanOptionalAction)
+    _add_format_argument(parser_extend_charts)
+    _add_codec_argument(parser_extend_charts)
+    parser_extend_charts.add_argument("-batchnotes", "--N", type=int, help="Max notes extended in one batch", default=1_000_000)
+
+    parser_catalog = subparsers.add_parser(ApiAction.CATALOG.value, help="Local index of chart metadata and stats")
+    catalog_commands = parser_catalog.add_subparsers(dest="command", help="Catalog command", required=True)
+
+    parser_catalog_update = catalog_commands.add_parser(CatalogCommand.UPDATE.value, help="Index new and changed charts")
+    parser_catalog_update.add_argument("-fromdir", "--F", type=str, help="Chart directory or .ffra archive to index", default="data")
+    parser_catalog_update.add_argument("-catalog", "--A", type=str, help="Catalog file, next to the charts by default", default="")
+    parser_catalog_update.add_argument(
+        "-songlist", "--S", type=bool, help="Refresh metadata from the song list", default=True, action=argparse.BooleanOptionalAction
+    )
+
+    parser_catalog_query = catalog_commands.add_parser(CatalogCommand.QUERY.value, help="Filter and sort indexed charts")
+    parser_catalog_query.add_argument("-fromdir", "--F", type=str, help="Chart directory or .ffra archive to index", default="data")
+    parser_catalog_query.add_argument("-catalog", "--A", type=str, help="Catalog file, next to the charts by default", default="")
+    parser_catalog_query.add_argument(
+        "-where", "--W", type=str, help='Filter such as "note_count>=1500", "difficulty=80..90" or "name~text"', action="append", default=[]
+    )
+    parser_catalog_query.add_argument("-sort", "--O", type=str, help="Field to sort on", default="id")
+    parser_catalog_query.add_argument("-desc", "--D", type=bool, help="Sort descending", default=False, action=argparse.BooleanOptionalAction)
+    parser_catalog_query.add_argument("-limit", "--L", type=int, help="Max charts to list, 0 for all", default=0)
 
     parser_level_scores = subparsers.add_parser(ApiAction.LEVEL_SCORES.value, help="Level scores parameters")
     parser_level_scores.add_argument("-level", "--L", type=int, help="The level from which to pull scores", default=1)
@@ -56,8 +177,24 @@ def parse_args(key_setter: Callable[[str], None]):
     parser_all_level_scores.add_argument(
         "-comp", "--C", type=bool, help="Compress output files", default=False, action=argparse.BooleanOptionalAction
     )
+    _add_codec_argument(parser_all_level_scores)
+    _add_engine_arguments(parser_all_level_scores)
+    _add_resume_argument(parser_all_level_scores)
+    parser_all_level_scores.add_argument("-pageconcurrency", "--Q", type=int, help="Concurrent page requests per level", default=8)
+    _add_write_queue_argument(parser_all_level_scores)
+
+    parser_black_box_calc = subparsers.add_parser(ApiAction.BLACK_BOX_CALC_RESULTS.value, help="All level estimated diff from black box calc")
+    parser_black_box_calc.add_argument("-datadir", "--D", type=str, help="Directory holding the charts and estimates", default="data")
+    parser_black_box_calc.add_argument("-comp", "--C", type=bool, help="Compressed charts", default=True, action=argparse.BooleanOptionalAction)
+    parser_black_box_calc.add_argument("-workers", "--W", type=int, help="Concurrent estimate requests", default=8)
+    parser_black_box_calc.add_argument("-estimatorurl", "--U", type=str, help="Autodifficulty endpoint, e.g. a local mock server", default="")
+    parser_black_box_calc.add_argument("-mindifficulty", "--N", type=int, help="Only estimate charts of at least this difficulty", default=0)
 
-    _parser_black_box_calc = subparsers.add_parser(ApiAction.BLACK_BOX_CALC_RESULTS.value, help="All level estimated diff from black box calc")
+    parser_mock_server = subparsers.add_parser(ApiAction.MOCK_SERVER.value, help="Local mock API for offline benchmarking")
+    parser_mock_server.add_argument("-port", "--P", type=int, help="Port to listen on", default=8000)
+    parser_mock_server.add_argument("-cassette", "--D", type=str, help="Serve this cassette instead of synthetic data", default="")
+    parser_mock_server.add_argument("-latency", "--L", type=float, help="Injected latency per request in ms", default=0.0)
+    parser_mock_server.add_argument("-errorrate", "--E", type=float, help="Share of requests that fail with a 503", default=0.0)
 
     parsed_args = parser.parse_args()
 
@@ -66,9 +203,29 @@ def parse_args(key_setter: Callable[[str], None]):
     api_key: str = parsed_args.apikey
     key_setter(api_key)
 
+    if client_configurer:
+        options = TransportOptions(
+            read_timeout=parsed_args.timeout,
+            max_retries=parsed_args.retries,
+            mode=parsed_args.transport,
+            cassette_dir=parsed_args.cassette,
+            replay_latency_ms=parsed_args.replaylatency,
+            replay_error_rate=parsed_args.replayerrors,
+        )
+        client_configurer(parsed_args.pool, options, parsed_args.rate)
+
+    if url_setter and parsed_args.url:
+        url_setter(parsed_args.url)
+
+    if cache_configurer:
+        cache_configurer(parsed_args.extcache, parsed_args.extcachesize << 20, parsed_args.extcacheage)
+
     action: str = parsed_args.action
 
-    if action != ApiAction.VIEWER.value and not api_key:
+    # Catalog queries and updates without the song list stay offline
+    offline = action == ApiAction.CATALOG.value and (parsed_args.command == CatalogCommand.QUERY.value or not parsed_args.S)
+
+    if action not in (ApiAction.VIEWER.value, ApiAction.MOCK_SERVER.value, ApiAction.EXTEND_CHARTS.value) and not offline and not api_key:
         raise ValueError(f"API key is required for the {action} action.")
 
     # Create typed args object
@@ -87,6 +244,8 @@ def parse_args(key_setter: Callable[[str], None]):
                 extended=parsed_args.X,
                 to_dir=parsed_args.T,
                 from_file=parsed_args.F,
+                format=parsed_args.O,
+                codec=parsed_args.Z,
             )
 
         case ApiAction.ALL_CHARTS.value:
@@ -96,7 +255,62 @@ def parse_args(key_setter: Callable[[str], None]):
                 compressed=parsed_args.C,
                 extended=parsed_args.X,
                 to_dir=parsed_args.T,
-                from_file=parsed_args.F,
+                from_dir=parsed_args.F,
+                format=parsed_args.O,
+                codec=parsed_args.Z,
+                engine=parsed_args.G,
+                concurrency=parsed_args.W,
+                resume=parsed_args.R,
+                chunksize=parsed_args.K,
+                write_queue=parsed_args.B,
+                extend_batch_notes=parsed_args.N,
+            )
+
+        case ApiAction.SYNC_CHARTS.value:
+            return SyncChartsArgs(
+                to_dir=parsed_args.T,
+                compressed=parsed_args.C,
+                extended=parsed_args.X,
+                format=parsed_args.O,
+                codec=parsed_args.Z,
+                engine=parsed_args.G,
+                concurrency=parsed_args.W,
+                write_queue=parsed_args.B,
+            )
+
+        case ApiAction.PACK_CHARTS.value:
+            return PackChartsArgs(
+                from_dir=parsed_args.F,
+                archive=parsed_args.A,
+                compressed=parsed_args.C,
+                codec=parsed_args.Z,
+            )
+
+        case ApiAction.EXTEND_CHARTS.value:
+            return ExtendChartsArgs(
+                from_dir=parsed_args.F,
+                to_dir=parsed_args.T,
+                compressed=parsed_args.C,
+                format=parsed_args.O,
+                codec=parsed_args.Z,
+                batch_notes=parsed_args.N,
+            )
+
+        case ApiAction.CATALOG.value if parsed_args.command == CatalogCommand.UPDATE.value:
+            return CatalogUpdateArgs(
+                from_dir=parsed_args.F,
+                catalog=parsed_args.A,
+                song_list=parsed_args.S,
+            )
+
+        case ApiAction.CATALOG.value:
+            return CatalogQueryArgs(
+                from_dir=parsed_args.F,
+                catalog=parsed_args.A,
+                where=parsed_args.W,
+                sort=parsed_args.O,
+                descending=parsed_args.D,
+                limit=parsed_args.L,
             )
 
         case ApiAction.LEVEL_SCORES.value:
@@ -112,10 +326,30 @@ def parse_args(key_setter: Callable[[str], None]):
                 parsed_args.S,
                 parsed_args.E,
                 parsed_args.C,
+                codec=parsed_args.Z,
+                engine=parsed_args.G,
+                concurrency=parsed_args.W,
+                resume=parsed_args.R,
+                page_concurrency=parsed_args.Q,
+                write_queue=parsed_args.B,
             )
 
         case ApiAction.BLACK_BOX_CALC_RESULTS.value:
-            return BlackBoxCalcArgs()
+            return BlackBoxCalcArgs(
+                data_dir=parsed_args.D,
+                compressed=parsed_args.C,
+                workers=parsed_args.W,
+                estimator_url=parsed_args.U,
+                min_difficulty=parsed_args.N,
+            )
+
+        case ApiAction.MOCK_SERVER.value:
+            return MockServerArgs(
+                port=parsed_args.P,
+                cassette_dir=parsed_args.D,
+                latency_ms=parsed_args.L,
+                error_rate=parsed_args.E,
+            )
 
         case _:
             raise Exception(f'Unsupported api action "{action}"')
@@ -0,0 +1,173 @@
+import mmap
+import os
+import struct
+import threading
+from pathlib import Path
+from typing import Iterable
+
+import numpy as np
+from msgspec import Struct
+from msgspec.json import decode, encode
+
+from models.charts.extended_chart import ExtendedChart
+from models.responses.chart_response import ChartResponse
+from utils.io import (
+    DEFAULT_CODEC,
+    BinaryChartHeader,
+    binary_chart_columns,
+    compress_bytes,
+    decode_binary_chart,
+    decompress_bytes,
+    encode_binary_chart,
+)
+
+CHART_ARCHIVE_EXT = ".ffra"
+CHART_ARCHIVE_FORMAT_VERSION = 1
+
+_ARCHIVE_MAGIC = b"FFRA"
+_INDEX_MAGIC = b"FFRI"
+_PREAMBLE = struct.Struct("<4sH2x")  # Magic, format version
+_TRAILER = struct.Struct("<QI4s")  # Index offset, index length, index magic
+
+
+class ArchiveEntry(Struct, array_like=True):
+    level: int
+    extended: bool
+    offset: int
+    length: int
+    compressed: bool  # The record went through `compress_bytes`, which names its codec.
+
+
+def is_chart_archive(path: str | Path | None) -> bool:
+    return bool(path) and Path(path).suffix == CHART_ARCHIVE_EXT
+
+
+class ChartArchive:
+    """Every chart of a catalog, raw and extended, packed in one memory-mapped file.
+
+    Each chart is a binary columnar record (see `utils.io.encode_binary_chart`). The offset index sits in a
+    footer at the end of the file, so a chart is read by slicing the map without touching any other record.
+    Appending writes new records and a new footer after the old one, so the archive stays valid until the
+    new footer is complete.
+    """
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path).with_suffix(CHART_ARCHIVE_EXT)
+        self.index: dict[tuple[int, bool], ArchiveEntry] = {}
+        self._mmap: mmap.mmap | None = None
+        self._size = 0
+
+        if self.path.exists():
+            self._open()
+
+    def _open(self):
+        with open(self.path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._size = len(self._mmap)
+
+        magic, format_version = _PREAMBLE.unpack_from(self._mmap)
+        if magic != _ARCHIVE_MAGIC:
+            raise ValueError(f"{self.path} is not a chart archive")
+        if format_version != CHART_ARCHIVE_FORMAT_VERSION:
+            raise ValueError(f"Unsupported chart archive format version {format_version} in {self.path}")
+
+        index_offset, index_length, index_magic = _TRAILER.unpack_from(self._mmap, self._size - _TRAILER.size)
+        if index_magic != _INDEX_MAGIC:
+            raise ValueError(f"{self.path} has no valid index, was a write interrupted?")
+
+        entries = decode(self._mmap[index_offset : index_offset + index_length], type=list[ArchiveEntry])
+        self.index = {(entry.level, entry.extended): entry for entry in entries}
+
+    def has(self, level_id: int, extended: bool) -> bool:
+        return (level_id, extended) in self.index
+
+    def level_ids(self, extended: bool) -> list[int]:
+        return sorted(level for level, is_extended in self.index if is_extended == extended)
+
+    def record(self, level_id: int, extended: bool) -> bytes | memoryview | None:
+        """A chart's encoded binary record, viewing the map directly when uncompressed."""
+        entry = self.index.get((level_id, extended))
+        if entry is None or self._mmap is None:
+            return None
+
+        record = memoryview(self._mmap)[entry.offset : entry.offset + entry.length]
+        return decompress_bytes(record) if entry.compressed else record
+
+    def read(self, level_id: int, extended: bool) -> ChartResponse | ExtendedChart | None:
+        record = self.record(level_id, extended)
+        return decode_binary_chart(record) if record is not None else None
+
+    def read_columns(self, level_id: int, extended: bool) -> tuple[BinaryChartHeader, dict[str, np.ndarray]] | None:
+        """A chart's columns as arrays viewing the map directly when uncompressed. Valid while the archive is open."""
+        record = self.record(level_id, extended)
+        return binary_chart_columns(record) if record is not None else None
+
+    def append(self, charts: Iterable[ChartResponse | ExtendedChart], compressed: bool = False, codec: str = DEFAULT_CODEC) -> int:
+        """Add or replace charts in place and return how many were written. Replaced records become dead space."""
+        is_new = not self.path.exists()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+        if not is_new:
+            # Pick up anything appended since this archive was opened
+            self._open()
+
+        count = 0
+        old_index = dict(self.index)
+        try:
+            with open(self.path, "wb" if is_new else "r+b") as f:
+                if is_new:
+                    f.write(_PREAMBLE.pack(_ARCHIVE_MAGIC, CHART_ARCHIVE_FORMAT_VERSION))
+                else:
+                    f.seek(0, os.SEEK_END)
+
+                for chart in charts:
+                    record = encode_binary_chart(chart)
+                    record = compress_bytes(record, codec) if compressed else record
+
+                    entry = ArchiveEntry(chart.info.id, isinstance(chart, ExtendedChart), f.tell(), len(record), compressed)
+                    f.write(record)
+                    self.index[(entry.level, entry.extended)] = entry
+                    count += 1
+
+                index_offset = f.tell()
+                index_bytes = encode(list(self.index.values()))
+                f.write(index_bytes)
+                f.write(_TRAILER.pack(index_offset, len(index_bytes), _INDEX_MAGIC))
+        except BaseException:
+            # Drop the records written so far, which leaves the old footer at the end of the file again
+            self.index = old_index
+            if is_new:
+                self.path.unlink(missing_ok=True)
+            else:
+                os.truncate(self.path, self._size)
+            raise
+
+        self._open()
+        return count
+
+    def close(self):
+        # Dropped rather than closed: column views handed out by `read_columns` may still reference the map
+        self._mmap = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_exc):
+        self.close()
+
+
+_OPEN_ARCHIVES: dict[str, ChartArchive] = {}
+_OPEN_ARCHIVES_LOCK = threading.Lock()
+
+
+def open_chart_archive(path: str | Path) -> ChartArchive:
+    """Open an archive for reading once per process, reopening it if it grew since."""
+    archive_path = Path(path).with_suffix(CHART_ARCHIVE_EXT)
+    key = str(archive_path)
+    size = archive_path.stat().st_size if archive_path.exists() else 0
+
+    with _OPEN_ARCHIVES_LOCK:
+        archive = _OPEN_ARCHIVES.get(key)
+        if archive is None or archive._size != size:
+            archive = _OPEN_ARCHIVES[key] = ChartArchive(archive_path)
+        return archive
@@ -0,0 +1,35 @@
+import numpy as np
+
+from models.charts.chart_catalog import ChartStats
+from models.charts.extended_chart import TRANSITION_LABELS, ExtendedChart
+from models.charts.extension_params import DEFAULT_EXTENSION_PARAMS
+from models.responses.chart_response import ChartResponse
+
+_DENSITY_WINDOW_MS = 1000
+
+
+def compute_chart_stats(chart: ChartResponse | ExtendedChart) -> ChartStats:
+    ms = np.sort(np.fromiter((note.ms for note in chart.chart), dtype=np.int64, count=len(chart.chart)))
+    if ms.size == 0:
+        return ChartStats(0, 0.0, 0)
+
+    duration_ms = int(ms[-1] - ms[0])
+    nps = ms.size * 1000 / duration_ms if duration_ms > 0 else float(ms.size)
+
+    # Notes from each one up to a window later
+    peak_nps = int((np.searchsorted(ms, ms + _DENSITY_WINDOW_MS) - np.arange(ms.size)).max())
+
+    stats = ChartStats(duration_ms, nps, peak_nps)
+    if not isinstance(chart, ExtendedChart):
+        return stats
+
+    # The hits the extension merges into jumps
+    manip = np.fromiter((hit.manip for hit in chart.hits), dtype=np.int64, count=len(chart.hits))
+    stats.manip_share = float((manip > DEFAULT_EXTENSION_PARAMS.jump_manip_score).mean()) if manip.size else 0.0
+
+    transitions = np.fromiter((hit.transition for hit in chart.extended_hits), dtype=np.int64, count=len(chart.extended_hits))
+    counts = np.bincount(transitions[transitions >= 0], minlength=len(TRANSITION_LABELS))
+    for code, label in TRANSITION_LABELS.items():
+        setattr(stats, label, int(counts[code]))
+
+    return stats
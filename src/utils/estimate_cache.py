@@ -0,0 +1,59 @@
+from pathlib import Path
+
+from msgspec import DecodeError, Struct
+from msgspec.json import Decoder, encode
+
+ESTIMATE_CACHE_EXT = ".ndjson"
+
+
+class CachedEstimate(Struct, array_like=True):
+    notes_hash: str
+    estimate: float
+
+
+class EstimateCache:
+    """Append-only store of black-box estimates keyed by a hash of the chart notes.
+
+    Each estimate is appended as soon as it is known, so an interrupted run keeps everything it paid for
+    and charts whose notes did not change are never sent again.
+    """
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path).with_suffix(ESTIMATE_CACHE_EXT)
+        self.estimates: dict[str, float] = {}
+
+        self._load()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.path, "ab", buffering=0)
+
+    def _load(self):
+        try:
+            with open(self.path, "rb") as f:
+                lines = f.read().splitlines()
+        except FileNotFoundError:
+            return
+
+        decoder = Decoder(CachedEstimate)
+        for line in lines:
+            try:
+                entry = decoder.decode(line)
+            except DecodeError:
+                # A torn last line from an interrupted write
+                continue
+            self.estimates[entry.notes_hash] = entry.estimate
+
+    def get(self, key: str) -> float | None:
+        return self.estimates.get(key)
+
+    def put(self, key: str, estimate: float):
+        self.estimates[key] = estimate
+        self._file.write(encode(CachedEstimate(key, estimate)) + b"\n")
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_exc):
+        self.close()
@@ -0,0 +1,186 @@
+import os
+import struct
+import time
+from pathlib import Path
+from typing import Sequence
+
+from msgspec import structs
+from msgspec.json import encode
+
+from models.charts.extended_chart import ExtendedChart
+from models.charts.extension_params import DEFAULT_EXTENSION_PARAMS, ExtensionParams
+from models.responses.chart_response import ChartInfo as ChartResponseInfo
+from models.responses.chart_response import ChartResponse
+from utils.hashing import notes_hash
+from utils.io import BINARY_CHART_EXT, decode_binary_chart, default_cache_path, encode_binary_chart, write_file_atomically
+from utils.versioning import EXTENDED_CHART_VERSION
+
+DEFAULT_MAX_BYTES = 512 << 20
+DEFAULT_MAX_AGE_DAYS = 30.0
+
+_EXTENSION_CACHE_DIR = "extensions"
+
+
+def extension_key(ffr_chart: ChartResponse, params: ExtensionParams = DEFAULT_EXTENSION_PARAMS) -> str:
+    """Hash of everything an extension depends on: the notes, the extension version and its parameters."""
+    return notes_hash(b"|".join((encode(ffr_chart.chart), str(EXTENDED_CHART_VERSION).encode(), encode(params))))
+
+
+class ExtensionCache:
+    """Extended charts on disk, keyed by `extension_key`, so identical notes are only ever extended once.
+
+    Entries are binary charts written atomically, so any number of processes can share the cache. Reading an
+    entry refreshes its age, and the least recently used entries go first once the cache outgrows `max_bytes`.
+    Entries unused for `max_age_days` are dropped.
+    """
+
+    def __init__(self, directory: str | Path, max_bytes: int = DEFAULT_MAX_BYTES, max_age_days: float = DEFAULT_MAX_AGE_DAYS):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.max_age_days = max_age_days
+        self._size = self.evict()
+
+    def _path(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}{BINARY_CHART_EXT}"
+
+    def get(self, key: str) -> ExtendedChart | None:
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                chart = decode_binary_chart(f.read())
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        except (ValueError, struct.error):
+            # Unreadable, e.g. torn or written by another binary format version
+            path.unlink(missing_ok=True)
+            return None
+
+        return chart if isinstance(chart, ExtendedChart) else None
+
+    def put(self, key: str, chart: ExtendedChart):
+        data = encode_binary_chart(chart)
+        write_file_atomically(self._path(key), data)
+
+        self._size += len(data)
+        if self._size > self.max_bytes:
+            self._size = self.evict()
+
+    def evict(self) -> int:
+        """Drop expired entries, then the least recently used ones beyond `max_bytes`. Returns the size left."""
+        if not self.directory.exists():
+            return 0
+
+        expiry = time.time() - self.max_age_days * 86400
+        entries = []
+        for path in self.directory.glob(f"*/*{BINARY_CHART_EXT}"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+
+            if stat.st_mtime < expiry:
+                path.unlink(missing_ok=True)
+            else:
+                entries.append((stat.st_mtime, stat.st_size, path))
+
+        size = sum(entry_size for _, entry_size, _ in entries)
+        for _, entry_size, path in sorted(entries):
+            if size <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            size -= entry_size
+
+        return size
+
+
+_CACHE_ARGS: tuple[str, int, float] = ("", DEFAULT_MAX_BYTES, DEFAULT_MAX_AGE_DAYS)
+_CACHE: ExtensionCache | None = None
+_configured = False
+
+
+def configure_extension_cache(directory: str | None = None, max_bytes: int = DEFAULT_MAX_BYTES, max_age_days: float = DEFAULT_MAX_AGE_DAYS):
+    """Set where this process caches extended charts, the user cache directory by default. An empty directory disables it.
+
+    Pool workers get the same settings through `extension_cache_args`.
+    """
+    global _CACHE_ARGS, _CACHE, _configured
+    if directory is None:
+        directory = str(default_cache_path() / _EXTENSION_CACHE_DIR)
+
+    _CACHE_ARGS = (directory, max_bytes, max_age_days)
+    _CACHE = None
+    _configured = True
+
+
+def extension_cache_args() -> tuple[str, int, float]:
+    if not _configured:
+        configure_extension_cache()
+    return _CACHE_ARGS
+
+
+def extension_cache() -> ExtensionCache | None:
+    """The process-wide cache, opened on first use."""
+    global _CACHE
+    directory, max_bytes, max_age_days = extension_cache_args()
+    if _CACHE is None and directory:
+        _CACHE = ExtensionCache(directory, max_bytes, max_age_days)
+    return _CACHE
+
+
+def extend_chart(ffr_chart: ChartResponse, params: ExtensionParams = DEFAULT_EXTENSION_PARAMS) -> ExtendedChart:
+    """`extend_ffr_chart`, served from the extension cache when these notes were already extended the same way."""
+    # Imported on first use, only actions that extend charts need the transformer
+    from transformers.ffr_chart_to_extended_chart import extend_ffr_chart, extended_chart_info
+
+    cache = extension_cache()
+    if cache is None:
+        return extend_ffr_chart(ffr_chart, params)
+
+    key = extension_key(ffr_chart, params)
+    cached = cache.get(key)
+    if cached is not None:
+        # Only the notes are part of the key, the info is always the current one
+        return structs.replace(cached, info=extended_chart_info(ffr_chart), chart=ffr_chart.chart)
+
+    chart = extend_ffr_chart(ffr_chart, params)
+    cache.put(key, chart)
+    return chart
+
+
+def extend_charts(ffr_charts: Sequence[ChartResponse], params: ExtensionParams = DEFAULT_EXTENSION_PARAMS) -> list[ExtendedChart]:
+    """`extend_chart` for many charts, extending all those missing from the cache together with `extend_ffr_charts`."""
+    from transformers.ffr_chart_to_extended_chart import extended_chart_info
+    from transformers.ffr_charts_to_extended_charts import extend_ffr_charts
+
+    cache = extension_cache()
+    if cache is None:
+        return extend_ffr_charts(ffr_charts, params)
+
+    keys = [extension_key(ffr_chart, params) for ffr_chart in ffr_charts]
+    charts: list[ExtendedChart | None] = []
+    for ffr_chart, key in zip(ffr_charts, keys):
+        cached = cache.get(key)
+        charts.append(structs.replace(cached, info=extended_chart_info(ffr_chart), chart=ffr_chart.chart) if cached is not None else None)
+
+    missing = [index for index, chart in enumerate(charts) if chart is None]
+    if missing:
+        for index, chart in zip(missing, extend_ffr_charts([ffr_charts[index] for index in missing], params)):
+            cache.put(keys[index], chart)
+            charts[index] = chart
+
+    return charts
+
+
+def is_stale(chart: ChartResponse | ExtendedChart) -> bool:
+    return isinstance(chart, ExtendedChart) and chart.version != EXTENDED_CHART_VERSION
+
+
+def refresh_stale_chart(chart: ChartResponse | ExtendedChart) -> ChartResponse | ExtendedChart:
+    """Re-extend an extended chart computed by an older `EXTENDED_CHART_VERSION` from the notes it carries."""
+    if not is_stale(chart):
+        return chart
+
+    print(f"Level {chart.info.id} was extended by version {chart.version}, extending it again")
+    ffr_chart = ChartResponse(ChartResponseInfo(**structs.asdict(chart.info)), chart.chart)
+    return extend_chart(ffr_chart)
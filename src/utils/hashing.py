@@ -0,0 +1,6 @@
+import hashlib
+
+
+def notes_hash(encoded_notes: bytes) -> str:
+    """Content hash of encoded chart notes, shared by the caches keyed on them."""
+    return hashlib.sha256(encoded_notes).hexdigest()
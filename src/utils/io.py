@@ -1,10 +1,31 @@
-import json
+import bz2
+import gzip
+import itertools
 import lzma
+import mmap
 import os
+import struct
+import threading
+import zlib
+from functools import cache
 from pathlib import Path
+from typing import Any, Callable, Iterable, Iterator
 
+import numpy as np
+from msgspec import Raw, Struct, structs
+from msgspec.json import Decoder, Encoder, decode, encode
 from platformdirs import user_data_dir
 
+from models.api.chart_format import ChartFormat
+from models.charts.extended_chart import ChartHit, ChartInfo, ExtendedChart, ManipCorrectedHitWithTransition
+from models.responses.chart_response import ChartInfo as ChartResponseInfo
+from models.responses.chart_response import ChartNote, ChartResponse
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
 _APP_CACHE_NAME = "ChartVisualizer"
 
 _CHARTS_DIR = "charts"
@@ -13,10 +34,149 @@ _EXTENDED_DIR = "extended"
 
 JSON_EXT = ".json"
 LZMA_EXT = ".lzma"
+NDJSON_EXT = ".ndjson"
+BINARY_CHART_EXT = ".ffrc"
+
+_LZMA_MAGIC = b"\xfd7zXZ\x00"
+_CODEC_MAGIC = b"FFRZ"
+_FRAME_LENGTH = struct.Struct("<I")
+_MMAP_MIN_SIZE = 1 << 20
+_TEMP_EXT = ".tmp"
+
+# Per-thread msgspec encoder and output buffer, reused across writes
+_ENCODE_STATE = threading.local()
+
+DEFAULT_CODEC = "lzma"
+
+_BINARY_CHART_MAGIC = b"FFRC"
+BINARY_CHART_FORMAT_VERSION = 1
+_BINARY_CHART_PREAMBLE = struct.Struct("<4sHI")  # Magic, format version, header length
+_BINARY_CHART_ALIGNMENT = 8
+
+# Column groups of the binary chart format: prefix, row Struct, and the fields narrower than int32
+_BINARY_CHART_GROUPS = (
+    ("note", ChartNote, {"dir": "<i1", "color": "<i1"}),
+    ("hit", ChartHit, {"hand": "<i1", "finger": "<i1", "manip": "<i1"}),
+    ("ext", ManipCorrectedHitWithTransition, {"hand": "<i1", "finger": "<i1", "transition": "<i1"}),
+)
+_BINARY_CHART_FIELDS = dict(zip(("chart", "hits", "extended_hits"), _BINARY_CHART_GROUPS))
 
 type StrOrPath = str | Path
 
 
+class Codec:
+    """A named compression algorithm. Levels only matter when compressing, so files record the name alone.
+
+    `decompressor`, when given, makes incremental decompressors whose `decompress(data, max_length)` can stop early.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        compress: Callable[[bytes, int], bytes],
+        decompress: Callable[[bytes], bytes],
+        default_level: int,
+        decompressor: Callable[[], Any] | None = None,
+    ):
+        self.name = name
+        self.compress = compress
+        self.decompress = decompress
+        self.default_level = default_level
+        self.decompressor = decompressor
+
+
+_CODECS: dict[str, Codec] = {}
+
+
+def register_codec(codec: Codec):
+    _CODECS[codec.name] = codec
+
+
+def available_codecs() -> list[str]:
+    return list(_CODECS)
+
+
+register_codec(Codec("lzma", lambda data, level: lzma.compress(data, preset=level), lzma.decompress, 6, lzma.LZMADecompressor))
+register_codec(
+    Codec("gzip", lambda data, level: gzip.compress(data, compresslevel=level, mtime=0), gzip.decompress, 9, lambda: zlib.decompressobj(wbits=31))
+)
+register_codec(Codec("bz2", lambda data, level: bz2.compress(data, compresslevel=level), bz2.decompress, 9, bz2.BZ2Decompressor))
+register_codec(Codec("zlib", lambda data, level: zlib.compress(data, level), zlib.decompress, 6, zlib.decompressobj))
+
+if zstandard is not None:
+    register_codec(
+        Codec(
+            "zstd",
+            lambda data, level: zstandard.ZstdCompressor(level=level).compress(data),
+            lambda data: zstandard.ZstdDecompressor().decompress(data),
+            3,
+        )
+    )
+
+
+def parse_codec(spec: str) -> tuple[Codec, int]:
+    """Resolve a `name` or `name:level` codec spec, e.g. `lzma:1` or `gzip`."""
+    name, _, level = spec.partition(":")
+    if name not in _CODECS:
+        raise ValueError(f'Unknown codec "{name}", available: {", ".join(_CODECS)}')
+
+    codec = _CODECS[name]
+    return codec, int(level) if level else codec.default_level
+
+
+def _codec_header(codec: Codec) -> bytes:
+    name = codec.name.encode("ascii")
+    return _CODEC_MAGIC + bytes([len(name)]) + name
+
+
+def _read_codec_header(data: bytes | memoryview) -> tuple[Codec, int] | None:
+    """The codec a header names and the header's size, or None if `data` has no codec header."""
+    if bytes(data[: len(_CODEC_MAGIC)]) != _CODEC_MAGIC:
+        return None
+
+    name_start = len(_CODEC_MAGIC) + 1
+    name = bytes(data[name_start : name_start + data[len(_CODEC_MAGIC)]]).decode("ascii")
+    if name not in _CODECS:
+        raise ValueError(f'Data was compressed with the "{name}" codec, which is not available')
+
+    return _CODECS[name], name_start + len(name)
+
+
+def compress_bytes(data: bytes | bytearray, codec: str = DEFAULT_CODEC) -> bytes:
+    """Compress `data` behind a header naming the codec, so `decompress_bytes` needs no hint."""
+    resolved_codec, level = parse_codec(codec)
+    return _codec_header(resolved_codec) + resolved_codec.compress(data, level)
+
+
+def decompress_bytes(data: bytes | memoryview) -> bytes | memoryview:
+    """Undo `compress_bytes`. Headerless lzma from older files is detected by its magic, anything else is returned as is."""
+    header = _read_codec_header(data)
+    if header is not None:
+        codec, header_size = header
+        return codec.decompress(data[header_size:])
+
+    if bytes(data[: len(_LZMA_MAGIC)]) == _LZMA_MAGIC:
+        return lzma.decompress(data)
+
+    return data
+
+
+def decompress_prefix(data: bytes | memoryview, size: int) -> bytes | memoryview:
+    """The first `size` bytes of `decompress_bytes(data)`, decompressing no further than that when the codec allows."""
+    header = _read_codec_header(data)
+    if header is not None:
+        codec, header_size = header
+        payload = data[header_size:]
+    elif bytes(data[: len(_LZMA_MAGIC)]) == _LZMA_MAGIC:
+        codec, payload = _CODECS["lzma"], data
+    else:
+        return data[:size]
+
+    if codec.decompressor is None:
+        return codec.decompress(payload)[:size]
+    return codec.decompressor().decompress(payload, size)
+
+
 def default_cache_path():
     return Path(user_data_dir(_APP_CACHE_NAME, appauthor=False))
 
@@ -41,45 +201,81 @@ def _ensure_extension(file_name: StrOrPath, expected_ext: str) -> str:
     return str(file_path)
 
 
-def write_compressed_json_to_file(json_data, file_name: StrOrPath):
+def _encode_json(json_data) -> bytearray:
+    """Encode any msgspec-supported value, Structs included, into this thread's reusable buffer.
+
+    The buffer is overwritten by the next call on the same thread, so write it out before encoding anything else.
+    """
+    if not hasattr(_ENCODE_STATE, "encoder"):
+        _ENCODE_STATE.encoder = Encoder()
+        _ENCODE_STATE.buffer = bytearray()
+
+    _ENCODE_STATE.encoder.encode_into(json_data, _ENCODE_STATE.buffer)
+    return _ENCODE_STATE.buffer
+
+
+def write_file_atomically(file_path: Path, data: bytes | bytearray):
+    """Write to a temporary sibling and rename it over `file_path`, so readers never see a partial file."""
+    file_path.parent.mkdir(mode=0o777, parents=True, exist_ok=True)
+    temp_path = file_path.with_name(f"{file_path.name}.{os.getpid()}.{threading.get_ident()}{_TEMP_EXT}")
+
+    try:
+        with open(temp_path, "wb") as f:
+            f.write(data)
+        os.replace(temp_path, file_path)
+    finally:
+        if temp_path.exists():
+            temp_path.unlink()
+
+
+def write_compressed_json_to_file(json_data, file_name: StrOrPath, codec: str = DEFAULT_CODEC):
+    # Compressed files keep the `.lzma` extension whatever the codec, their header says which one it is
     full_file_name = _ensure_extension(file_name, LZMA_EXT)
     print(f"Writing to file: {full_file_name}")
 
-    os.makedirs(os.path.dirname(full_file_name), exist_ok=True)
-
-    with lzma.open(full_file_name, mode="wt", encoding="utf-8") as f:
-        json.dump(json_data, f, ensure_ascii=False)
+    write_file_atomically(Path(full_file_name), compress_bytes(_encode_json(json_data), codec))
 
 
 def write_json_to_file(json_data, file_name: StrOrPath):
     full_file_name = _ensure_extension(file_name, JSON_EXT)
     print(f"Writing to file: {full_file_name}")
 
-    # Ensure parent directories exist
-    file_path = Path(full_file_name)
-    file_path.parent.mkdir(mode=0o777, parents=True, exist_ok=True)
-
-    with open(file_path, "w+", encoding="utf-8") as f:
-        json.dump(json_data, f, ensure_ascii=False)
+    write_file_atomically(Path(full_file_name), _encode_json(json_data))
 
 
-def load_compressed_json_from_file(file_name: StrOrPath):
+def load_compressed_json_from_file(file_name: StrOrPath) -> bytes:
     full_file_name = _ensure_extension(file_name, LZMA_EXT)
     print(f"Loading from file: {full_file_name}")
 
-    with lzma.open(full_file_name, mode="rt", encoding="utf-8") as f:
-        return f.read()
+    with open(full_file_name, "rb") as f:
+        return decompress_bytes(f.read())
+
 
+def load_json_from_file(file_name: StrOrPath, decoder: Callable[[bytes | memoryview], Any] = bytes) -> Any:
+    """The file's raw UTF-8 bytes, or what `decoder` makes of them.
 
-def load_json_from_file(file_name: StrOrPath):
+    Large files are decoded straight from a read-only map, unmapped before returning so the file can be replaced
+    right after. `decoder` must not keep views into its input, such as msgspec `Raw` fields.
+    """
     full_file_name = _ensure_extension(file_name, JSON_EXT)
     print(f"Loading from file: {full_file_name}")
 
-    with open(full_file_name, "r", encoding="utf-8") as f:
-        return f.read()
+    with open(full_file_name, "rb") as f:
+        # Mapping only pays off once the copy it saves outweighs its setup
+        if os.fstat(f.fileno()).st_size < _MMAP_MIN_SIZE:
+            return decoder(f.read())
 
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped, memoryview(mapped) as view:
+            return decoder(view)
 
-def build_chart_filename(directory: str, extended: bool, compressed: bool, level_id: int) -> Path:
+
+@cache
+def json_decoder(decoded_type: type) -> Decoder:
+    """A reusable msgspec decoder for `decoded_type`, built once per process."""
+    return Decoder(decoded_type)
+
+
+def chart_store_path(directory: str, extended: bool, compressed: bool) -> Path:
     # Create the base directory path
     base_dir = Path(directory)
 
@@ -87,7 +283,237 @@ def build_chart_filename(directory: str, extended: bool, compressed: bool, level
     raw_subdir = _EXTENDED_DIR if extended else ""
     subdir = (Path(raw_subdir) / _COMPRESSED_DIR) if compressed else Path(raw_subdir)
 
+    return base_dir / _CHARTS_DIR / subdir
+
+
+class NdjsonWriter:
+    """Streams records to an NDJSON file, one msgspec-encoded record per line.
+
+    When compressed, the file starts with a codec header and every `write_records` call is compressed as its
+    own length-prefixed frame, so the file stays readable after each call and can be reopened at any returned
+    offset to append more.
+    """
+
+    def __init__(self, file_name: StrOrPath, compressed: bool = False, offset: int | None = None, codec: str = DEFAULT_CODEC):
+        self.compressed = compressed
+        self._codec, self._level = parse_codec(codec)
+        self._encoder = Encoder()
+
+        Path(file_name).parent.mkdir(parents=True, exist_ok=True)
+
+        if offset is None:
+            self._file = open(file_name, "wb")
+            if compressed:
+                self._file.write(_codec_header(self._codec))
+        else:
+            # Drop anything written after `offset`
+            self._file = open(file_name, "r+b")
+            self._file.truncate(offset)
+            self._file.seek(offset)
+
+    def write_records(self, records: Iterable) -> int:
+        """Append the records and return the file offset after them."""
+        buffer = bytearray()
+        for record in records:
+            self._encoder.encode_into(record, buffer, -1)
+            buffer.extend(b"\n")
+
+        if self.compressed:
+            frame = self._codec.compress(buffer, self._level)
+            self._file.write(_FRAME_LENGTH.pack(len(frame)) + frame)
+        else:
+            self._file.write(buffer)
+        self._file.flush()
+
+        return self._file.tell()
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_exc):
+        self.close()
+
+
+def iter_ndjson_file(file_name: StrOrPath) -> Iterator[bytes]:
+    """Lazily yield the lines of a plain, codec-framed or (older) lzma-framed NDJSON file."""
+    with open(file_name, "rb") as raw_file:
+        start = raw_file.read(max(len(_LZMA_MAGIC), len(_CODEC_MAGIC) + 1 + 255))
+        header = _read_codec_header(start)
+
+        if header is not None:
+            codec, header_size = header
+            raw_file.seek(header_size)
+            lines = _iter_frame_lines(raw_file, codec)
+        else:
+            raw_file.seek(0)
+            lines = lzma.open(raw_file, mode="rb") if start.startswith(_LZMA_MAGIC) else raw_file
+
+        for line in lines:
+            if line.strip():
+                yield line
+
+
+def _iter_frame_lines(raw_file, codec: Codec) -> Iterator[bytes]:
+    # One decompressed frame in memory at a time
+    while length_bytes := raw_file.read(_FRAME_LENGTH.size):
+        (length,) = _FRAME_LENGTH.unpack(length_bytes)
+        yield from codec.decompress(raw_file.read(length)).splitlines(keepends=True)
+
+
+def build_chart_filename(directory: str, extended: bool, compressed: bool, level_id: int) -> Path:
     # Build the full path with the chart file name
-    filename = base_dir / _CHARTS_DIR / subdir / f"chart_{level_id}"
+    return chart_store_path(directory, extended, compressed) / f"chart_{level_id}"
+
+
+def chart_file_extension(compressed: bool, chart_format: str = ChartFormat.JSON.value) -> str:
+    if chart_format == ChartFormat.BINARY.value:
+        return BINARY_CHART_EXT
+    return LZMA_EXT if compressed else JSON_EXT
+
+
+def chart_file_exists(directory: str, extended: bool, compressed: bool, level_id: int, chart_format: str = ChartFormat.JSON.value) -> bool:
+    filename = build_chart_filename(directory, extended, compressed, level_id)
+    return filename.with_suffix(chart_file_extension(compressed, chart_format)).exists()
+
+
+class BinaryColumn(Struct, array_like=True):
+    name: str
+    dtype: str  # Numpy type string, e.g. `<i4`.
+    length: int
+
+
+class BinaryChartHeader(Struct):
+    info: Raw  # Decoded as the `ChartInfo` of whichever chart type the columns make up.
+    version: int  # `ExtendedChart.version`, 0 for a plain chart.
+    columns: list[BinaryColumn]
+
+
+def _align(size: int) -> int:
+    return -size % _BINARY_CHART_ALIGNMENT
+
+
+def _struct_columns(prefix: str, rows: list, fields: tuple[str, ...], narrow: dict[str, str]) -> list[tuple[str, np.ndarray]]:
+    flat = itertools.chain.from_iterable(map(structs.astuple, rows))
+    table = np.fromiter(flat, dtype=np.int64, count=len(rows) * len(fields)).reshape(-1, len(fields))
+
+    columns = []
+    for i, field in enumerate(fields):
+        dtype = np.dtype(narrow.get(field, "<i4"))
+        column = table[:, i]
+        if column.size and (column.min() < np.iinfo(dtype).min or column.max() > np.iinfo(dtype).max):
+            raise ValueError(f"Column {prefix}_{field} does not fit in {dtype}")
+        columns.append((f"{prefix}_{field}", column.astype(dtype)))
+
+    return columns
+
+
+def encode_binary_chart(chart: ChartResponse | ExtendedChart) -> bytearray:
+    """Encode a chart as a small JSON header followed by one contiguous little-endian array per column.
+
+    Extended charts carry their hits and extended hits as extra columns.
+    """
+    is_extended = isinstance(chart, ExtendedChart)
+    groups = [(chart.chart, *_BINARY_CHART_GROUPS[0])]
+    if is_extended:
+        groups += [(chart.hits, *_BINARY_CHART_GROUPS[1]), (chart.extended_hits, *_BINARY_CHART_GROUPS[2])]
+
+    columns = []
+    for rows, prefix, row_type, narrow in groups:
+        columns += _struct_columns(prefix, rows, row_type.__struct_fields__, narrow)
+
+    header = BinaryChartHeader(
+        info=Raw(encode(chart.info)),
+        version=chart.version if is_extended else 0,
+        columns=[BinaryColumn(name, column.dtype.str, len(column)) for name, column in columns],
+    )
+    header_bytes = encode(header)
+
+    buffer = bytearray(_BINARY_CHART_PREAMBLE.pack(_BINARY_CHART_MAGIC, BINARY_CHART_FORMAT_VERSION, len(header_bytes)))
+    buffer += header_bytes
+    for _, column in columns:
+        # Aligned so readers can view each column in place
+        buffer += bytes(_align(len(buffer)))
+        buffer += column.tobytes()
+
+    return buffer
+
+
+def binary_chart_columns(data: bytes | memoryview) -> tuple[BinaryChartHeader, dict[str, np.ndarray]]:
+    """Parse an encoded binary chart into its header and read-only column arrays viewing `data`."""
+    magic, format_version, header_length = _BINARY_CHART_PREAMBLE.unpack_from(data)
+    if magic != _BINARY_CHART_MAGIC:
+        raise ValueError("Not a binary chart")
+    if format_version != BINARY_CHART_FORMAT_VERSION:
+        raise ValueError(f"Unsupported binary chart format version {format_version}")
+
+    offset = _BINARY_CHART_PREAMBLE.size
+    header = decode(data[offset : offset + header_length], type=BinaryChartHeader)
+    offset += header_length
+
+    columns = {}
+    for column in header.columns:
+        offset += _align(offset)
+        dtype = np.dtype(column.dtype)
+        columns[column.name] = np.frombuffer(data, dtype=dtype, count=column.length, offset=offset)
+        offset += dtype.itemsize * column.length
+
+    return header, columns
+
+
+def write_binary_chart(chart: ChartResponse | ExtendedChart, file_name: StrOrPath, compressed: bool = False, codec: str = DEFAULT_CODEC):
+    """Write a chart in the binary columnar format. When compressed, the whole file goes through `compress_bytes`."""
+    full_file_name = _ensure_extension(file_name, BINARY_CHART_EXT)
+    print(f"Writing to file: {full_file_name}")
+
+    buffer = encode_binary_chart(chart)
+    write_file_atomically(Path(full_file_name), compress_bytes(buffer, codec) if compressed else buffer)
+
+
+def load_binary_chart_columns(file_name: StrOrPath) -> tuple[BinaryChartHeader, dict[str, np.ndarray]]:
+    """Read a binary chart's header and its columns as read-only arrays viewing the file's bytes."""
+    full_file_name = _ensure_extension(file_name, BINARY_CHART_EXT)
+
+    with open(full_file_name, "rb") as f:
+        return binary_chart_columns(decompress_bytes(f.read()))
+
+
+def _struct_rows(columns: dict[str, np.ndarray], prefix: str, row_type: type) -> list:
+    fields = [columns[f"{prefix}_{field}"].tolist() for field in row_type.__struct_fields__]
+    return [row_type(*row) for row in zip(*fields)]
+
+
+def load_binary_chart(file_name: StrOrPath) -> ChartResponse | ExtendedChart:
+    """Read a binary chart file back into the `ChartResponse` or `ExtendedChart` it was written from."""
+    return chart_from_columns(*load_binary_chart_columns(file_name))
+
+
+def decode_binary_chart(data: bytes | memoryview) -> ChartResponse | ExtendedChart:
+    return chart_from_columns(*binary_chart_columns(data))
+
+
+def is_extended_columns(columns: dict[str, np.ndarray]) -> bool:
+    return f"{_BINARY_CHART_GROUPS[1][0]}_ms" in columns
+
+
+def binary_chart_rows(columns: dict[str, np.ndarray], field: str) -> list:
+    """Rebuild one of a chart's lists, `chart`, `hits` or `extended_hits`, from its binary columns."""
+    prefix, row_type, _ = _BINARY_CHART_FIELDS[field]
+    return _struct_rows(columns, prefix, row_type)
+
+
+def chart_from_columns(header: BinaryChartHeader, columns: dict[str, np.ndarray]) -> ChartResponse | ExtendedChart:
+    notes = binary_chart_rows(columns, "chart")
+
+    if not is_extended_columns(columns):
+        return ChartResponse(decode(header.info, type=ChartResponseInfo), notes)
 
-    return filename
+    return ExtendedChart(
+        info=decode(header.info, type=ChartInfo),
+        chart=notes,
+        hits=binary_chart_rows(columns, "hits"),
+        extended_hits=binary_chart_rows(columns, "extended_hits"),
+        version=header.version,
+    )
@@ -0,0 +1,120 @@
+import threading
+from enum import Enum
+from pathlib import Path
+
+from msgspec import DecodeError, Struct
+from msgspec.json import Decoder, encode
+
+JOURNAL_EXT = ".journal"
+
+
+class CrawlState(Enum):
+    STARTED = "started"
+    PAGE = "page"
+    DONE = "done"
+    FAILED = "failed"
+
+
+class JournalEntry(Struct, array_like=True):
+    level: int
+    state: CrawlState
+    page: int = -1  # Last page fully spooled to disk, for paged crawls.
+    offset: int = 0  # Size of the level's spool file once that page was written.
+
+
+class CrawlJournal:
+    """Append-only record of a crawl's progress, one short JSON line per event.
+
+    Workers in any process can append to the same journal: each event is a single small `O_APPEND` write,
+    so updates stay cheap and never rewrite the file. Replaying it yields the last known state of each level.
+    """
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path).with_suffix(JOURNAL_EXT)
+        self.done: set[int] = set()
+        self.failed: set[int] = set()
+        self.in_progress: set[int] = set()
+        self.page_cursors: dict[int, JournalEntry] = {}
+
+        self._replay()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.path, "ab", buffering=0)
+
+    def _replay(self):
+        try:
+            with open(self.path, "rb") as f:
+                lines = f.read().splitlines()
+        except FileNotFoundError:
+            return
+
+        decoder = Decoder(JournalEntry)
+        for line in lines:
+            try:
+                self._apply(decoder.decode(line))
+            except DecodeError:
+                # A torn last line from an interrupted write
+                continue
+
+    def _apply(self, entry: JournalEntry):
+        level = entry.level
+        self.done.discard(level)
+        self.failed.discard(level)
+        self.in_progress.discard(level)
+
+        match entry.state:
+            case CrawlState.DONE:
+                self.done.add(level)
+                self.page_cursors.pop(level, None)
+            case CrawlState.FAILED:
+                self.failed.add(level)
+            case CrawlState.PAGE:
+                self.in_progress.add(level)
+                self.page_cursors[level] = entry
+            case CrawlState.STARTED:
+                self.in_progress.add(level)
+                self.page_cursors.pop(level, None)
+
+    def record(self, entry: JournalEntry):
+        self._apply(entry)
+        self._file.write(encode(entry) + b"\n")
+
+    def started(self, level: int):
+        self.record(JournalEntry(level, CrawlState.STARTED))
+
+    def page_done(self, level: int, page: int, offset: int):
+        self.record(JournalEntry(level, CrawlState.PAGE, page, offset))
+
+    def finished(self, level: int):
+        self.record(JournalEntry(level, CrawlState.DONE))
+
+    def failed_on(self, level: int):
+        self.record(JournalEntry(level, CrawlState.FAILED))
+
+    def pending(self, level_ids):
+        """The levels still to crawl: never seen, failed or interrupted."""
+        return [level_id for level_id in level_ids if level_id not in self.done]
+
+    def close(self):
+        self._file.close()
+
+
+_OPEN_JOURNALS: dict[str, CrawlJournal] = {}
+_OPEN_JOURNALS_LOCK = threading.Lock()
+
+
+def open_journal(path: str | Path) -> CrawlJournal:
+    """Open a journal once per process, so pool workers and crawl threads reuse the same handle."""
+    key = str(Path(path).with_suffix(JOURNAL_EXT))
+    with _OPEN_JOURNALS_LOCK:
+        if key not in _OPEN_JOURNALS:
+            _OPEN_JOURNALS[key] = CrawlJournal(key)
+        return _OPEN_JOURNALS[key]
+
+
+def close_journal(path: str | Path):
+    """Close a journal opened with `open_journal` in this process, so the next `open_journal` opens it afresh."""
+    key = str(Path(path).with_suffix(JOURNAL_EXT))
+    with _OPEN_JOURNALS_LOCK:
+        journal = _OPEN_JOURNALS.pop(key, None)
+    if journal is not None:
+        journal.close()
@@ -0,0 +1,153 @@
+import re
+from functools import cache, cached_property
+from pathlib import Path
+from typing import Any, Callable, Iterator
+
+from msgspec import Raw, Struct
+from msgspec.json import decode
+
+from models.charts.extended_chart import ChartHit, ChartInfo, ExtendedChart, ManipCorrectedHitWithTransition
+from models.responses.chart_response import ChartInfo as ChartResponseInfo
+from models.responses.chart_response import ChartNote, ChartResponse
+from utils.chart_archive import ChartArchive, is_chart_archive, open_chart_archive
+from utils.io import (
+    BINARY_CHART_EXT,
+    JSON_EXT,
+    LZMA_EXT,
+    StrOrPath,
+    binary_chart_columns,
+    binary_chart_rows,
+    chart_store_path,
+    decompress_bytes,
+    decompress_prefix,
+    is_extended_columns,
+    json_decoder,
+    load_compressed_json_from_file,
+    load_json_from_file,
+)
+
+# Stored charts open with their info, so the first few KiB of a file are enough to read it
+_INFO_PREFIX_SIZE = 4096
+_CHART_KEY = re.compile(rb',\s*"chart"\s*:')
+
+_ROW_TYPES = {"chart": list[ChartNote], "hits": list[ChartHit], "extended_hits": list[ManipCorrectedHitWithTransition]}
+
+
+class _StoredChartInfo(Struct):
+    info: Raw
+
+
+class _StoredChartFields(Struct):
+    # Every list is kept as raw JSON until it is asked for
+    info: Raw
+    chart: Raw
+    hits: Raw = Raw()  # Empty for a plain chart
+    extended_hits: Raw = Raw()
+    version: int = 0
+
+
+class LazyChart:
+    """A stored chart whose info is decoded up front, and whose `chart`, `hits` and `extended_hits` on first access.
+
+    It reads like the `ChartResponse` or `ExtendedChart` it stands for, so header-only scans over a whole catalog
+    never build the note and hit lists they don't look at. `materialize` returns the full chart.
+    """
+
+    def __init__(self, info: ChartInfo | ChartResponseInfo, extended: bool, load_field: Callable[[str], Any]):
+        self.info = info
+        self.extended = extended
+        self._load_field = load_field
+
+    @cached_property
+    def chart(self) -> list[ChartNote]:
+        return self._load_field("chart")
+
+    @cached_property
+    def hits(self) -> list[ChartHit]:
+        return self._load_field("hits") if self.extended else []
+
+    @cached_property
+    def extended_hits(self) -> list[ManipCorrectedHitWithTransition]:
+        return self._load_field("extended_hits") if self.extended else []
+
+    @cached_property
+    def version(self) -> int:
+        return self._load_field("version") if self.extended else 0
+
+    def materialize(self) -> ChartResponse | ExtendedChart:
+        if not self.extended:
+            return ChartResponse(self.info, self.chart)
+        return ExtendedChart(self.info, self.chart, self.hits, self.extended_hits, self.version)
+
+
+def _info_type(extended: bool) -> type:
+    return ChartInfo if extended else ChartResponseInfo
+
+
+def lazy_chart_from_json(data: bytes | memoryview, extended: bool) -> LazyChart:
+    fields = json_decoder(_StoredChartFields).decode(data)
+
+    def load_field(field: str) -> Any:
+        value = getattr(fields, field)
+        return value if field == "version" else json_decoder(_ROW_TYPES[field]).decode(value)
+
+    return LazyChart(decode(fields.info, type=_info_type(extended)), extended, load_field)
+
+
+def lazy_chart_from_binary(data: bytes | memoryview) -> LazyChart:
+    # The columns are views over `data`, nothing is copied until rows are built from them
+    header, columns = binary_chart_columns(data)
+    extended = is_extended_columns(columns)
+
+    def load_field(field: str) -> Any:
+        return header.version if field == "version" else binary_chart_rows(columns, field)
+
+    return LazyChart(decode(header.info, type=_info_type(extended)), extended, load_field)
+
+
+def _read_json_info(path: Path, compressed: bool) -> bytes | None:
+    """The `info` object that opens a stored JSON chart, read without loading the rest of the file."""
+    with open(path, "rb") as f:
+        prefix = decompress_prefix(f.read(), _INFO_PREFIX_SIZE) if compressed else f.read(_INFO_PREFIX_SIZE)
+
+    match = _CHART_KEY.search(prefix)
+    return bytes(prefix[: match.start()]) + b"}" if match else None
+
+
+def load_lazy_chart(file_name: StrOrPath, extended: bool) -> LazyChart:
+    path = Path(file_name)
+    if path.suffix == BINARY_CHART_EXT:
+        with open(path, "rb") as f:
+            return lazy_chart_from_binary(decompress_bytes(f.read()))
+
+    compressed = path.suffix == LZMA_EXT
+    info = _read_json_info(path, compressed)
+
+    @cache
+    def load_chart() -> LazyChart:
+        return lazy_chart_from_json(load_compressed_json_from_file(path) if compressed else load_json_from_file(path), extended)
+
+    if info is None:
+        # Written with another key order, fall back to reading the whole file
+        return load_chart()
+
+    stored_info = json_decoder(_StoredChartInfo).decode(info).info
+    return LazyChart(decode(stored_info, type=_info_type(extended)), extended, lambda field: getattr(load_chart(), field))
+
+
+def read_lazy_archived_chart(archive: ChartArchive, level_id: int, extended: bool) -> LazyChart | None:
+    record = archive.record(level_id, extended)
+    return lazy_chart_from_binary(record) if record is not None else None
+
+
+def scan_charts(directory: str, extended: bool, compressed: bool) -> Iterator[LazyChart]:
+    """Every chart of a directory store, in any on-disk format, or of a `.ffra` archive, as lazy handles."""
+    if is_chart_archive(directory):
+        archive = open_chart_archive(directory)
+        for level_id in archive.level_ids(extended):
+            yield read_lazy_archived_chart(archive, level_id, extended)
+        return
+
+    for path in sorted(chart_store_path(directory, extended, compressed).glob("chart_*")):
+        if path.suffix in (JSON_EXT, LZMA_EXT, BINARY_CHART_EXT):
+            yield load_lazy_chart(path, extended)
@@ -0,0 +1,205 @@
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qsl, urlsplit
+
+from models.api.api_action import ApiAction
+from models.api.api_action_args import MockServerArgs
+from utils.transport import cassette_key, load_cassette_entry
+
+
+def synthetic_chart(level_id: int, note_count: int = 1000) -> dict:
+    rng = random.Random(level_id)
+    ms = 0
+    notes = []
+    for _ in range(note_count):
+        ms += rng.choice((0, 50, 75, 100, 150, 200))
+        notes.append([ms * 30 // 1000, rng.randint(0, 3), 0, ms])
+
+    return {
+        "info": {
+            "id": level_id,
+            "name": f"Synthetic {level_id}",
+            "genre": 1,
+            "difficulty": rng.randint(1, 120),
+            "length": "2:00",
+            "note_count": note_count,
+            "timestamp": 0,
+            "timestamp_format": "unix",
+        },
+        "chart": notes,
+    }
+
+
+def synthetic_song_list(level_ids: range, timestamps: dict[int, int], swf_versions: dict[int, int]) -> dict:
+    song_info = {"name": "", "author": "", "stepauthor": "", "genre": 1, "difficulty": 1, "length": "2:00", "note_count": 0}
+    return {
+        "songs": [
+            {"id": i, **song_info, "min_nps": 0, "max_nps": 0, "timestamp": timestamps.get(i, 0), "timestamp_format": "unix", "swf_version": swf_versions.get(i, 1)}
+            for i in level_ids
+        ]
+    }
+
+
+def synthetic_ranks(level_ids: range) -> dict:
+    song_info = {"genre": 1, "name": "", "difficulty": 1, "notes": 0, "length": "0:00"}
+    return {
+        "user": {"name": "Zageron", "id": "1"},
+        "songs": {str(i): {"info": {"level": i, **song_info}} for i in level_ids},
+    }
+
+
+def synthetic_level_scores(level_id: int, page: int, limit: int) -> dict:
+    # Every third level gets a leaderboard of a few thousand players
+    players = level_id * 37 % 500 + (level_id % 3) * 2000
+    song = {"id": level_id, "songname": f"Synthetic {level_id}", "note_count": 1000, "time": "2:00", "difficulty": 1, "players": players}
+    score = {"perfect": 990, "good": 10, "average": 0, "miss": 0, "boo": 0, "timestamp": 0, "raw_score": 0, "user_level": 1.0, "aaaeq": 1.0}
+    ranks = range(page * limit, min((page + 1) * limit, players))
+    return {"song": song, "scores": [{"id": rank, "username": f"player{rank}", **score, "rank": rank + 1} for rank in ranks]}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    server: "_MockHttpServer"
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+
+    def do_GET(self):
+        self._respond(None)
+
+    def do_POST(self):
+        self._respond(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+
+    def _respond(self, body: bytes | None):
+        mock = self.server.mock
+
+        if mock.latency_ms:
+            time.sleep(mock.latency_ms / 1000)
+
+        if mock.error_rate and random.random() < mock.error_rate:
+            return self._send(503, b"")
+
+        if mock.cassette_dir:
+            entry = load_cassette_entry(mock.cassette_dir, cassette_key(self.command, self.path, body))
+            return self._send(entry.status, entry.body) if entry else self._send(404, b"")
+
+        payload = mock.synthetic_response(self.path, body)
+        return self._send(200, json.dumps(payload).encode("utf-8")) if payload is not None else self._send(404, b"")
+
+    def _send(self, status: int, payload: bytes):
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *_args):
+        pass
+
+
+class _MockHttpServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address: tuple[str, int], mock: "MockApiServer"):
+        super().__init__(address, _Handler)
+        self.mock = mock
+        self.lock = threading.Lock()
+        self.connections = 0
+
+
+class MockApiServer:
+    """Local stand-in for the FFR API (`chart`, `songlist`, `ranks`, `level_scores_flip`) and the autodifficulty endpoint.
+
+    Answers from a recorded cassette directory when given one, from synthetic data otherwise, with optional
+    latency and 503 error injection. It also counts the TCP connections it accepts and logs the synthetic requests.
+    Use it as a context manager to run it on a background thread.
+    """
+
+    def __init__(
+        self,
+        cassette_dir: str | Path | None = None,
+        level_ids: range = range(1, 201),
+        note_count: int = 1000,
+        latency_ms: float = 0.0,
+        error_rate: float = 0.0,
+        port: int = 0,
+    ):
+        self.cassette_dir = cassette_dir
+        self.level_ids = level_ids
+        self.note_count = note_count
+        self.latency_ms = latency_ms
+        self.error_rate = error_rate
+        self.timestamps: dict[int, int] = {}
+        self.swf_versions: dict[int, int] = {}
+        self.failing_levels: set[int] = set()
+        self.requests: list[dict[str, str]] = []  # Query parameters of each synthetic GET, in arrival order.
+
+        self.server = _MockHttpServer(("127.0.0.1", port), self)
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}/api/api.php"
+
+    @property
+    def connections(self) -> int:
+        return self.server.connections
+
+    def synthetic_response(self, path: str, body: bytes | None):
+        if body is not None:
+            # Autodifficulty: a made-up estimate from the chart density
+            notes = json.loads(body).get("payload", [])
+            return round(len(notes) / 20, 2)
+
+        params = _query_params(path)
+        with self.server.lock:
+            self.requests.append(params)
+
+        action = params.get("action")
+        level_id = int(params.get("level", 1))
+
+        match action:
+            case ApiAction.CHART.value if level_id not in self.failing_levels:
+                return synthetic_chart(level_id, self.note_count)
+            case ApiAction.SONG_LIST.value:
+                return synthetic_song_list(self.level_ids, self.timestamps, self.swf_versions)
+            case ApiAction.LEVEL_RANKS.value:
+                return synthetic_ranks(self.level_ids)
+            case ApiAction.LEVEL_SCORES.value if level_id not in self.failing_levels:
+                return synthetic_level_scores(level_id, int(params.get("page", 0)), int(params.get("limit", 100)))
+            case ApiAction.CHART.value | ApiAction.LEVEL_SCORES.value:
+                return {"status": -1, "error": f"Level {level_id} is failing on purpose"}
+
+        return None
+
+    def serve_forever(self):
+        print(f"Mock API listening on {self.url}")
+        try:
+            self.server.serve_forever()
+        finally:
+            self.server.server_close()
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *_exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def run_mock_server(args: MockServerArgs):
+    MockApiServer(args.cassette_dir or None, latency_ms=args.latency_ms, error_rate=args.error_rate, port=args.port).serve_forever()
+
+
+def _query_params(path: str) -> dict[str, str]:
+    return dict(parse_qsl(urlsplit(path).query))
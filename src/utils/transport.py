@@ -0,0 +1,232 @@
+import hashlib
+import json
+import multiprocessing as mp
+import random
+import time
+from enum import Enum
+from http import HTTPStatus
+from pathlib import Path
+from urllib.parse import parse_qsl, urlsplit
+
+import requests
+from msgspec import Struct
+from msgspec.json import decode, encode
+
+RETRYABLE_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+_CASSETTE_EXT = ".json"
+
+
+class TransportMode(Enum):
+    LIVE = "live"
+    RECORD = "record"
+    REPLAY = "replay"
+
+
+class TransportOptions(Struct):
+    connect_timeout: float = 5.0
+    read_timeout: float = 30.0
+    max_retries: int = 5
+    backoff_base: float = 0.5  # Seconds before the first retry, doubled on every attempt.
+    backoff_max: float = 30.0
+    mode: str = TransportMode.LIVE.value
+    cassette_dir: str = ""  # Where `record` stores responses and `replay` reads them back.
+    replay_latency_ms: float = 0.0
+    replay_error_rate: float = 0.0  # Share of replayed requests answered with a 503.
+
+
+class CassetteEntry(Struct):
+    method: str
+    url: str
+    status: int
+    body: bytes
+
+
+class RateLimiter:
+    """Token bucket shared by every process and thread it is handed to.
+
+    The refill rate starts at `rate`, is halved on each 429 and grows additively on successes (AIMD) up to `max_rate`,
+    4 times `rate` by default, so long crawls settle on the highest rate the server tolerates even above the starting one.
+    """
+
+    def __init__(self, rate: float, burst: float | None = None, min_rate: float = 0.5, recovery: float = 0.1, max_rate: float | None = None):
+        self.max_rate = max(max_rate or rate * 4, rate)
+        self.min_rate = min(min_rate, rate)
+        self.burst = burst or max(rate, 1.0)
+        self.recovery = recovery
+
+        self._lock = mp.Lock()
+        self._rate = mp.RawValue("d", rate)
+        self._tokens = mp.RawValue("d", self.burst)
+        self._last_refill = mp.RawValue("d", time.monotonic())
+
+    @property
+    def rate(self) -> float:
+        return self._rate.value
+
+    def acquire(self):
+        """Block until a request may be sent."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens.value = min(self.burst, self._tokens.value + (now - self._last_refill.value) * self._rate.value)
+                self._last_refill.value = now
+
+                if self._tokens.value >= 1:
+                    self._tokens.value -= 1
+                    return
+
+                wait = (1 - self._tokens.value) / self._rate.value
+
+            time.sleep(wait)
+
+    def throttle(self):
+        with self._lock:
+            self._rate.value = max(self.min_rate, self._rate.value / 2)
+
+    def recover(self):
+        with self._lock:
+            self._rate.value = min(self.max_rate, self._rate.value + self.recovery)
+
+
+def cassette_key(method: str, url: str, body: bytes | None = None) -> str:
+    """Identify a request regardless of host and API key, so cassettes replay against any server."""
+    query = sorted((name, value) for name, value in parse_qsl(urlsplit(url).query) if name != "key")
+    digest = hashlib.sha1(f"{method.upper()} {query}".encode("utf-8"))
+    if body:
+        digest.update(body)
+    return digest.hexdigest()
+
+
+def load_cassette_entry(cassette_dir: str | Path, key: str) -> CassetteEntry | None:
+    try:
+        with open(Path(cassette_dir) / f"{key}{_CASSETTE_EXT}", "rb") as f:
+            return decode(f.read(), type=CassetteEntry)
+    except FileNotFoundError:
+        return None
+
+
+def _request_body(json_body=None, data: bytes | None = None) -> bytes | None:
+    if data is not None:
+        return data
+    if json_body is not None:
+        return json.dumps(json_body, sort_keys=True).encode("utf-8")
+    return None
+
+
+def _build_response(status: int, body: bytes, url: str) -> requests.Response:
+    response = requests.Response()
+    response.status_code = status
+    response.reason = HTTPStatus(status).phrase
+    response.url = url
+    response._content = body
+    return response
+
+
+class RecordingSession(requests.Session):
+    """Session that stores every successful response in a cassette directory."""
+
+    def __init__(self, cassette_dir: str | Path):
+        super().__init__()
+        self.cassette_dir = Path(cassette_dir)
+        self.cassette_dir.mkdir(parents=True, exist_ok=True)
+
+    def request(self, method, url, *args, **kwargs):
+        response = super().request(method, url, *args, **kwargs)
+
+        if response.ok:
+            body = _request_body(kwargs.get("json"), kwargs.get("data"))
+            entry = CassetteEntry(method.upper(), url.split("?")[0], response.status_code, response.content)
+            with open(self.cassette_dir / f"{cassette_key(method, url, body)}{_CASSETTE_EXT}", "wb") as f:
+                f.write(encode(entry))
+
+        return response
+
+
+class ReplaySession(requests.Session):
+    """Session that answers from a cassette directory, with injected latency and error rates, without touching the network."""
+
+    def __init__(self, cassette_dir: str | Path, latency_ms: float = 0.0, error_rate: float = 0.0):
+        super().__init__()
+        self.cassette_dir = Path(cassette_dir)
+        self.latency_ms = latency_ms
+        self.error_rate = error_rate
+
+    def request(self, method, url, *args, **kwargs):
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000)
+
+        if self.error_rate and random.random() < self.error_rate:
+            return _build_response(503, b"", url)
+
+        body = _request_body(kwargs.get("json"), kwargs.get("data"))
+        entry = load_cassette_entry(self.cassette_dir, cassette_key(method, url, body))
+
+        if entry is None:
+            return _build_response(404, b"", url)
+
+        return _build_response(entry.status, entry.body, url)
+
+
+def build_session(options: TransportOptions) -> requests.Session:
+    match options.mode:
+        case TransportMode.RECORD.value:
+            return RecordingSession(options.cassette_dir)
+        case TransportMode.REPLAY.value:
+            return ReplaySession(options.cassette_dir, options.replay_latency_ms, options.replay_error_rate)
+        case _:
+            return requests.Session()
+
+
+class HttpTransport:
+    """Sends requests through a session with timeouts, rate limiting and retries with exponential backoff and jitter."""
+
+    def __init__(self, session: requests.Session, options: TransportOptions | None = None, rate_limiter: RateLimiter | None = None):
+        self.session = session
+        self.options = options or TransportOptions()
+        self.rate_limiter = rate_limiter
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        options = self.options
+        timeout = (options.connect_timeout, options.read_timeout)
+
+        for attempt in range(options.max_retries + 1):
+            is_last_attempt = attempt == options.max_retries
+
+            if self.rate_limiter:
+                self.rate_limiter.acquire()
+
+            try:
+                response = self.session.request(method, url, timeout=timeout, **kwargs)
+            except (requests.ConnectionError, requests.Timeout):
+                if is_last_attempt:
+                    raise
+                time.sleep(self.backoff_delay(attempt))
+                continue
+
+            if response.status_code not in RETRYABLE_STATUSES:
+                if self.rate_limiter:
+                    self.rate_limiter.recover()
+                return response
+
+            if response.status_code == 429 and self.rate_limiter:
+                self.rate_limiter.throttle()
+
+            if is_last_attempt:
+                return response
+
+            time.sleep(max(self.backoff_delay(attempt), _retry_after(response)))
+
+        raise AssertionError("unreachable")
+
+    def backoff_delay(self, attempt: int) -> float:
+        # Full jitter keeps retrying workers from hitting the server in lockstep
+        cap = min(self.options.backoff_max, self.options.backoff_base * 2**attempt)
+        return random.uniform(0, cap)
+
+
+def _retry_after(response: requests.Response) -> float:
+    try:
+        return float(response.headers.get("Retry-After", 0))
+    except ValueError:
+        return 0.0
@@ -0,0 +1,137 @@
+import queue
+import threading
+from multiprocessing import util
+from typing import Any, Callable, Hashable
+
+DEFAULT_MAX_PENDING = 32
+
+_STOP = object()
+
+
+class WriteBehindQueue:
+    """Bounded queue of disk writes drained by background writer threads, so fetching never waits on disk.
+
+    Tasks with the same key always go to the same writer and run in submission order. Once one of them fails,
+    the later ones are dropped until the key's next cleanup task, so a crawl never records a level as done when
+    its files did not make it to disk. Cleanup tasks always run, can check `failed` to report the failure, and
+    start the key afresh. `submit` blocks while a writer is `max_pending` tasks behind.
+    """
+
+    def __init__(self, max_pending: int = DEFAULT_MAX_PENDING, writers: int = 1):
+        per_writer = max(1, max_pending // max(1, writers))
+        self._queues = [queue.Queue(maxsize=per_writer) for _ in range(max(1, writers))]
+        self._failed_keys: set[Hashable] = set()
+        self._closed = False
+        self._threads = [
+            threading.Thread(target=self._drain, args=(task_queue,), name=f"write-behind-{i}", daemon=True)
+            for i, task_queue in enumerate(self._queues)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def submit(self, key: Hashable, fn: Callable, *args: Any):
+        self._put(key, fn, args, False)
+
+    def submit_cleanup(self, key: Hashable, fn: Callable, *args: Any):
+        """Like `submit`, but runs even after a failed task of `key`, and clears that failure once it has run."""
+        self._put(key, fn, args, True)
+
+    def failed(self, key: Hashable) -> bool:
+        """Whether a task of `key` failed since its last cleanup. Meant for the key's own tasks, which run after it."""
+        return key in self._failed_keys
+
+    def _put(self, key: Hashable, fn: Callable, args: tuple, cleanup: bool):
+        if self._closed:
+            raise RuntimeError("The write-behind queue is closed")
+        self._queues[hash(key) % len(self._queues)].put((key, fn, args, cleanup))
+
+    def _drain(self, task_queue: queue.Queue):
+        while True:
+            task = task_queue.get()
+            try:
+                if task is _STOP:
+                    return
+
+                key, fn, args, cleanup = task
+                if key in self._failed_keys and not cleanup:
+                    continue
+
+                try:
+                    fn(*args)
+                except Exception as e:
+                    print(f"Error on background write for {key}: {e}")
+                    self._failed_keys.add(key)
+
+                if cleanup:
+                    self._failed_keys.discard(key)
+            finally:
+                task_queue.task_done()
+
+    def flush(self):
+        """Wait until every task submitted so far has run."""
+        for task_queue in self._queues:
+            task_queue.join()
+        self._failed_keys.clear()
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+
+        for task_queue in self._queues:
+            task_queue.put(_STOP)
+        for thread in self._threads:
+            thread.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_exc):
+        self.close()
+
+
+_WRITE_BEHIND: WriteBehindQueue | None = None
+
+
+def install_write_behind(max_pending: int = DEFAULT_MAX_PENDING, writers: int = 1) -> WriteBehindQueue | None:
+    """Create the process-wide write-behind queue, or write inline when `max_pending` is 0.
+
+    Used from `mp.Pool` initializers. The queue is drained when the worker exits after `Pool.close`,
+    before its results are considered final by `Pool.join`.
+    """
+    global _WRITE_BEHIND
+    uninstall_write_behind()
+
+    if max_pending > 0:
+        _WRITE_BEHIND = WriteBehindQueue(max_pending, writers)
+        util.Finalize(_WRITE_BEHIND, _WRITE_BEHIND.close, exitpriority=10)
+
+    return _WRITE_BEHIND
+
+
+def uninstall_write_behind():
+    global _WRITE_BEHIND
+    if _WRITE_BEHIND is not None:
+        _WRITE_BEHIND.close()
+        _WRITE_BEHIND = None
+
+
+def persist(key: Hashable, fn: Callable, *args: Any):
+    """Run `fn(*args)` on the process write-behind queue if one is installed, right away otherwise."""
+    if _WRITE_BEHIND is None:
+        fn(*args)
+    else:
+        _WRITE_BEHIND.submit(key, fn, *args)
+
+
+def persist_cleanup(key: Hashable, fn: Callable, *args: Any):
+    """`persist` for a task that must run even when an earlier one of `key` failed, such as closing its files."""
+    if _WRITE_BEHIND is None:
+        fn(*args)
+    else:
+        _WRITE_BEHIND.submit_cleanup(key, fn, *args)
+
+
+def write_failed(key: Hashable) -> bool:
+    """Whether a write of `key` failed on the write-behind queue. Only meaningful inside the key's cleanup tasks."""
+    return _WRITE_BEHIND is not None and _WRITE_BEHIND.failed(key)
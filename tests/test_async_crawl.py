@@ -0,0 +1,64 @@
+from pathlib import Path
+
+import pytest
+
+from models.api.api_action_args import AllChartArgs, AllLevelScoresArgs
+from models.api.crawl_engine import CrawlEngine
+from services.ffr_api_service import get_all_level_scores, get_charts
+from utils.api import FfrClient
+from utils.journal import JOURNAL_EXT, CrawlJournal
+from utils.mock_api_server import MockApiServer
+
+_ENGINES = [engine.value for engine in CrawlEngine]
+
+
+@pytest.fixture
+def api():
+    with MockApiServer(level_ids=range(1, 9), note_count=200) as api:
+        api.failing_levels.add(3)
+        yield api
+
+
+def _stored_files(directory: Path) -> dict[str, bytes]:
+    files = (path for path in directory.rglob("*") if path.is_file() and path.suffix != JOURNAL_EXT)
+    return {path.relative_to(directory).as_posix(): path.read_bytes() for path in files}
+
+
+def _journal_states(directory: Path) -> list[tuple[set[int], set[int], set[int]]]:
+    journals = [CrawlJournal(path) for path in sorted(directory.rglob(f"*{JOURNAL_EXT}"))]
+    states = [(journal.done, journal.failed, journal.in_progress) for journal in journals]
+    for journal in journals:
+        journal.close()
+    return states
+
+
+@pytest.mark.parametrize("extended", [False, True])
+def test_async_engine_stores_the_same_charts(api, tmp_path, extended):
+    for engine in _ENGINES:
+        client = FfrClient("key", api.url)
+        args = AllChartArgs(1, 9, False, extended, to_dir=str(tmp_path / engine), engine=engine, extend_batch_notes=500)
+        charts = get_charts(range(1, 9), args, client)
+        client.close()
+
+        assert [chart and chart.info.id for chart in charts] == [1, 2, None, 4, 5, 6, 7, 8]
+
+    process_dir, async_dir = (tmp_path / engine for engine in _ENGINES)
+    assert _stored_files(async_dir) == _stored_files(process_dir)
+    assert _journal_states(async_dir) == _journal_states(process_dir) == [({1, 2, 4, 5, 6, 7, 8}, {3}, set())]
+
+
+def test_async_engine_stores_the_same_level_scores(api, tmp_path, monkeypatch):
+    for engine in _ENGINES:
+        (tmp_path / engine).mkdir()
+        monkeypatch.chdir(tmp_path / engine)
+
+        client = FfrClient("key", api.url)
+        get_all_level_scores(AllLevelScoresArgs(0, 1, 9, False, engine=engine, page_concurrency=4), client)
+        client.close()
+
+    process_dir, async_dir = (tmp_path / engine for engine in _ENGINES)
+    # The failed level keeps its spool for a resume
+    scores = [f"data/level_scores/scores_{level_id}.ndjson" for level_id in range(1, 9)]
+    assert sorted(_stored_files(process_dir)) == sorted(name + ".partial" if name.endswith("_3.ndjson") else name for name in scores)
+    assert _stored_files(async_dir) == _stored_files(process_dir)
+    assert _journal_states(async_dir) == _journal_states(process_dir) == [({1, 2, 4, 5, 6, 7, 8}, {3}, set())]
@@ -0,0 +1,129 @@
+import random
+
+import numpy as np
+import pytest
+from msgspec.json import decode, encode
+
+from models.api.api_action_args import ChartArgs, ExtendChartsArgs
+from models.responses.chart_response import ChartInfo, ChartNote, ChartResponse
+from services.chart_extension_service import extend_stored_charts
+from services.ffr_api_service import _load_chart_file, _write_chart_file, get_extended_charts
+from transformers import ffr_charts_to_extended_charts
+from transformers.ffr_chart_to_extended_chart import _segment_ends, _segment_linspace, extend_ffr_chart
+from transformers.ffr_charts_to_extended_charts import batch_charts, extend_ffr_charts, extend_hit_tables
+from utils.api import FfrClient
+from utils.chart_archive import ChartArchive
+from utils.extension_cache import configure_extension_cache
+from utils.io import build_chart_filename
+from utils.mock_api_server import MockApiServer, synthetic_chart
+
+
+def _random_chart(level_id: int) -> ChartResponse:
+    rng = random.Random(level_id)
+    note_count = rng.choice([0, 1, 2, 3, 10, 50, 300, 1500])
+    one_handed = level_id % 5 == 0
+
+    notes, ms = [], 0
+    for i in range(note_count):
+        # Jumps, trills at manip speed and long gaps
+        ms += rng.choice([0, 0, 1, 20, 40, 60, 90, 150, 400])
+        notes.append(ChartNote(i, rng.randrange(2 if one_handed else 4), 0, ms))
+    if level_id % 3 == 0:
+        rng.shuffle(notes)
+
+    return ChartResponse(ChartInfo(level_id, "Song", 1, 10, "1:00", note_count, 1700000000, "unix"), notes)
+
+
+def _catalog() -> list[ChartResponse]:
+    charts = [_random_chart(level_id) for level_id in range(1, 121)]
+    charts += [decode(encode(synthetic_chart(level_id, 400 * level_id)), type=ChartResponse) for level_id in range(121, 129)]
+    random.Random(0).shuffle(charts)
+    return charts
+
+
+@pytest.fixture
+def no_extension_cache():
+    configure_extension_cache("")
+    yield
+
+
+def test_batch_matches_extending_each_chart():
+    charts = _catalog()
+    assert extend_ffr_charts(charts) == [extend_ffr_chart(chart) for chart in charts]
+
+
+def test_batch_returns_views_per_chart():
+    charts = [_random_chart(level_id) for level_id in (4, 6, 7)]
+    hits, extended_hits = extend_hit_tables(charts)
+
+    assert [len(table) for table in hits] == [len(extend_ffr_chart(chart).hits) for chart in charts]
+    assert all(table.chart is None and np.shares_memory(table.ms, extended_hits[0].ms.base) for table in extended_hits)
+    assert extend_ffr_charts([]) == []
+
+
+def test_segment_linspace_matches_numpy():
+    rng = np.random.default_rng(0)
+    segments = np.repeat(np.arange(200), rng.integers(1, 40, 200))
+    starts = rng.integers(-5000, 5000, len(segments)).astype(np.int32)
+    stops = starts + rng.integers(0, 3000, len(segments)).astype(np.int32)
+
+    is_start, is_end = _segment_ends(segments)
+    expected = np.concatenate(
+        [np.linspace(starts[first], stops[last], last - first + 1, dtype=np.int32) for first, last in zip(*map(np.flatnonzero, (is_start, is_end)))]
+    )
+    np.testing.assert_array_equal(_segment_linspace(starts, stops, is_start, is_end), expected)
+
+
+def test_batches_stay_within_their_note_budget():
+    charts = [_random_chart(level_id) for level_id in range(1, 40)]
+    batches = list(batch_charts(charts, 2000))
+
+    assert [chart for batch in batches for chart in batch] == charts
+    assert all(len(batch) == 1 or sum(len(chart.chart) for chart in batch) <= 2000 for batch in batches)
+
+
+def test_extends_stored_raw_charts_offline(tmp_path, no_extension_cache):
+    charts = [_random_chart(level_id) for level_id in range(1, 13)]
+    for chart in charts:
+        _write_chart_file(chart, str(build_chart_filename(str(tmp_path), False, False, chart.info.id)), False)
+
+    assert extend_stored_charts(ExtendChartsArgs(from_dir=str(tmp_path), batch_notes=3000)) == len(charts)
+
+    for chart in charts:
+        path = str(build_chart_filename(str(tmp_path), True, False, chart.info.id))
+        assert _load_chart_file(path, False, True) == extend_ffr_chart(chart)
+
+
+def test_extends_archived_raw_charts_into_the_same_archive(tmp_path, no_extension_cache):
+    charts = [_random_chart(level_id) for level_id in range(1, 9)]
+    archive_path = str(tmp_path / "charts.ffra")
+    with ChartArchive(archive_path) as archive:
+        archive.append(charts)
+
+    extend_stored_charts(ExtendChartsArgs(from_dir=archive_path, batch_notes=2000))
+
+    with ChartArchive(archive_path) as archive:
+        assert archive.level_ids(True) == sorted(chart.info.id for chart in charts)
+        assert [archive.read(chart.info.id, True) for chart in charts] == [extend_ffr_chart(chart) for chart in charts]
+        assert [archive.read(chart.info.id, False) for chart in charts] == charts
+
+
+def test_crawled_charts_are_extended_in_note_bounded_batches(tmp_path, no_extension_cache, monkeypatch):
+    batched = []
+
+    def extend_batch(batch, params):
+        batched.append(len(batch))
+        return extend_ffr_charts(batch, params)
+
+    monkeypatch.setattr(ffr_charts_to_extended_charts, "extend_ffr_charts", extend_batch)
+
+    with MockApiServer(level_ids=range(1, 8), note_count=300) as api:
+        client = FfrClient("key", api.url)
+        chart_args = [ChartArgs(level_id, False, True, to_dir=str(tmp_path)) for level_id in range(1, 8)]
+        charts = get_extended_charts(chart_args, client, max_notes=900)
+        client.close()
+
+    assert batched == [3, 3, 1]
+    assert [chart.info.id for chart in charts] == list(range(1, 8))
+    for chart in charts:
+        assert _load_chart_file(str(build_chart_filename(str(tmp_path), True, False, chart.info.id)), False, True) == chart
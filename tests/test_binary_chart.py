@@ -0,0 +1,39 @@
+import pytest
+
+from models.charts.extended_chart import ChartHit, ChartInfo, ExtendedChart, ManipCorrectedHitWithTransition
+from models.responses.chart_response import ChartInfo as ChartResponseInfo
+from models.responses.chart_response import ChartNote, ChartResponse
+from utils.io import load_binary_chart, load_binary_chart_columns, write_binary_chart
+
+
+def _info(info_type):
+    return info_type(7, "Song", 1, 42, "2:00", 3, 1700000000, "unix")
+
+
+def _extended_chart() -> ExtendedChart:
+    return ExtendedChart(
+        info=_info(ChartInfo),
+        chart=[ChartNote(0, 0, 0, 0), ChartNote(3, 2, 1, 100), ChartNote(3, 3, 1, 100)],
+        hits=[ChartHit(0, 1, 0, 0, 0, 0), ChartHit(1, 3, 100, 100, 87, 104)],
+        extended_hits=[ManipCorrectedHitWithTransition(0, 1, 0, 0, 22, 0), ManipCorrectedHitWithTransition(1, 3, 100, 100, 18, 4)],
+        version=1,
+    )
+
+
+@pytest.mark.parametrize("compressed", [False, True])
+def test_extended_chart_round_trips(tmp_path, compressed):
+    chart = _extended_chart()
+    write_binary_chart(chart, tmp_path / "chart_7", compressed)
+
+    assert load_binary_chart(tmp_path / "chart_7") == chart
+
+    _, columns = load_binary_chart_columns(tmp_path / "chart_7")
+    assert columns["hit_manip"].tolist() == [0, 87]
+    assert columns["ext_transition"].dtype.itemsize == 1
+
+
+def test_plain_chart_round_trips(tmp_path):
+    chart = ChartResponse(_info(ChartResponseInfo), [ChartNote(0, 0, 0, 0), ChartNote(3, 2, 1, 100)])
+    write_binary_chart(chart, tmp_path / "chart_7")
+
+    assert load_binary_chart(tmp_path / "chart_7") == chart
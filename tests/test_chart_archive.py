@@ -0,0 +1,57 @@
+import pytest
+
+from models.responses.chart_response import ChartInfo, ChartNote, ChartResponse
+from utils.chart_archive import ChartArchive, open_chart_archive
+
+
+def _chart(level_id: int, note_count: int = 3) -> ChartResponse:
+    info = ChartInfo(level_id, f"Song {level_id}", 1, 10, "1:00", note_count, 0, "unix")
+    return ChartResponse(info, [ChartNote(i, i % 4, 0, i * 50) for i in range(note_count)])
+
+
+def test_appends_in_place_and_reads_single_charts(tmp_path):
+    path = tmp_path / "charts.ffra"
+
+    with ChartArchive(path) as archive:
+        archive.append([_chart(1), _chart(2)])
+
+    with ChartArchive(path) as archive:
+        archive.append([_chart(3, 5)], compressed=True)
+        archive.append([_chart(1, 4)])
+
+    reopened = open_chart_archive(path)
+
+    assert reopened.level_ids(extended=False) == [1, 2, 3]
+    assert reopened.read(1, False) == _chart(1, 4)
+    assert reopened.read(3, False) == _chart(3, 5)
+    assert reopened.read(2, True) is None
+
+    _, columns = reopened.read_columns(2, False)
+    assert columns["note_ms"].tolist() == [0, 50, 100]
+
+
+def test_failed_append_keeps_the_archive_readable(tmp_path):
+    path = tmp_path / "charts.ffra"
+    with ChartArchive(path) as archive:
+        archive.append([_chart(1), _chart(2)])
+    size = path.stat().st_size
+
+    def charts_then_error():
+        yield _chart(3)
+        raise ValueError("Corrupt chart file")
+
+    with ChartArchive(path) as archive:
+        with pytest.raises(ValueError):
+            archive.append(charts_then_error())
+        assert not archive.has(3, False)
+
+    assert path.stat().st_size == size
+    with ChartArchive(path) as archive:
+        assert archive.level_ids(extended=False) == [1, 2]
+        assert archive.read(1, False) == _chart(1)
+
+    # A new archive is not left behind half written
+    new_path = tmp_path / "new.ffra"
+    with pytest.raises(ValueError):
+        ChartArchive(new_path).append(charts_then_error())
+    assert not new_path.exists()
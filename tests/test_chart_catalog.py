@@ -0,0 +1,64 @@
+import os
+
+from msgspec import structs
+from msgspec.json import decode, encode
+
+from models.responses.chart_response import ChartResponse
+from models.responses.song_list_response import SongInfo
+from services.chart_catalog_service import catalog_path, load_catalog, parse_catalog_filter, query_catalog, update_catalog
+from services.ffr_api_service import _write_chart_file
+from transformers.ffr_chart_to_extended_chart import extend_ffr_chart
+from utils.chart_stats import compute_chart_stats
+from utils.io import build_chart_filename, write_json_to_file
+from utils.mock_api_server import synthetic_chart
+
+
+def _store(directory: str, level_id: int, note_count: int, extended: bool = True):
+    chart = decode(encode(synthetic_chart(level_id, note_count)), type=ChartResponse)
+    chart = extend_ffr_chart(chart) if extended else chart
+    _write_chart_file(chart, str(build_chart_filename(directory, extended, False, level_id)), False)
+
+
+def test_updates_incrementally_and_queries(tmp_path):
+    directory = str(tmp_path)
+    for level_id, note_count in ((1, 200), (2, 1600), (3, 1800)):
+        _store(directory, level_id, note_count)
+    _store(directory, 4, 2000, extended=False)
+
+    catalog = load_catalog(catalog_path(directory))
+    assert update_catalog(catalog, directory) == 4
+    assert update_catalog(catalog, directory) == 0
+
+    # Re-extending a chart only reindexes that chart
+    path = build_chart_filename(directory, True, False, 2).with_suffix(".json")
+    os.utime(path, ns=(0, 0))
+    assert update_catalog(catalog, directory) == 1
+
+    song = SongInfo(5, "Not stored", "", "", 1, 85, "2:00", 1700, 0, 0, 0, "unix", 1)
+    assert update_catalog(catalog, directory, [song]) == 1
+
+    write_json_to_file(catalog, catalog_path(directory))
+    catalog = load_catalog(catalog_path(directory))
+
+    filters = [parse_catalog_filter("note_count>=1500")]
+    assert [entry.id for entry in query_catalog(catalog, filters, sort="note_count", descending=True)] == [4, 3, 5, 2]
+
+    filters.append(parse_catalog_filter("manip_share>=0"))
+    assert [entry.id for entry in query_catalog(catalog, filters)] == [2, 3]
+
+    stats = catalog.entries[3].stats
+    assert stats.peak_nps >= stats.nps > 0
+    assert sum(getattr(stats, label) for label in ("trill", "jack", "jump_to_single", "single_to_jump", "jumpstream")) > 0
+    assert catalog.entries[4].stats.manip_share is None
+
+
+def test_parses_ranges_and_text_filters():
+    assert parse_catalog_filter("difficulty=80..90").upper == 90
+    assert parse_catalog_filter("name ~ Synthetic 1").value == "Synthetic 1"
+
+
+def test_manip_share_counts_the_hits_merged_into_jumps():
+    chart = extend_ffr_chart(decode(encode(synthetic_chart(1, 20)), type=ChartResponse))
+    hits = [structs.replace(hit, manip=manip) for hit, manip in zip(chart.hits[:4], (0, 50, 51, 100))]
+
+    assert compute_chart_stats(structs.replace(chart, hits=hits)).manip_share == 0.5
@@ -0,0 +1,257 @@
+import numpy as np
+import pytest
+from msgspec.json import decode, encode
+from numpy.typing import NDArray
+
+from models.charts.extended_chart import ChartHit, ManipCorrectedHitWithTransition
+from models.responses.chart_response import ChartInfo, ChartNote, ChartResponse
+from transformers import ffr_chart_to_extended_chart
+from transformers.ffr_chart_to_extended_chart import (
+    compute_alternating_penalties,
+    compute_hit_transitions,
+    compute_hits,
+    compute_manip_corrected_hits,
+    extend_ffr_chart,
+    hand_hits,
+    iterative_smoothing_projection,
+    note_array,
+)
+from utils.mock_api_server import synthetic_chart
+
+
+def _chart(notes: list[ChartNote]) -> ChartResponse:
+    return ChartResponse(ChartInfo(1, "Song", 1, 10, "1:00", len(notes), 1700000000, "unix"), notes)
+
+
+# Out of order, with a jump on each hand
+_NOTES = [
+    ChartNote(3, 1, 0, 120),
+    ChartNote(4, 3, 0, 150),
+    ChartNote(5, 2, 0, 190),
+    ChartNote(3, 0, 0, 120),
+    ChartNote(2, 1, 0, 70),
+    ChartNote(0, 0, 0, 0),
+    ChartNote(6, 1, 0, 230),
+    ChartNote(1, 2, 0, 40),
+    ChartNote(1, 3, 0, 40),
+]
+
+
+def test_merges_same_ms_notes_into_hits_per_hand():
+    left, right = hand_hits(note_array(_NOTES))
+
+    np.testing.assert_array_equal(left, [[0, 1], [70, 2], [120, 3], [230, 2]])
+    np.testing.assert_array_equal(right, [[40, 3], [150, 2], [190, 1]])
+
+
+def test_hits_match_the_groupby_implementation():
+    # Output of the former pandas groupby hit builder on the same notes
+    assert compute_hits(_chart(_NOTES)).rows(ChartHit) == [
+        ChartHit(hand=0, finger=1, ms=0, gap=0, manip=18, spread_ms=-50),
+        ChartHit(hand=1, finger=3, ms=40, gap=40, manip=0, spread_ms=-10),
+        ChartHit(hand=0, finger=2, ms=70, gap=70, manip=0, spread_ms=60),
+        ChartHit(hand=0, finger=3, ms=120, gap=50, manip=0, spread_ms=170),
+        ChartHit(hand=1, finger=2, ms=150, gap=110, manip=82, spread_ms=115),
+        ChartHit(hand=1, finger=1, ms=190, gap=40, manip=0, spread_ms=240),
+        ChartHit(hand=0, finger=2, ms=230, gap=110, manip=0, spread_ms=280),
+    ]
+
+
+def test_stages_pass_hit_tables_grouped_by_hand():
+    chart = _chart(_NOTES)
+    table = compute_hit_transitions(compute_manip_corrected_hits(compute_hits(chart)))
+
+    assert table.hand.tolist() == sorted(table.hand.tolist())
+    assert table.rows(ManipCorrectedHitWithTransition) == extend_ffr_chart(chart).extended_hits
+
+
+def test_extends_charts_played_with_one_hand():
+    chart = extend_ffr_chart(_chart([note for note in _NOTES if note.dir <= 1]))
+
+    assert [hit.hand for hit in chart.hits] == [0, 0, 0, 0]
+    assert len(chart.extended_hits) == 4
+
+
+def _reference_smoothing_projection(x, T=50, iterations=10):
+    # The former per-element loops
+    n = len(x)
+    lower = x - T
+    upper = x + T
+    current = np.clip(np.linspace(x[0] - T, x[-1] + T, n, dtype=np.int32), lower, upper)
+
+    for _ in range(iterations):
+        smoothed = current.copy()
+        for i in range(1, n - 1):
+            smoothed[i] = (current[i - 1] + current[i + 1]) / 2
+        smoothed = np.clip(smoothed, lower, upper)
+        for i in range(1, n):
+            if smoothed[i] < smoothed[i - 1]:
+                smoothed[i] = smoothed[i - 1]
+        current = smoothed
+
+    return current.round().astype(np.float32)
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_smoothing_matches_the_loop_implementation(seed):
+    rng = np.random.default_rng(seed)
+    n = int(rng.integers(1, 400))
+    # Gaps from jumps to long holds, starting before 0 to cover negative truncation
+    x = (np.cumsum(rng.integers(0, 300, n)) - 200).astype(np.int32)
+    T, iterations = int(rng.integers(1, 100)), int(rng.integers(0, 30))
+
+    np.testing.assert_array_equal(iterative_smoothing_projection(x, T, iterations), _reference_smoothing_projection(x, T, iterations))
+
+
+def test_smoothing_stops_within_tolerance():
+    x = np.sort(np.arange(0, 5000, 7, dtype=np.int32) ** 2 % 20000)
+
+    # Stopping at the fixed point changes nothing, a looser tolerance stops before it
+    exact = iterative_smoothing_projection(x, iterations=200)
+    np.testing.assert_array_equal(exact, _reference_smoothing_projection(x, iterations=200))
+    assert np.abs(iterative_smoothing_projection(x, iterations=200, tolerance=5) - exact).max() > 0
+
+
+def _reference_alternating_penalties(
+    candidate_indices: NDArray[np.intp],
+    times: NDArray[np.int32],
+    columns: NDArray[np.int8],
+    time_scores: NDArray[np.float32],
+    max_diff_for_triplet_detection: int = 150,
+) -> NDArray[np.float32]:
+    # The former per-candidate loop
+    penalties = np.zeros(len(times), dtype=np.float32)
+
+    for idx in range(len(candidate_indices)):
+        i = candidate_indices[idx]
+        manip_penalty: float = 0.0
+
+        has_prev = i > 0
+        has_prev_prev = i > 1
+        has_next = i + 1 < len(times)
+        has_next_next = i + 2 < len(times)
+
+        current_col = columns[i]
+        next_col = columns[i + 1] if has_next else None
+
+        prev_col = columns[i - 1] if has_prev else None
+        prev_prev_col = columns[i - 2] if has_prev_prev else None
+        next_next_col = columns[i + 2] if has_next_next else None
+
+        prev_prev_time = times[i - 2] if has_prev_prev else None
+        prev_time = times[i - 1] if has_prev else None
+        current_time = times[i]
+        next_time = times[i + 1] if has_next else None
+        next_next_time = times[i + 2] if has_next_next else None
+
+        time_diff_prev_prev = (prev_time - prev_prev_time) if prev_time is not None and prev_prev_time is not None else float("inf")
+        time_diff_prev_curr = (current_time - prev_time) if prev_time is not None else float("inf")
+        time_diff_curr_next = (next_time - current_time) if next_time is not None else float("inf")
+        time_diff_next_next = (next_next_time - next_time) if next_next_time is not None and next_time is not None else float("inf")
+
+        # Initialize triplet check variables
+        triplets = []
+        triplet_times = []
+
+        valid_triplet_columns = [(1, 2, 1), (2, 1, 2)]
+
+        # Check for valid alternating triplets and store their time sums
+        if has_prev_prev and (prev_prev_col, prev_col, current_col) in valid_triplet_columns:
+            triplets.append((i - 2, i - 1, i))
+            triplet_times.append(time_diff_prev_prev + time_diff_prev_curr)
+
+            if time_diff_prev_prev < max_diff_for_triplet_detection:
+                manip_penalty -= float(
+                    time_scores[i - 2] / 2 * (max_diff_for_triplet_detection - time_diff_prev_prev) / max_diff_for_triplet_detection
+                )
+            else:
+                manip_penalty -= float((time_diff_prev_prev - max_diff_for_triplet_detection) / max_diff_for_triplet_detection)
+
+        if has_prev and (prev_col, current_col, next_col) in valid_triplet_columns:
+            triplets.append((i - 1, i, i + 1))
+            triplet_times.append(time_diff_prev_curr + time_diff_curr_next)
+
+        if has_next_next and (current_col, next_col, next_next_col) in valid_triplet_columns:
+            triplets.append((i, i + 1, i + 2))
+            triplet_times.append(time_diff_curr_next + time_diff_next_next)
+
+            if time_diff_next_next < max_diff_for_triplet_detection:
+                manip_penalty -= float(
+                    time_scores[i + 2] / 2 * (max_diff_for_triplet_detection - time_diff_next_next) / max_diff_for_triplet_detection
+                )
+            else:
+                manip_penalty -= float((time_diff_next_next - max_diff_for_triplet_detection) / max_diff_for_triplet_detection)
+
+        manip_penalty = min(max(manip_penalty, 0), 1)
+
+        # Find the closest triplet by its time sum
+        if triplet_times:
+            closest_triplet_index = np.argmin(triplet_times)
+            closest_triplet = triplets[closest_triplet_index]
+            closest_triplet_time_sum = triplet_times[closest_triplet_index]
+
+            # Use penalty logic on the closest triplet
+            i1, i2, i3 = closest_triplet
+            avg_time_diff = closest_triplet_time_sum / 2
+
+            # Calculate the penalty based on how close the time differences are
+            ratio_to_alternation = min(int(times[i2] - times[i1]), int(times[i3] - times[i2])) / avg_time_diff
+            manip_penalty += (ratio_to_alternation - 0.5) * 2
+
+            # Consider surrounding inputs to reinforce or reduce the penalty
+            if i1 >= 2:  # Check input before the triplet (i2 - 2)
+                prev_prev_col = columns[i1 - 2]
+                prev_prev_time = times[i1 - 2]
+                time_diff_before_triplet = times[i1] - prev_prev_time
+
+                if (prev_prev_col, columns[i1]) in [(1, 2), (2, 1)]:
+                    avg_before_diff = (time_diff_before_triplet + time_diff_prev_prev) / 2
+                    if abs(avg_before_diff - avg_time_diff) < avg_time_diff * 0.2:  # Within 20% of avg_time_diff
+                        manip_penalty /= 1.2  # Reduce penalty if alternating pattern is consistent
+
+            if i3 + 2 < len(times):  # Check input after the triplet (i2 + 2)
+                next_next_col = columns[i3 + 2]
+                next_next_time = times[i3 + 2]
+                time_diff_after_triplet = next_next_time - times[i3]
+
+                if (columns[i3], next_next_col) in [(1, 2), (2, 1)]:
+                    avg_after_diff = (time_diff_next_next + time_diff_after_triplet) / 2
+                    if abs(avg_after_diff - avg_time_diff) < avg_time_diff * 0.2:  # Within 20% of avg_time_diff
+                        manip_penalty /= 1.2  # Reduce penalty if alternating pattern is consistent
+
+            # Ensure the manip_penalty stays between 0 and 1
+            manip_penalty = min(max(manip_penalty, 0), 1)
+
+        penalties[i] = manip_penalty
+
+    return penalties
+
+
+@pytest.mark.parametrize("seed", range(30))
+def test_alternating_penalties_match_the_loop_implementation(seed):
+    rng = np.random.default_rng(seed)
+    n = int(rng.integers(1, 600))
+
+    # Mostly trills and jumptrills at uneven speeds, with some jumps and long gaps
+    times = np.cumsum(rng.integers(1, rng.choice([60, 120, 400]), n)).astype(np.int32)
+    columns = rng.choice(np.array([1, 2, 3], dtype=np.int8), n, p=[0.45, 0.45, 0.1])
+    time_scores = np.where(rng.random(n) < 0.3, 0, rng.random(n)).astype(np.float32)
+    candidate_indices = np.flatnonzero(rng.random(n) < 0.6)
+    max_diff = int(rng.choice([100, 150, 200]))
+
+    np.testing.assert_array_equal(
+        compute_alternating_penalties(candidate_indices, times, columns, time_scores, max_diff),
+        _reference_alternating_penalties(candidate_indices, times, columns, time_scores, max_diff),
+    )
+
+
+def test_extended_catalog_is_unchanged_by_batched_penalties(monkeypatch):
+    charts = [decode(encode(synthetic_chart(level_id, 300 * level_id)), type=ChartResponse) for level_id in range(1, 9)]
+    batched = [extend_ffr_chart(chart) for chart in charts]
+
+    def reference(*args, segments=None):
+        assert segments is None
+        return _reference_alternating_penalties(*args)
+
+    monkeypatch.setattr(ffr_chart_to_extended_chart, "compute_alternating_penalties", reference)
+    assert [extend_ffr_chart(chart) for chart in charts] == batched
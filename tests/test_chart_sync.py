@@ -0,0 +1,78 @@
+import os
+
+import pytest
+
+from models.api.api_action import ApiAction
+from models.api.api_action_args import SyncChartsArgs
+from models.charts.chart_sync_manifest import SyncedChart
+from services.chart_sync_service import _MANIFEST_FILENAME, _load_manifest, sync_charts
+from utils.api import FfrClient
+from utils.io import build_chart_filename, chart_file_exists, chart_store_path
+from utils.mock_api_server import MockApiServer
+
+
+@pytest.fixture
+def api():
+    with MockApiServer(level_ids=range(1, 6), note_count=50) as api:
+        yield api
+
+
+def _sync(api: MockApiServer, to_dir: str) -> list[int]:
+    """Sync into `to_dir` and return the levels whose chart was downloaded."""
+    client = FfrClient("key", api.url)
+    api.requests.clear()
+    try:
+        sync_charts(SyncChartsArgs(to_dir, False, False), client)
+    finally:
+        client.close()
+    return sorted(int(params["level"]) for params in api.requests if params.get("action") == ApiAction.CHART.value)
+
+
+def _manifest(to_dir: str):
+    return _load_manifest(chart_store_path(to_dir, False, False) / _MANIFEST_FILENAME).charts
+
+
+def test_first_sync_downloads_every_chart(api, tmp_path):
+    api.timestamps[2] = 1700000000
+
+    assert _sync(api, str(tmp_path)) == [1, 2, 3, 4, 5]
+    assert all(chart_file_exists(str(tmp_path), False, False, level_id) for level_id in range(1, 6))
+    assert _manifest(str(tmp_path)) == {level_id: SyncedChart(1700000000 if level_id == 2 else 0, 1) for level_id in range(1, 6)}
+
+
+def test_resync_without_changes_downloads_nothing(api, tmp_path):
+    _sync(api, str(tmp_path))
+    manifest = _manifest(str(tmp_path))
+
+    assert _sync(api, str(tmp_path)) == []
+    assert _manifest(str(tmp_path)) == manifest
+
+
+@pytest.mark.parametrize("changed", ["timestamps", "swf_versions"])
+def test_changed_songs_are_downloaded_again(api, tmp_path, changed):
+    _sync(api, str(tmp_path))
+    getattr(api, changed)[3] = 2
+
+    assert _sync(api, str(tmp_path)) == [3]
+    assert _manifest(str(tmp_path))[3] == (SyncedChart(2, 1) if changed == "timestamps" else SyncedChart(0, 2))
+    assert _sync(api, str(tmp_path)) == []
+
+
+def test_deleted_chart_files_are_downloaded_again(api, tmp_path):
+    _sync(api, str(tmp_path))
+    os.remove(build_chart_filename(str(tmp_path), False, False, 2).with_suffix(".json"))
+
+    assert _sync(api, str(tmp_path)) == [2]
+    assert chart_file_exists(str(tmp_path), False, False, 2)
+
+
+def test_failed_levels_stay_out_of_the_manifest(api, tmp_path):
+    api.failing_levels.add(4)
+
+    assert _sync(api, str(tmp_path)) == [1, 2, 3, 4, 5]
+    assert sorted(_manifest(str(tmp_path))) == [1, 2, 3, 5]
+    assert not chart_file_exists(str(tmp_path), False, False, 4)
+
+    api.failing_levels.clear()
+    assert _sync(api, str(tmp_path)) == [4]
+    assert sorted(_manifest(str(tmp_path))) == [1, 2, 3, 4, 5]
@@ -0,0 +1,51 @@
+import lzma
+
+import pytest
+
+from utils.io import (
+    NdjsonWriter,
+    available_codecs,
+    compress_bytes,
+    decompress_bytes,
+    decompress_prefix,
+    iter_ndjson_file,
+    load_compressed_json_from_file,
+)
+
+_DATA = b'{"chart": [[0, 1, 0, 0], [3, 2, 0, 100]]}' * 50
+
+
+@pytest.mark.parametrize("codec", available_codecs())
+def test_codec_round_trips_without_a_hint(codec):
+    compressed = compress_bytes(_DATA, f"{codec}:1")
+
+    assert len(compressed) < len(_DATA)
+    assert decompress_bytes(compressed) == _DATA
+
+
+@pytest.mark.parametrize("codec", available_codecs())
+def test_prefix_decompression(codec):
+    assert decompress_prefix(compress_bytes(_DATA, codec), 100) == _DATA[:100]
+
+
+def test_reads_legacy_headerless_lzma_files(tmp_path):
+    path = tmp_path / "chart_1.lzma"
+    path.write_bytes(lzma.compress(_DATA))
+
+    assert load_compressed_json_from_file(path) == _DATA
+
+
+def test_unknown_codec_is_rejected():
+    with pytest.raises(ValueError):
+        compress_bytes(_DATA, "brotli")
+
+
+@pytest.mark.parametrize("codec", ["gzip:6", "zlib"])
+def test_ndjson_frames_any_codec(tmp_path, codec):
+    path = tmp_path / "scores.ndjson"
+
+    with NdjsonWriter(path, compressed=True, codec=codec) as writer:
+        writer.write_records([{"rank": 1}, {"rank": 2}])
+        writer.write_records([{"rank": 3}])
+
+    assert [line.strip() for line in iter_ndjson_file(path)] == [b'{"rank":1}', b'{"rank":2}', b'{"rank":3}']
@@ -0,0 +1,52 @@
+from utils.journal import CrawlJournal, close_journal, open_journal
+
+
+def test_replays_last_state_of_each_level(tmp_path):
+    journal = CrawlJournal(tmp_path / "crawl")
+    journal.started(1)
+    journal.finished(1)
+    journal.started(2)
+    journal.failed_on(2)
+    journal.started(3)
+    journal.page_done(3, 0, 120)
+    journal.page_done(3, 1, 240)
+    journal.close()
+
+    replayed = CrawlJournal(tmp_path / "crawl")
+
+    assert replayed.done == {1}
+    assert replayed.failed == {2}
+    assert replayed.in_progress == {3}
+    assert replayed.page_cursors[3].page == 1
+    assert replayed.page_cursors[3].offset == 240
+    assert replayed.pending([1, 2, 3, 4]) == [2, 3, 4]
+
+
+def test_ignores_torn_last_line(tmp_path):
+    journal = CrawlJournal(tmp_path / "crawl")
+    journal.finished(1)
+    journal.close()
+
+    with open(journal.path, "ab") as f:
+        f.write(b'[2,"do')
+
+    assert CrawlJournal(tmp_path / "crawl").done == {1}
+
+
+def test_restart_clears_page_cursor(tmp_path):
+    journal = CrawlJournal(tmp_path / "crawl")
+    journal.page_done(5, 3, 400)
+    journal.started(5)
+
+    assert 5 not in journal.page_cursors
+
+
+def test_closed_journals_are_opened_afresh(tmp_path):
+    journal = open_journal(tmp_path / "crawl")
+    journal.finished(1)
+    close_journal(tmp_path / "crawl")
+
+    assert journal._file.closed
+    reopened = open_journal(tmp_path / "crawl")
+    assert reopened is not journal and reopened.done == {1}
+    close_journal(tmp_path / "crawl")
@@ -0,0 +1,16 @@
+from utils.estimate_cache import EstimateCache
+from utils.hashing import notes_hash
+
+
+def test_reloads_estimates_and_ignores_torn_last_line(tmp_path):
+    key = notes_hash(b"[[0,1,0,0]]")
+
+    with EstimateCache(tmp_path / "estimates") as cache:
+        cache.put(key, 42.5)
+
+    with open(cache.path, "ab") as f:
+        f.write(b'["abc",1')
+
+    with EstimateCache(tmp_path / "estimates") as reloaded:
+        assert reloaded.get(key) == 42.5
+        assert reloaded.get(notes_hash(b"[]")) is None
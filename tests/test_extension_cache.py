@@ -0,0 +1,113 @@
+import os
+import time
+
+import pytest
+from msgspec import structs
+from msgspec.json import decode, encode
+
+from models.charts.extension_params import ExtensionParams
+from models.responses.chart_response import ChartResponse
+from services.ffr_api_service import _load_chart_file, _write_chart_file
+from transformers import ffr_chart_to_extended_chart, ffr_charts_to_extended_charts
+from transformers.ffr_chart_to_extended_chart import extend_ffr_chart
+from utils import extension_cache
+from utils.extension_cache import ExtensionCache, configure_extension_cache, extend_chart, extend_charts, extension_key, refresh_stale_chart
+from utils.io import build_chart_filename
+from utils.mock_api_server import synthetic_chart
+from utils.versioning import EXTENDED_CHART_VERSION
+
+
+def _chart(level_id: int, note_count: int = 300) -> ChartResponse:
+    return decode(encode(synthetic_chart(level_id, note_count)), type=ChartResponse)
+
+
+@pytest.fixture
+def cache_dir(tmp_path):
+    configure_extension_cache(str(tmp_path / "extensions"))
+    yield tmp_path / "extensions"
+    configure_extension_cache("")
+
+
+def test_extends_each_note_array_once(cache_dir, monkeypatch):
+    chart = _chart(1)
+    extended = extend_chart(chart)
+    assert extended == extend_ffr_chart(chart)
+
+    def fail(*_args):
+        raise AssertionError("Extended again")
+
+    monkeypatch.setattr(ffr_chart_to_extended_chart, "extend_ffr_chart", fail)
+
+    # Same notes under another level keep the info of the chart asked for
+    renamed = structs.replace(chart, info=structs.replace(chart.info, id=2, name="Other"))
+    cached = extend_chart(renamed)
+    assert (cached.info.id, cached.info.name) == (2, "Other")
+    assert cached.hits == extended.hits and cached.extended_hits == extended.extended_hits
+
+
+def test_batches_only_the_charts_missing_from_the_cache(cache_dir, monkeypatch):
+    charts = [_chart(level_id, 200 + level_id) for level_id in range(1, 6)]
+    extend_chart(charts[1])
+    extend_chart(charts[3])
+
+    batched = []
+    extend_ffr_charts = ffr_charts_to_extended_charts.extend_ffr_charts
+
+    def extend_batch(batch, params):
+        batched.append(batch)
+        return extend_ffr_charts(batch, params)
+
+    monkeypatch.setattr(ffr_charts_to_extended_charts, "extend_ffr_charts", extend_batch)
+
+    assert extend_charts(charts) == [extend_ffr_chart(chart) for chart in charts]
+    assert batched == [[charts[0], charts[2], charts[4]]]
+
+    # All of them are cached now
+    assert extend_charts(charts) == [extend_ffr_chart(chart) for chart in charts]
+    assert len(batched) == 1
+
+
+def test_key_covers_notes_params_and_version(monkeypatch):
+    chart = _chart(1)
+    key = extension_key(chart)
+
+    assert extension_key(_chart(1)) == key
+    assert extension_key(_chart(1, 301)) != key
+    assert extension_key(chart, ExtensionParams(jump_manip_score=60)) != key
+
+    monkeypatch.setattr(extension_cache, "EXTENDED_CHART_VERSION", EXTENDED_CHART_VERSION + 1)
+    assert extension_key(chart) != key
+
+
+def test_evicts_expired_then_least_recently_used(tmp_path):
+    chart = extend_ffr_chart(_chart(1))
+    cache = ExtensionCache(tmp_path, max_bytes=1 << 30)
+    for key in ("aa1", "bb2", "cc3"):
+        cache.put(key, chart)
+
+    now = time.time()
+    os.utime(cache._path("aa1"), (now - 40 * 86400,) * 2)
+    os.utime(cache._path("bb2"), (now - 20,) * 2)
+    entry_size = cache._path("cc3").stat().st_size
+
+    cache.max_bytes = entry_size
+    assert cache.evict() == entry_size
+    assert cache.get("aa1") is None and cache.get("bb2") is None
+    assert cache.get("cc3") == chart
+
+    # A corrupt entry is dropped and recomputed
+    cache._path("cc3").write_bytes(b"garbage")
+    assert cache.get("cc3") is None
+    assert not cache._path("cc3").exists()
+
+
+def test_stale_charts_are_re_extended_when_read(cache_dir, tmp_path):
+    current = extend_ffr_chart(_chart(1))
+    stale = structs.replace(current, hits=current.hits[:1], version=EXTENDED_CHART_VERSION - 1)
+
+    path = str(build_chart_filename(str(tmp_path), True, False, 1))
+    _write_chart_file(stale, path, False)
+
+    refreshed = refresh_stale_chart(_load_chart_file(path, False, True))
+    assert refreshed == current
+    assert refresh_stale_chart(current) is current
@@ -0,0 +1,79 @@
+import itertools
+import multiprocessing as mp
+import os
+import time
+
+import pytest
+
+from models.api.api_action_args import AllChartArgs
+from services import ffr_api_service
+from services.ffr_api_service import _charts_journal_path, _load_chart_file, iter_charts
+from utils.api import FfrClient
+from utils.chart_archive import ChartArchive
+from utils.io import build_chart_filename
+from utils.journal import CrawlJournal
+from utils.mock_api_server import MockApiServer
+
+
+@pytest.fixture
+def client():
+    with MockApiServer(level_ids=range(1, 21), note_count=50) as api:
+        client = FfrClient("key", api.url)
+        yield client
+        client.close()
+
+
+def _args(to_dir) -> AllChartArgs:
+    return AllChartArgs(1, 21, False, False, to_dir=str(to_dir), chunksize=1)
+
+
+def test_yields_charts_in_completion_order(client, tmp_path, monkeypatch):
+    get_chart = ffr_api_service._get_all_charts_internal
+
+    def slow_first_level(level_id, *args):
+        if level_id == 1:
+            time.sleep(0.5)
+        return get_chart(level_id, *args)
+
+    # Workers are forked, so they see the patched function too
+    monkeypatch.setattr(ffr_api_service, "_get_all_charts_internal", slow_first_level)
+    monkeypatch.setattr(os, "cpu_count", lambda: 4)
+
+    level_ids = [chart.info.id for chart in iter_charts(range(1, 21), _args(tmp_path), client)]
+
+    assert sorted(level_ids) == list(range(1, 21))
+    assert level_ids[-1] == 1
+
+
+def test_closing_the_stream_early_stops_the_workers(client, tmp_path):
+    args = _args(tmp_path)
+    charts = iter_charts(range(1, 21), args, client)
+    first = list(itertools.islice(charts, 3))
+    charts.close()
+
+    assert len(first) == 3
+    assert mp.active_children() == []
+
+    # Whatever the journal calls done was fully written before the workers stopped
+    journal = CrawlJournal(_charts_journal_path(args))
+    journal.close()
+    assert {chart.info.id for chart in first} <= journal.done | journal.in_progress
+    for level_id in journal.done:
+        assert _load_chart_file(str(build_chart_filename(args.to_dir, False, False, level_id).with_suffix(".json")), False, False).info.id == level_id
+
+
+def test_closing_an_archive_crawl_early_keeps_what_it_yielded(client, tmp_path):
+    args = _args(tmp_path / "charts.ffra")
+    charts = iter_charts(range(1, 21), args, client)
+    first = list(itertools.islice(charts, 3))
+    charts.close()
+
+    assert mp.active_children() == []
+    with ChartArchive(args.to_dir) as archive:
+        assert sorted(archive.level_ids(False)) == sorted(chart.info.id for chart in first)
+        assert all(archive.read(chart.info.id, False) == chart for chart in first)
+
+    # The next run adds the rest to the same archive
+    assert sorted(chart.info.id for chart in iter_charts(range(1, 21), args, client)) == list(range(1, 21))
+    with ChartArchive(args.to_dir) as archive:
+        assert sorted(archive.level_ids(False)) == list(range(1, 21))
@@ -0,0 +1,62 @@
+import os
+
+import pytest
+from msgspec.json import decode, encode
+
+from models.responses.chart_response import ChartResponse
+from utils.io import load_compressed_json_from_file, load_json_from_file, write_compressed_json_to_file, write_json_to_file
+from utils.mock_api_server import synthetic_chart
+
+
+def _chart(level_id: int) -> ChartResponse:
+    chart = decode(encode(synthetic_chart(level_id, 50)), type=ChartResponse)
+    chart.info.name = "Ünïcødé ☆"
+    return chart
+
+
+def test_structs_are_written_as_utf8_json(tmp_path):
+    chart = _chart(1)
+    write_json_to_file(chart, tmp_path / "chart_1")
+    write_compressed_json_to_file(chart, tmp_path / "chart_1", "gzip:1")
+
+    assert "Ünïcødé ☆".encode("utf-8") in bytes(load_json_from_file(tmp_path / "chart_1.json"))
+    assert decode(load_json_from_file(tmp_path / "chart_1.json"), type=ChartResponse) == chart
+    assert decode(load_compressed_json_from_file(tmp_path / "chart_1.lzma"), type=ChartResponse) == chart
+
+
+def test_interrupted_write_keeps_the_previous_file(tmp_path, monkeypatch):
+    path = tmp_path / "chart_1.json"
+    write_json_to_file(_chart(1), path)
+    previous = path.read_bytes()
+
+    def interrupted_replace(*_args):
+        raise OSError("interrupted")
+
+    monkeypatch.setattr(os, "replace", interrupted_replace)
+    with pytest.raises(OSError):
+        write_json_to_file(_chart(2), path)
+
+    assert path.read_bytes() == previous
+    assert [p.name for p in tmp_path.iterdir()] == ["chart_1.json"]
+
+
+def test_large_files_are_unmapped_before_loading_returns(tmp_path):
+    path = tmp_path / "chart_1.json"
+    chart = decode(encode(synthetic_chart(1, 60_000)), type=ChartResponse)
+    write_json_to_file(chart, path)
+    assert path.stat().st_size >= 1 << 20
+
+    inputs = []
+
+    def decode_chart(data):
+        inputs.append(data)
+        return decode(data, type=ChartResponse)
+
+    assert load_json_from_file(path, decode_chart) == chart
+    assert isinstance(load_json_from_file(path), bytes)
+
+    # The decoder was handed the map, released by now, so the file can be replaced
+    with pytest.raises(ValueError):
+        inputs[0].tobytes()
+    write_json_to_file(_chart(2), path)
+    assert load_json_from_file(path, decode_chart) == _chart(2)
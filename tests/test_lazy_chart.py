@@ -0,0 +1,60 @@
+import json
+
+import pytest
+from msgspec.json import decode, encode
+
+from models.charts.extended_chart import ChartHit, ChartInfo, ExtendedChart, ManipCorrectedHitWithTransition
+from models.responses.chart_response import ChartInfo as ChartResponseInfo
+from models.responses.chart_response import ChartNote, ChartResponse
+from services.ffr_api_service import _write_chart_file
+from utils.chart_archive import ChartArchive
+from utils.io import build_chart_filename
+from utils.lazy_chart import load_lazy_chart, scan_charts
+
+
+def _charts(level_id: int) -> tuple[ChartResponse, ExtendedChart]:
+    info = (level_id, f"Song {level_id}", 1, level_id * 10, "2:00", 2, 0, "unix")
+    notes = [ChartNote(0, 0, 0, 0), ChartNote(3, 2, 1, 100)]
+    extended = ExtendedChart(
+        info=ChartInfo(*info),
+        chart=notes,
+        hits=[ChartHit(0, 1, 0, 0, 0, 0), ChartHit(1, 2, 100, 100, 0, 100)],
+        extended_hits=[ManipCorrectedHitWithTransition(0, 1, 0, 0, 22, 0), ManipCorrectedHitWithTransition(1, 2, 100, 100, 22, 0)],
+        version=1,
+    )
+    return ChartResponse(ChartResponseInfo(*info), notes), extended
+
+
+@pytest.mark.parametrize("chart_format, compressed", [("json", False), ("json", True), ("binary", False)])
+@pytest.mark.parametrize("extended", [False, True])
+def test_scans_decode_lists_only_on_access(tmp_path, chart_format, compressed, extended):
+    for level_id in (1, 2, 3):
+        chart = _charts(level_id)[extended]
+        _write_chart_file(chart, str(build_chart_filename(str(tmp_path), extended, compressed, level_id)), compressed, chart_format, "gzip")
+
+    hard = [chart for chart in scan_charts(str(tmp_path), extended, compressed) if chart.info.difficulty > 15]
+
+    assert [chart.info.id for chart in hard] == [2, 3]
+    assert "chart" not in vars(hard[0]) and "hits" not in vars(hard[0])
+    assert [chart.materialize() for chart in hard] == [_charts(2)[extended], _charts(3)[extended]]
+
+
+def test_scans_archives(tmp_path):
+    with ChartArchive(tmp_path / "charts.ffra") as archive:
+        archive.append([chart for level_id in (1, 2) for chart in _charts(level_id)])
+
+    charts = list(scan_charts(str(tmp_path / "charts.ffra"), True, False))
+
+    assert [chart.info for chart in charts] == [_charts(1)[1].info, _charts(2)[1].info]
+    assert charts[1].extended_hits == _charts(2)[1].extended_hits
+
+
+def test_reads_files_written_with_other_layouts(tmp_path):
+    chart = _charts(1)[0]
+    legacy = tmp_path / "chart_1.json"
+    legacy.write_text(json.dumps({"info": decode(encode(chart.info)), "chart": decode(encode(chart.chart))}))
+    reordered = tmp_path / "chart_2.json"
+    reordered.write_text(json.dumps({"chart": decode(encode(chart.chart)), "info": decode(encode(chart.info))}))
+
+    assert load_lazy_chart(legacy, False).materialize() == chart
+    assert load_lazy_chart(reordered, False).materialize() == chart
@@ -0,0 +1,22 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+_SRC = Path(__file__).resolve().parent.parent / "src"
+
+_RESOLVE_AND_LIST_HEAVY = """
+import sys
+import main
+from controller import action_handler
+from models.api.api_action_args import AllChartArgs, AllLevelScoresArgs, CatalogQueryArgs, SongListArgs
+for args in (SongListArgs(), AllChartArgs(1, 2, False, True), AllLevelScoresArgs(100, 1, 2, False), CatalogQueryArgs()):
+    action_handler(args)
+print(",".join(m for m in ("PySide6", "pyqtgraph", "PIL", "pandas", "scipy") if m in sys.modules))
+"""
+
+
+def test_api_actions_skip_gui_and_transformer_imports():
+    env = dict(os.environ, PYTHONPATH=str(_SRC))
+    result = subprocess.run([sys.executable, "-c", _RESOLVE_AND_LIST_HEAVY], env=env, capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == ""
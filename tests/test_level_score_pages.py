@@ -0,0 +1,129 @@
+import pytest
+from msgspec import convert
+
+from models.responses.level_scores_response import LevelScoresResponse
+from services.ffr_api_service import _get_all_level_scores_internal, _iter_score_pages, level_scores_filename, read_level_scores
+from utils.api import FfrClient
+from utils.io import NdjsonWriter
+from utils.journal import CrawlJournal, close_journal
+from utils.mock_api_server import MockApiServer, synthetic_level_scores
+from utils.write_behind import install_write_behind, uninstall_write_behind
+
+# 2037 players on pages of 100, so pages 0 to 20, the last one short
+_LEVEL = 1
+_PLAYERS = 2037
+
+
+@pytest.fixture
+def api(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    with MockApiServer(level_ids=range(1, 4)) as server:
+        yield server
+
+
+def _requested_pages(api: MockApiServer) -> list[int]:
+    return sorted(int(params.get("page", 0)) for params in api.requests if params.get("level") == str(_LEVEL))
+
+
+@pytest.mark.parametrize("page_concurrency", [1, 4])
+def test_fetches_the_pages_the_player_count_gives(api, page_concurrency):
+    _get_all_level_scores_internal(_LEVEL, False, FfrClient("key", api.url), None, page_concurrency)
+
+    # The short last page ends the level without asking for an empty one
+    assert _requested_pages(api) == list(range(21))
+
+    song, scores = read_level_scores(level_scores_filename(_LEVEL, False))
+    assert song.players == _PLAYERS
+    assert [score.rank for score in scores] == list(range(1, _PLAYERS + 1))
+
+
+def test_resumes_after_the_journal_cursor_page(api):
+    filename = level_scores_filename(_LEVEL, False)
+    spool_path = filename.with_name(filename.name + ".partial")
+    spool_path.parent.mkdir(parents=True)
+    journal_path = "data/level_scores/crawl"
+
+    # An interrupted run spooled pages 0 to 4, then a torn part of page 5
+    pages = [convert(synthetic_level_scores(_LEVEL, page, 100), LevelScoresResponse) for page in range(6)]
+    journal = CrawlJournal(journal_path)
+    with NdjsonWriter(spool_path) as spool:
+        spool.write_records([pages[0].song])
+        journal.started(_LEVEL)
+        for page in range(5):
+            journal.page_done(_LEVEL, page, spool.write_records(pages[page].scores))
+        spool.write_records(pages[5].scores[:10])
+    journal.close()
+
+    try:
+        _get_all_level_scores_internal(_LEVEL, False, FfrClient("key", api.url), journal_path, 4)
+    finally:
+        close_journal(journal_path)
+
+    assert _requested_pages(api) == list(range(5, 21))
+    assert CrawlJournal(journal_path).done == {_LEVEL}
+
+    _, scores = read_level_scores(filename)
+    assert [score.rank for score in scores] == list(range(1, _PLAYERS + 1))
+
+
+def test_a_failed_background_write_closes_the_spool_and_fails_the_level(api, monkeypatch):
+    journal_path = "data/level_scores/crawl"
+    write_records = NdjsonWriter.write_records
+    spools = []
+
+    def fail_on_page_2(spool, records):
+        # The song header, then pages 0 and 1 make it to disk
+        spools.append(spool)
+        if len(spools) == 4:
+            raise OSError("disk full")
+        return write_records(spool, records)
+
+    monkeypatch.setattr(NdjsonWriter, "write_records", fail_on_page_2)
+
+    install_write_behind(4)
+    try:
+        _get_all_level_scores_internal(_LEVEL, False, FfrClient("key", api.url), journal_path, 4)
+    finally:
+        uninstall_write_behind()
+        close_journal(journal_path)
+
+    # Later pages were dropped, and a resume picks up after page 1
+    journal = CrawlJournal(journal_path)
+    assert journal.failed == {_LEVEL}
+    assert journal.page_cursors[_LEVEL].page == 1
+    assert len(spools) == 4 and spools[0]._file.closed
+    assert not level_scores_filename(_LEVEL, False).exists()
+
+
+@pytest.mark.parametrize("concurrency", [1, 3])
+def test_keeps_going_past_a_lagging_player_count_until_a_short_page(concurrency):
+    requested = []
+
+    def parse_page(page: int) -> LevelScoresResponse:
+        # The player count says 250, but the leaderboard has grown to 430
+        requested.append(page)
+        response = convert(synthetic_level_scores(_LEVEL, page, 100), LevelScoresResponse)
+        response.song.players = 250
+        response.scores = response.scores if page < 4 else response.scores[:30]
+        return response
+
+    pages = [page for page, _ in _iter_score_pages(parse_page, 0, concurrency)]
+
+    assert pages == [0, 1, 2, 3, 4]
+    assert sorted(requested) == [0, 1, 2, 3, 4]
+
+
+def test_keeps_at_most_concurrency_pages_in_flight():
+    requested = []
+
+    def parse_page(page: int) -> LevelScoresResponse:
+        requested.append(page)
+        return convert(synthetic_level_scores(_LEVEL, page, 100), LevelScoresResponse)
+
+    pages = _iter_score_pages(parse_page, 0, 3)
+    for expected_page in range(5):
+        page, _ = next(pages)
+        assert page == expected_page
+        # Page k + 3 is only asked for once page k was consumed
+        assert max(requested) <= page + 3
+    pages.close()
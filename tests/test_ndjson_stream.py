@@ -0,0 +1,30 @@
+import pytest
+
+from models.responses.level_scores_response import LevelScoresScore, LevelScoresSong
+from services.ffr_api_service import read_level_scores
+from utils.io import NdjsonWriter
+
+
+def _score(rank: int) -> LevelScoresScore:
+    return LevelScoresScore(rank, f"player{rank}", 990, 10, 0, 0, 0, 0, 0, 1.0, rank + 1, 1.0)
+
+
+@pytest.mark.parametrize("compressed", [False, True])
+def test_streamed_pages_read_back_lazily(tmp_path, compressed):
+    path = tmp_path / "scores_1.ndjson"
+    song = LevelScoresSong(1, "Song", 1000, "2:00", 50, 250)
+
+    with NdjsonWriter(path, compressed) as writer:
+        writer.write_records([song])
+        writer.write_records([_score(rank) for rank in range(100)])
+        kept_offset = writer.write_records([_score(rank) for rank in range(100, 200)])
+        writer.write_records([_score(rank) for rank in range(999, 1010)])
+
+    # Resuming at an offset drops what was written after it
+    with NdjsonWriter(path, compressed, kept_offset) as writer:
+        writer.write_records([_score(rank) for rank in range(200, 250)])
+
+    read_song, scores = read_level_scores(path)
+
+    assert read_song == song
+    assert [score.rank for score in scores] == list(range(1, 251))
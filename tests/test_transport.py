@@ -0,0 +1,90 @@
+import requests
+from msgspec.json import encode
+
+from utils.transport import CassetteEntry, HttpTransport, RateLimiter, ReplaySession, TransportOptions, cassette_key
+
+
+class _FakeSession:
+    def __init__(self, statuses: list[int]):
+        self.statuses = statuses
+        self.calls = 0
+
+    def request(self, method, url, timeout=None, **kwargs):
+        response = requests.Response()
+        response.status_code = self.statuses[min(self.calls, len(self.statuses) - 1)]
+        self.calls += 1
+        return response
+
+
+def _transport(statuses: list[int], rate_limiter: RateLimiter | None = None, max_retries: int = 3):
+    options = TransportOptions(max_retries=max_retries, backoff_base=0.0)
+    return HttpTransport(_FakeSession(statuses), options, rate_limiter)
+
+
+def test_retries_retryable_statuses_until_success():
+    transport = _transport([503, 502, 200])
+    response = transport.request("GET", "http://localhost")
+
+    assert response.status_code == 200
+    assert transport.session.calls == 3
+
+
+def test_returns_last_response_when_retries_are_exhausted():
+    transport = _transport([500], max_retries=2)
+    response = transport.request("GET", "http://localhost")
+
+    assert response.status_code == 500
+    assert transport.session.calls == 3
+
+
+def test_does_not_retry_client_errors():
+    transport = _transport([404, 200])
+
+    assert transport.request("GET", "http://localhost").status_code == 404
+    assert transport.session.calls == 1
+
+
+def test_rate_limiter_backs_off_on_429_and_recovers():
+    rate_limiter = RateLimiter(rate=1000.0, recovery=100.0, max_rate=1500.0)
+    transport = _transport([429, 429, 200], rate_limiter)
+    transport.request("GET", "http://localhost")
+
+    assert rate_limiter.rate == 1000.0 / 4 + 100.0
+
+    for _ in range(10):
+        rate_limiter.recover()
+
+    assert rate_limiter.rate == 1000.0 + 350.0
+
+    for _ in range(10):
+        rate_limiter.recover()
+
+    assert rate_limiter.rate == 1500.0
+
+
+def test_rate_limiter_climbs_back_once_429s_stop():
+    rate_limiter = RateLimiter(rate=100.0, recovery=10.0)
+    session = _FakeSession([429] * 6 + [200])
+    transport = HttpTransport(session, TransportOptions(max_retries=10, backoff_base=0.0), rate_limiter)
+
+    assert transport.request("GET", "http://localhost").status_code == 200
+    assert rate_limiter.rate == 100.0 / 64 + 10.0
+
+    # Successes raise the rate past the one it started from, up to 4 times that
+    rates = []
+    for _ in range(60):
+        transport.request("GET", "http://localhost")
+        rates.append(rate_limiter.rate)
+
+    assert rates == sorted(rates) and rates[-1] == 400.0
+
+
+def test_replay_matches_requests_regardless_of_host_and_key(tmp_path):
+    recorded_url = "https://www.flashflashrevolution.com/api/api.php?key=secret&action=chart&level=3"
+    entry = CassetteEntry("GET", recorded_url.split("?")[0], 200, b'{"chart": []}')
+    (tmp_path / f"{cassette_key('GET', recorded_url)}.json").write_bytes(encode(entry))
+
+    session = ReplaySession(tmp_path)
+
+    assert session.request("GET", "http://127.0.0.1:8000/api.php?key=other&level=3&action=chart").content == b'{"chart": []}'
+    assert session.request("GET", "http://127.0.0.1:8000/api.php?key=other&level=4&action=chart").status_code == 404
@@ -0,0 +1,71 @@
+import threading
+
+from utils.write_behind import WriteBehindQueue, persist
+
+
+def test_tasks_with_the_same_key_run_in_order():
+    done = []
+
+    with WriteBehindQueue(max_pending=4, writers=3) as write_behind:
+        for i in range(50):
+            write_behind.submit(i % 5, done.append, i)
+
+    for key in range(5):
+        assert [i for i in done if i % 5 == key] == list(range(key, 50, 5))
+
+
+def test_a_failed_task_drops_the_rest_of_its_key():
+    done = []
+
+    def fail():
+        raise OSError("disk full")
+
+    with WriteBehindQueue() as write_behind:
+        write_behind.submit(1, fail)
+        write_behind.submit(1, done.append, "level 1 done")
+        write_behind.submit(2, done.append, "level 2 done")
+        write_behind.flush()
+
+        write_behind.submit(1, done.append, "level 1 retried")
+
+    assert done == ["level 2 done", "level 1 retried"]
+
+
+def test_cleanup_tasks_run_after_a_failure_and_clear_it():
+    done = []
+
+    def fail():
+        raise OSError("disk full")
+
+    with WriteBehindQueue() as write_behind:
+        write_behind.submit(1, fail)
+        write_behind.submit(1, done.append, "page written")
+        write_behind.submit_cleanup(1, lambda: done.append(("closed", write_behind.failed(1))))
+        write_behind.submit(1, done.append, "level 1 retried")
+        write_behind.submit_cleanup(1, lambda: done.append(("closed", write_behind.failed(1))))
+
+    assert done == [("closed", True), "level 1 retried", ("closed", False)]
+
+
+def test_submit_blocks_while_the_writer_is_behind():
+    release = threading.Event()
+    submitted = threading.Event()
+
+    with WriteBehindQueue(max_pending=1) as write_behind:
+        write_behind.submit(1, release.wait)
+        write_behind.submit(1, lambda: None)
+
+        thread = threading.Thread(target=lambda: (write_behind.submit(1, lambda: None), submitted.set()))
+        thread.start()
+
+        assert not submitted.wait(0.1)
+        release.set()
+        assert submitted.wait(1)
+        thread.join()
+
+
+def test_persist_runs_inline_without_a_queue():
+    done = []
+    persist(1, done.append, "written")
+
+    assert done == ["written"]